@@ -0,0 +1,205 @@
+import asyncio
+import serial
+
+from ubloxDefines import *
+from ubloxTalk import GNSSDriver, logger, RUN_IDLE_PERIOD
+
+###############################
+### Async GNSS Driver class ###
+###############################
+class AsyncGNSSDriver(GNSSDriver):
+    """
+    GNSSDriver running on an asyncio event loop instead of a reader thread and a
+    Run() polling loop. The serial port is non-blocking and watched with
+    loop.add_reader(): bytes are framed and decoded as soon as they are readable,
+    and the PBIT/CBIT/IBIT/Operational FSM runs as a task woken by new data or
+    by its idle period. Many receivers can share one loop.
+    Polls and cfg transactions are also offered as awaitables that resolve with
+    the matching response (or raise asyncio.TimeoutError).
+    Needs a serial port with a selectable file descriptor (POSIX).
+    """
+    def __init__(self, port='/dev/ttyACM0', baudrate=9600, run_period=RUN_IDLE_PERIOD, **kwargs):
+        super().__init__(port, baudrate, timeout=0, ingest_mode=RxIngestMode.eIngestChunk, **kwargs)
+        self.loop_ = None
+        self.runPeriod_ = run_period
+        self.fsmTask_ = None
+        self.rxReady_ = None # asyncio.Event, created on the loop by start()
+
+    # Lifecycle
+    # ---------------------------------------------
+    async def start(self):
+        """Connect and launch the FSM task on the running loop."""
+        self.loop_ = asyncio.get_running_loop()
+        self.rxReady_ = asyncio.Event()
+        self.connect()
+        if self.is_connected():
+            self.fsmTask_ = self.loop_.create_task(self.run_fsm())
+
+    async def stop(self):
+        self.disconnect()
+        if self.fsmTask_ is not None:
+            self.fsmTask_.cancel()
+            try:
+                await self.fsmTask_
+            except asyncio.CancelledError:
+                pass
+            self.fsmTask_ = None
+
+    def connect(self):
+        # Also called by IBIT to restart the connection after a receiver reset
+        if self.is_connected():
+            self.disconnect()
+        try:
+            self.ser = serial.Serial(self.port, self.baudrate, timeout=0)
+            self.loop_.add_reader(self.ser.fileno(), self.on_readable)
+            self.running = True
+            logger.debug(f"Connected to {self.port} at {self.baudrate} baud (asyncio).")
+        except serial.SerialException as e:
+            logger.error(f"Connection failed: {e}")
+            self.ser = None
+
+    def disconnect(self):
+        self.running = False
+        if self.is_connected():
+            self.loop_.remove_reader(self.ser.fileno())
+            self.ser.close()
+            logger.info("Serial connection closed.")
+
+    def on_readable(self):
+        try:
+            data = self.ser.read(max(1, self.ser.in_waiting))
+        except serial.SerialException as e:
+            logger.error(f"Serial read failed: {e}")
+            self.disconnect()
+            return
+        if data:
+            self.ingest(data)
+            self.read_rx_ring()
+            self.rxReady_.set()
+
+    async def run_fsm(self):
+        """FSM task: one Run() step per RX wakeup, or per run period with no RX data."""
+        while self.running:
+            self.Run()
+            try:
+                await asyncio.wait_for(self.rxReady_.wait(), self.runPeriod_)
+            except asyncio.TimeoutError:
+                pass
+            self.rxReady_.clear()
+
+    # Awaitable requests
+    # ---------------------------------------------
+    async def request(self, send, keys, match=None, timeout=UBX_RESPONSE_TIMEOUT):
+        """
+        Call send() and wait for the first message published under any of keys for which
+        match(record) holds. Returns its record.
+        """
+        future = self.loop_.create_future()
+        def on_response(ts, record):
+            if not future.done() and (match is None or match(record)):
+                future.set_result(record)
+        subscriptions = [self.subscribe(key, on_response) for key in keys]
+        try:
+            send()
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            for subscription in subscriptions:
+                self.unsubscribe(subscription)
+
+    async def send_acked(self, msg, timeout=UBX_RESPONSE_TIMEOUT):
+        """Send a UBX command and wait for its ACK. Returns True if acknowledged, False if NAKed."""
+        msg_class, msg_id = msg[UBX_MSG_CLASS_POS], msg[UBX_MSG_ID_POS]
+        def send():
+            self.send_request(msg, ack=True)
+            self.cmds.bPendingAck_ = True
+        ack = await self.request(send,
+                                 ((UBX_ACK_CLASS, UBX_ACK_ACK_ID), (UBX_ACK_CLASS, UBX_ACK_NAK_ID)),
+                                 lambda record: record.clsID == msg_class and record.msgID == msg_id,
+                                 timeout)
+        return ack.ack
+
+    async def req_mon_ver_async(self, timeout=UBX_RESPONSE_TIMEOUT):
+        return await self.request(self.req_mon_ver, ((UBX_MON_CLASS, UBX_MON_VER_ID),), timeout=timeout)
+
+    async def req_mon_rf_async(self, timeout=UBX_RESPONSE_TIMEOUT):
+        return await self.request(self.req_mon_rf, ((UBX_MON_CLASS, UBX_MON_RF_ID),), timeout=timeout)
+
+    async def req_mon_comms_async(self, timeout=UBX_RESPONSE_TIMEOUT):
+        return await self.request(self.req_mon_comms, ((UBX_MON_CLASS, UBX_MON_COMMS_ID),), timeout=timeout)
+
+    async def req_flash_mem_async(self, timeout=UBX_RESPONSE_TIMEOUT):
+        return await self.request(self.req_flash_mem, ((UBX_LOG_CLASS, UBX_LOG_INFO_ID),), timeout=timeout)
+
+    async def req_supported_constellations_async(self, timeout=UBX_RESPONSE_TIMEOUT):
+        return await self.request(self.req_supported_constellations, ((UBX_MON_CLASS, UBX_MON_GNSS_ID),), timeout=timeout)
+
+    async def req_ubx_nav_pvt_async(self, timeout=UBX_RESPONSE_TIMEOUT):
+        return await self.request(self.req_ubx_nav_pvt, ((UBX_NAV_CLASS, UBX_NAV_PVT_ID),), timeout=timeout)
+
+    async def cfg_ctrl_async(self, cfgdb, timeout=UBX_RESPONSE_TIMEOUT):
+        """
+        Awaitable counterpart of cfg_ctrl(): VALGET the cfg items of cfgdb in batches and
+        VALSET the ones not holding their expected value (or left out of the VALGET
+        response), in RAM and flash (if attached), until every item is read back as
+        expected. Returns False if a VALGET or VALSET is NAKed.
+        Like cfg_ctrl(), it keeps going while the receiver does not take a value: bound
+        it with asyncio.wait_for() if needed.
+        """
+        while True:
+            keyIds = [keyId for keyId in cfgdb if not cfgdb.is_set(keyId)][:MAX_VALGET_REQ_ITEMS]
+            if not keyIds:
+                logger.debug("CFG CTRL > All cfg values set!")
+                return True
+
+            logger.debug(f"CFG CTRL > Sending VALGET for {len(keyIds)}/{len(cfgdb)} cfg items")
+            valget_msg = self.build_cfg_valget_keys(keyIds)
+            valget = await self.request(lambda: self.send_command(valget_msg),
+                                        ((UBX_CFG_CLASS, UBX_CFG_VALGET_ID), (UBX_ACK_CLASS, UBX_ACK_NAK_ID)),
+                                        lambda record: not isinstance(record, self.AckData) or
+                                                       (record.clsID, record.msgID) == (UBX_CFG_CLASS, UBX_CFG_VALGET_ID),
+                                        timeout)
+            if isinstance(valget, self.AckData):
+                logger.error("CFG CTRL > CFG-VALGET NAKed")
+                return False
+            for keyId, keyValue in valget.items.items():
+                self.cfgr.rxValgetItemsRing_.pop(keyId, None)
+                if keyId in cfgdb:
+                    cfgdb.set_actual(keyId, keyValue)
+            # Includes the keys left out of the response, which would otherwise be asked for again forever
+            keyIdsToValset = [keyId for keyId in keyIds if not cfgdb.is_set(keyId)]
+            if not keyIdsToValset:
+                continue
+
+            # BBR is skipped since it was fully erased at the beginning of PBIT, flash only if attached
+            layers = [CfgMemLayer.eLayerRAM] + ([CfgMemLayer.eLayerFlash] if self.bFlashAttached_ else [])
+            for layer in layers:
+                valset_msg, cfg_items_cntr = self.build_cfg_valset(cfgdb, keyIdsToValset, layer)
+                if cfg_items_cntr == 0:
+                    continue
+                logger.debug(f"CFG CTRL > Sending CFG-VALSET command for {cfg_items_cntr} cfg items for layer={layer.value}")
+                if not await self.send_acked(valset_msg, timeout):
+                    logger.error(f"CFG CTRL > CFG-VALSET NAKed for layer={layer.value}")
+                    return False
+            # Items set are read back with the next VALGET
+
+
+############
+### Main ###
+############
+async def main(ports, baudrate):
+    drivers = [AsyncGNSSDriver(port, baudrate) for port in ports]
+    for driver in drivers:
+        await driver.start()
+    try:
+        while any(driver.is_connected() for driver in drivers):
+            await asyncio.sleep(1.0)
+    finally:
+        for driver in drivers:
+            await driver.stop()
+
+if __name__ == "__main__":
+    import sys
+    try:
+        asyncio.run(main(sys.argv[1:] or ['/dev/ttyACM0'], 38400))
+    except KeyboardInterrupt:
+        print("\n[AsyncGNSSDriver] Stopped by user.")
@@ -0,0 +1,350 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tty
+
+from ubloxDefines import *
+from ubloxCfgTable import CFG_TABLE_CACHE
+from ubloxFraming import pack_nmea_sentence, scan_frames, ubx_checksum, verify_ubx_frames
+from ubloxTalk import GNSSDriver, logger, RUN_IDLE_PERIOD
+from ubloxManager import GNSSReceiverManager
+from ubloxSim import SimulatedReceiver, synthetic_nav_pvt, synthetic_nav_status
+
+#################
+### Constants ###
+#################
+SERIAL_CHUNK_SIZE = 4096 # typical OS serial buffer drained by a single read(in_waiting)
+SYNTHETIC_EPOCHS = 5000
+CKSUM_BENCH_SIZES = (8, 16, 64, 92, 256, 1024)
+CKSUM_BENCH_BYTES = 2_000_000 # bytes checksummed per payload size
+MUX_BENCH_RECEIVERS = (1, 8, 32, 64)
+MUX_BENCH_SECONDS = 3.0
+MUX_BENCH_EPOCH_RATE = 10 # [Hz] epochs streamed per receiver
+SIM_BENCH_BAUD = 460800
+SIM_BENCH_NAV_RATE = 300 # [Hz] epochs streamed in the throughput run, near the line rate
+SIM_BENCH_SECONDS = 3.0
+SIM_BENCH_CORRUPT_RATE = 0.01
+SIM_BENCH_BIT_TIMEOUT = 30.0 # [seconds]
+STARTUP_BENCH_RUNS = 15 # fresh interpreters per cache state, the median is reported
+# Run in a fresh interpreter: import, first driver (builds the shared cfg tables), next driver
+STARTUP_BENCH_CODE = ("import time; t0 = time.perf_counter(); import ubloxTalk; t1 = time.perf_counter(); "
+                      "ubloxTalk.GNSSDriver(port=None); t2 = time.perf_counter(); ubloxTalk.GNSSDriver(port=None); "
+                      "print(t1 - t0, t2 - t1, time.perf_counter() - t2)")
+
+###########################
+### Synthetic captures ###
+###########################
+def synthetic_capture(epochs=SYNTHETIC_EPOCHS):
+    """Mixed UBX + NMEA byte stream resembling one epoch per second of a receiver output."""
+    capture = bytearray()
+    for epoch in range(epochs):
+        iTOW = 300_000_000 + 1000 * epoch
+        capture += synthetic_nav_pvt(iTOW)
+        capture += synthetic_nav_status(iTOW)
+        capture += pack_nmea_sentence("GNGGA,120000.00,4122.80000,N,00210.20000,E,1,14,0.80,70.0,M,50.0,M,,")
+        capture += pack_nmea_sentence("GPGSV,1,1,04,02,45,120,40,05,30,210,38,12,60,045,44,25,15,300,33,1")
+    return bytes(capture)
+
+def load_capture(path):
+    if path is None:
+        return synthetic_capture()
+    with open(path, 'rb') as f:
+        return f.read()
+
+def readline_chunks(capture):
+    """Chunks as returned by successive serial readline() calls."""
+    start = 0
+    while start < len(capture):
+        end = capture.find(b'\n', start)
+        end = len(capture) if end < 0 else end + 1
+        yield capture[start:end]
+        start = end
+
+def fixed_chunks(capture, size=SERIAL_CHUNK_SIZE):
+    """Chunks as returned by successive serial read(in_waiting) calls."""
+    for start in range(0, len(capture), size):
+        yield capture[start : start + size]
+
+def open_pty_pair():
+    """Raw pseudo-terminal pair: (master fd, slave fd, slave device path)."""
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    return master, slave, os.ttyname(slave)
+
+def stream_to_ptys(masters, capture, chunk_size, rate, seconds):
+    """Producer process: write chunk_size bytes of capture to every pty master at rate Hz."""
+    for master in masters:
+        os.set_blocking(master, False)
+    pos = 0
+    startTs = time.monotonic()
+    nextTs = startTs
+    while time.monotonic() - startTs < seconds:
+        chunk = capture[pos : pos + chunk_size]
+        pos = pos + chunk_size if pos + 2 * chunk_size <= len(capture) else 0
+        for master in masters:
+            try:
+                os.write(master, chunk)
+            except BlockingIOError:
+                pass # reader behind, drop it
+        nextTs += 1.0 / rate
+        time.sleep(max(0.0, nextTs - time.monotonic()))
+
+def cpu_time():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+##################
+### Benchmarks ###
+##################
+def bench_ingest(capture):
+    """Feed the same capture through the deque and the chunked ingest paths."""
+    print(f"Ingest benchmark on {len(capture)} bytes")
+    for mode, chunker in ((RxIngestMode.eIngestDeque, readline_chunks),
+                          (RxIngestMode.eIngestChunk, fixed_chunks)):
+        driver = GNSSDriver(ingest_mode=mode)
+        chunks = list(chunker(capture))
+        startTs = time.perf_counter()
+        for chunk in chunks:
+            driver.ingest(chunk)
+            driver.read_rx_ring()
+        elapsed = time.perf_counter() - startTs
+
+        extra = ""
+        if mode == RxIngestMode.eIngestChunk:
+            ring = driver.rxRing_
+            extra = f" | in={ring.bytesIn_} consumed={ring.bytesConsumed_} dropped={ring.bytesDropped_}"
+        print(f"  {mode.name:<13} {elapsed*1e3:9.1f} ms  {len(capture)/elapsed/1e6:7.2f} MB/s  "
+              f"cksumErrors={driver.cksumErrors} lastPVT=({driver.last_pvt.lat:.7f}, {driver.last_pvt.lon:.7f}){extra}")
+
+def bench_scan(capture):
+    """Python-level parser iterations per received byte: state machine vs whole-buffer scanner."""
+    print(f"Frame scan benchmark on {len(capture)} bytes")
+
+    # Count state machine steps by wrapping every parser state handler
+    driver = GNSSDriver(ingest_mode=RxIngestMode.eIngestDeque)
+    steps = [0]
+    for name in ("parseNone", "parseUbxSyncChar2", "parseNmea", "parseUbxPayloadLen", "parseUbxPayload"):
+        handler = getattr(driver, name)
+        def counted(handler=handler):
+            steps[0] += 1
+            handler()
+        setattr(driver, name, counted)
+    startTs = time.perf_counter()
+    for chunk in readline_chunks(capture):
+        driver.ingest(chunk)
+        driver.read_rx_ring()
+    elapsed = time.perf_counter() - startTs
+    print(f"  state machine {steps[0]:9d} steps  {steps[0]/len(capture):6.3f} steps/byte  {elapsed*1e3:9.1f} ms")
+
+    startTs = time.perf_counter()
+    spans, resume = scan_frames(capture, 0, len(capture), driver.validUbxClassAndID)
+    elapsed = time.perf_counter() - startTs
+    print(f"  scanner       {len(spans):9d} spans  {len(spans)/len(capture):6.3f} spans/byte  {elapsed*1e3:9.1f} ms")
+
+def ubx_checksum_loop(data):
+    """Reference per-byte Python loop, as previously used by GNSSDriver.computeUbxCRC."""
+    ck_a = 0
+    ck_b = 0
+    for byte in data:
+        ck_a = (ck_a + byte) & 0xFF
+        ck_b = (ck_b + ck_a) & 0xFF
+    return ck_a, ck_b
+
+def bench_checksum(capture):
+    """UBX checksum throughput: per-byte loop vs prefix sums, single frames and bulk verification."""
+    print("UBX checksum benchmark [MB/s]")
+    print(f"  {'payload':>8} {'loop':>8} {'fast':>8}")
+    for size in CKSUM_BENCH_SIZES:
+        data = os.urandom(size + 4) # class, id and length are checksummed too
+        assert ubx_checksum(data) == ubx_checksum_loop(data)
+        reps = max(1, CKSUM_BENCH_BYTES // len(data))
+        rates = []
+        for func in (ubx_checksum_loop, ubx_checksum):
+            startTs = time.perf_counter()
+            for _ in range(reps):
+                func(data)
+            rates.append(reps * len(data) / (time.perf_counter() - startTs) / 1e6)
+        print(f"  {size:8d} {rates[0]:8.1f} {rates[1]:8.1f}")
+
+    spans = [span for span in scan_frames(capture, 0, len(capture))[0] if span[2] == FrameKind.eFrameUBX]
+    frameBytes = sum(end - start for start, end, kind in spans)
+    startTs = time.perf_counter()
+    single = [ubx_checksum(capture[start + 2 : end - 2]) == (capture[end - 2], capture[end - 1])
+              for start, end, kind in spans]
+    singleElapsed = time.perf_counter() - startTs
+    startTs = time.perf_counter()
+    bulk = verify_ubx_frames(capture, spans)
+    bulkElapsed = time.perf_counter() - startTs
+    assert single == bulk
+    print(f"  {len(spans)} capture frames: per-frame {frameBytes/singleElapsed/1e6:.1f} MB/s, "
+          f"bulk {frameBytes/bulkElapsed/1e6:.1f} MB/s, {bulk.count(False)} bad")
+
+def run_mux_model(model, nReceivers, capture):
+    """Serve nReceivers pty receivers with one of both models. Returns (CPU seconds, bytes parsed, threads)."""
+    ptys = [open_pty_pair() for _ in range(nReceivers)]
+    drivers = []
+    for master, slave, name in ptys:
+        driver = GNSSDriver(port=name, baudrate=460800, ingest_mode=RxIngestMode.eIngestChunk,
+                            reader_mode=RxReaderMode.eReaderBlocking)
+        driver.driverMode_ = GnssDriverMode.Failure # stream parsing only, no FSM traffic
+        drivers.append(driver)
+
+    chunkSize = len(synthetic_capture(1))
+    producer = multiprocessing.get_context('fork').Process(
+        target=stream_to_ptys, args=([p[0] for p in ptys], capture, chunkSize, MUX_BENCH_EPOCH_RATE, MUX_BENCH_SECONDS))
+
+    stop = threading.Event()
+    if model == "threads":
+        def consume(driver):
+            while not stop.is_set():
+                driver.wait_for_rx(timeout=RUN_IDLE_PERIOD)
+                driver.Run()
+        for driver in drivers:
+            driver.connect()
+        consumers = [threading.Thread(target=consume, args=(driver,), daemon=True) for driver in drivers]
+        for consumer in consumers:
+            consumer.start()
+        threads = threading.active_count()
+        producer.start()
+        cpuStart = cpu_time()
+        producer.join()
+        cpuElapsed = cpu_time() - cpuStart
+        stop.set()
+        for consumer in consumers:
+            consumer.join()
+        for driver in drivers:
+            driver.disconnect()
+    else:
+        manager = GNSSReceiverManager()
+        for driver in drivers:
+            manager.add(driver)
+        threads = threading.active_count()
+        producer.start()
+        cpuStart = cpu_time()
+        manager.run(duration=MUX_BENCH_SECONDS)
+        cpuElapsed = cpu_time() - cpuStart
+        producer.join()
+        manager.close()
+
+    parsed = sum(driver.rxRing_.bytesConsumed_ for driver in drivers)
+    for master, slave, name in ptys:
+        os.close(master)
+        os.close(slave)
+    return cpuElapsed, parsed, threads
+
+def bench_mux(capture):
+    """CPU per receiver: reader + Run() threads per receiver vs a single selectors loop, over pty pairs."""
+    print(f"Receiver multiplexing benchmark: {MUX_BENCH_EPOCH_RATE} Hz epochs per receiver for {MUX_BENCH_SECONDS} s")
+    print(f"  {'receivers':>9} {'model':>8} {'threads':>7} {'CPU %':>7} {'CPU %/rx':>8} {'parsed KB':>10}")
+    for nReceivers in MUX_BENCH_RECEIVERS:
+        for model in ("threads", "selector"):
+            cpuElapsed, parsed, threads = run_mux_model(model, nReceivers, capture)
+            cpuPct = 100 * cpuElapsed / MUX_BENCH_SECONDS
+            print(f"  {nReceivers:9d} {model:>8} {threads:7d} {cpuPct:7.1f} {cpuPct/nReceivers:8.2f} {parsed/1e3:10.1f}")
+
+def run_sim_driver(driver, until, timeout=SIM_BENCH_BIT_TIMEOUT):
+    """Step driver against the simulated receiver until until() holds. Returns the elapsed seconds, or None on timeout."""
+    startTs = time.monotonic()
+    while not until():
+        if time.monotonic() - startTs > timeout:
+            return None
+        driver.wait_for_rx(timeout=RUN_IDLE_PERIOD)
+        driver.Run()
+    return time.monotonic() - startTs
+
+def bench_sim(capture):
+    """End-to-end over a pty against SimulatedReceiver: PBIT and CBIT latency, then sustained parse throughput."""
+    print(f"Simulated receiver benchmark at {SIM_BENCH_BAUD} baud")
+    for label, flash in (("flash", True), ("no flash", False)):
+        with SimulatedReceiver(nav_rate=1.0, baudrate=SIM_BENCH_BAUD, flash=flash, seed=1) as sim:
+            driver = GNSSDriver(port=sim.port, baudrate=SIM_BENCH_BAUD, ingest_mode=RxIngestMode.eIngestChunk,
+                                reader_mode=RxReaderMode.eReaderBlocking)
+            driver.connect()
+            pbit = run_sim_driver(driver, lambda: driver.driverMode_ in (GnssDriverMode.Operational, GnssDriverMode.Failure))
+            cbit = None
+            if driver.driverMode_ == GnssDriverMode.Operational:
+                # First Operational step resets its data, then shorten the period so CBIT is due right away
+                driver.Run()
+                driver.opmode.cbit_period_ = RUN_IDLE_PERIOD
+                if run_sim_driver(driver, lambda: driver.driverMode_ == GnssDriverMode.CBIT) is not None:
+                    cbit = run_sim_driver(driver, lambda: driver.driverMode_ != GnssDriverMode.CBIT)
+            mode = driver.driverMode_.name
+            driver.disconnect()
+        pbitStr = "timeout" if pbit is None else f"{pbit*1e3:.0f} ms"
+        cbitStr = "timeout" if cbit is None else f"{cbit*1e3:.0f} ms"
+        print(f"  {label:<8} PBIT {pbitStr:>8}  CBIT {cbitStr:>8}  -> {mode}, {sim.rxFrames_} commands, {sim.naks_} NAKs")
+
+    for corrupt in (0.0, SIM_BENCH_CORRUPT_RATE):
+        with SimulatedReceiver(nav_rate=SIM_BENCH_NAV_RATE, baudrate=SIM_BENCH_BAUD, corrupt_rate=corrupt, seed=1) as sim:
+            driver = GNSSDriver(port=sim.port, baudrate=SIM_BENCH_BAUD, ingest_mode=RxIngestMode.eIngestChunk,
+                                reader_mode=RxReaderMode.eReaderBlocking)
+            driver.driverMode_ = GnssDriverMode.Failure # stream parsing only, no FSM traffic
+            driver.connect()
+            # Corrupted frames are logged as errors, keep them out of the measurement
+            logger.setLevel(logging.CRITICAL)
+            cpuStart = cpu_time()
+            run_sim_driver(driver, lambda: False, SIM_BENCH_SECONDS)
+            cpuElapsed = cpu_time() - cpuStart
+            logger.setLevel(logging.WARNING)
+            driver.disconnect()
+        frames = driver.ubxFrames_ + driver.nmeaFrames_
+        print(f"  {SIM_BENCH_NAV_RATE} Hz corrupt={corrupt:<5} {frames/SIM_BENCH_SECONDS:8.0f} frames/s  "
+              f"{sim.txBytes_/SIM_BENCH_SECONDS/1e3:7.1f} KB/s  cksumErrors={driver.cksumErrors} "
+              f"(corrupted {sim.corrupted_})  CPU {100*cpuElapsed/SIM_BENCH_SECONDS:.1f} %")
+
+def run_startup():
+    """(interpreter wall, import, first GNSSDriver(), next GNSSDriver()) [seconds] of a fresh interpreter."""
+    startTs = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", STARTUP_BENCH_CODE], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    wall = time.perf_counter() - startTs
+    return (wall, *(float(x) for x in out.split()))
+
+def bench_startup(capture):
+    """Short-lived process cost: import of ubloxTalk and driver construction, ICD table cache cold and warm."""
+    print(f"Startup, median of {STARTUP_BENCH_RUNS} fresh interpreters [ms]")
+    print(f"  {'ICD cache':<9} {'process':>8} {'import':>8} {'1st driver':>11} {'next driver':>12}")
+    for label, cold in (("cold", True), ("warm", False)):
+        samples = []
+        for _ in range(STARTUP_BENCH_RUNS):
+            if cold:
+                try:
+                    os.remove(CFG_TABLE_CACHE)
+                except OSError:
+                    pass
+            samples.append(run_startup())
+        wall, imp, first, following = (statistics.median(column) * 1e3 for column in zip(*samples))
+        print(f"  {label:<9} {wall:8.1f} {imp:8.1f} {first:11.2f} {following:12.3f}")
+
+############
+### Main ###
+############
+BENCHMARKS = {
+    "ingest": bench_ingest,
+    "scan": bench_scan,
+    "checksum": bench_checksum,
+    "mux": bench_mux,
+    "sim": bench_sim,
+    "startup": bench_startup,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ubloxTalker micro-benchmarks")
+    parser.add_argument("bench", choices=sorted(BENCHMARKS) + ["all"])
+    parser.add_argument("--capture", default=None, help="raw UBX/NMEA capture file (synthetic if not given)")
+    args = parser.parse_args()
+
+    # Keep per-message debug logging out of the measurements
+    logger.setLevel(logging.WARNING)
+
+    capture = load_capture(args.capture)
+    selected = BENCHMARKS.values() if args.bench == "all" else [BENCHMARKS[args.bench]]
+    for bench in selected:
+        bench(capture)
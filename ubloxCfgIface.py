@@ -1,12 +1,12 @@
-import copy
-from ubloxDefines import CFG_VAL_UNKNOWN, APP_SPECIFIC_CFG
+from ubloxDefines import CFG_VAL_UNKNOWN
 
 ###################################
 ### UBX Configuration Interface ###
 ###################################
 
 # Expected value for every item in UBX_DEFAULT_CFG is,
-# of course, the default one defined in the ICD
+# of course, the default one defined in the ICD.
+# Only evaluated to (re)build the ICD config table, see icd_cfg_table()
 UBX_COMPLETE_ICD_DEFAULT_CFG = {
     # CFG-ANA section
     # ---------------------
@@ -3725,9 +3725,16 @@ UBX_COMPLETE_ICD_DEFAULT_CFG = {
     }
 }
 
-# From the default config dictionary, exclude those config items in the
-# application-specific configuration dict
-UBX_REMAINS_DEFAULT_CFG = copy.deepcopy(UBX_COMPLETE_ICD_DEFAULT_CFG)
-for keyId in APP_SPECIFIC_CFG:
-    if keyId in UBX_REMAINS_DEFAULT_CFG:
-        del UBX_REMAINS_DEFAULT_CFG[keyId]
+# Tables drivers clone their working copies from, built on first use (see ubloxCfgTable)
+_CFG_TABLE_ALIASES = {
+    "UBX_ICD_CFG_TABLE": "icd_cfg_table",
+    "APP_SPECIFIC_CFG_TABLE": "app_cfg_table",
+    # The default config, without the items of the application-specific configuration
+    "UBX_REMAINS_DEFAULT_CFG": "remains_cfg_table",
+}
+
+def __getattr__(name):
+    if name in _CFG_TABLE_ALIASES:
+        import ubloxCfgTable
+        return getattr(ubloxCfgTable, _CFG_TABLE_ALIASES[name])()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,322 @@
+import functools
+import marshal
+import os
+import sys
+from array import array
+
+from ubloxDefines import CFG_VAL_UNKNOWN, UBX_CFG_VALUE_FMT, APP_SPECIFIC_CFG
+
+#################
+### Constants ###
+#################
+CFG_TYPES = tuple(UBX_CFG_VALUE_FMT) # type code -> cfg item value type (e.g. "U2")
+CFG_TYPE_CODES = {valueType: code for code, valueType in enumerate(CFG_TYPES)}
+CFG_ITEM_FIELDS = ("name", "type", "expectedVal", "actualVal")
+CFG_GROUP_NAME_PARTS = 2 # "CFG-MSGOUT-UBX_NAV_PVT_UART1" belongs to group "CFG-MSGOUT"
+# Cache of the shared tables, next to the bytecode of the modules they are built from
+CFG_CACHE_SOURCES = tuple(os.path.join(os.path.dirname(os.path.abspath(__file__)), module)
+                          for module in ("ubloxCfgIface.py", "ubloxDefines.py", "ubloxCfgTable.py"))
+CFG_TABLE_CACHE = os.path.join(os.path.dirname(CFG_CACHE_SOURCES[0]), "__pycache__",
+                               f"ubloxCfgTables.{sys.implementation.cache_tag}.marshal")
+CFG_CACHE_VERSION = 1
+
+def cfg_group_name(name):
+    return "-".join(name.split("-", CFG_GROUP_NAME_PARTS)[:CFG_GROUP_NAME_PARTS])
+
+class CfgItem:
+    """
+    Row of a CfgTable with the interface of the former dict-of-dicts entries, i.e.
+    item["name"], item["type"], item["expectedVal"] and item["actualVal"] (the only
+    writable one). For occasional callers, hot paths use the CfgTable accessors.
+    """
+    __slots__ = ("table_", "pos_")
+
+    def __init__(self, table, pos):
+        self.table_ = table
+        self.pos_ = pos
+
+    def __getitem__(self, field):
+        table, pos = self.table_, self.pos_
+        if field == "actualVal":
+            return table.actual_at(pos)
+        if field == "expectedVal":
+            return table.expected_[pos]
+        if field == "type":
+            return CFG_TYPES[table.types_[pos]]
+        if field == "name":
+            return table.names_[pos]
+        raise KeyError(field)
+
+    def __setitem__(self, field, value):
+        if field != "actualVal":
+            raise KeyError(f"{field} is read-only")
+        self.table_.set_actual_at(self.pos_, value)
+
+    def keys(self):
+        return CFG_ITEM_FIELDS
+
+    def __iter__(self):
+        return iter(CFG_ITEM_FIELDS)
+
+    def __repr__(self):
+        return repr({field: self[field] for field in CFG_ITEM_FIELDS})
+
+class CfgView:
+    """
+    Live view of some rows of a CfgTable, e.g. a group, in key ID order. Columns are
+    read through the table, so the actual values seen are always the current ones.
+    """
+    __slots__ = ("table_", "rows_")
+
+    def __init__(self, table, rows):
+        self.table_ = table
+        self.rows_ = rows # array('H') of table rows
+
+    def __len__(self):
+        return len(self.rows_)
+
+    def __iter__(self):
+        keys = self.table_.keys_
+        return (keys[i] for i in self.rows_)
+
+    def key_ids(self):
+        keys = self.table_.keys_
+        return [keys[i] for i in self.rows_]
+
+    def names(self):
+        names = self.table_.names_
+        return [names[i] for i in self.rows_]
+
+    def value_types(self):
+        types = self.table_.types_
+        return [CFG_TYPES[types[i]] for i in self.rows_]
+
+    def expected(self):
+        expected = self.table_.expected_
+        return [expected[i] for i in self.rows_]
+
+    def actual(self):
+        actualAt = self.table_.actual_at
+        return [actualAt(i) for i in self.rows_]
+
+    def items(self):
+        """(key ID, CfgItem) pairs."""
+        table = self.table_
+        return ((table.keys_[i], CfgItem(table, i)) for i in self.rows_)
+
+#####################
+### Config tables ###
+#####################
+class CfgTable:
+    """
+    Configuration items of a receiver as parallel columns instead of one dict per
+    item: key IDs (sorted uint32), value type codes (see CFG_TYPES), names and
+    expected values, plus the actual values seen on the receiver. Key IDs and names
+    are indexed (key ID -> row, name -> row) and so are name prefixes:
+    group("CFG-MSGOUT") is a view of every CFG-MSGOUT-* item, the rows of every
+    group being listed once at build time and those of any other prefix on its
+    first query.
+    The definitions (every column but the actual values, indexes included) are
+    immutable and shared by the clones of a table, so any number of drivers share a
+    single copy of the ~580 ICD items. Actual values live in a sparse per-table
+    overlay, {row: (generation, value)}: entries of an older generation read as
+    CFG_VAL_UNKNOWN, so reset_actual() only bumps the generation, in O(1).
+    Iterating a table yields its key IDs in ascending order.
+    """
+    def __init__(self, keys, types, names, expected, actual=None, index=None):
+        self.keys_ = keys # array('I')
+        self.types_ = types # array('B') of type codes
+        self.names_ = names # tuple
+        self.expected_ = expected # tuple
+        self.generation_ = 0
+        self.overlay_ = {} # row -> (generation, actual value), rows never seen are unknown
+        if actual is not None:
+            for i, value in enumerate(actual):
+                if value != CFG_VAL_UNKNOWN:
+                    self.overlay_[i] = (0, value)
+        if index is None:
+            prefixes = {}
+            for i, name in enumerate(names):
+                prefixes.setdefault(cfg_group_name(name), array('H')).append(i)
+            index = ({keyId: i for i, keyId in enumerate(keys)}, {name: i for i, name in enumerate(names)},
+                     prefixes, tuple(prefixes))
+        self.index_ = index
+        self.pos_, self.byName_, self.prefixes_, self.groups_ = index # prefixes_: name prefix -> rows
+
+    @classmethod
+    def from_dict(cls, cfgdb):
+        """Table of a {key ID: {"name", "type", "expectedVal", "actualVal"}} config dict."""
+        keyIds = sorted(cfgdb)
+        items = [cfgdb[keyId] for keyId in keyIds]
+        return cls(array('I', keyIds),
+                   array('B', (CFG_TYPE_CODES[item["type"]] for item in items)),
+                   tuple(item["name"] for item in items),
+                   tuple(item["expectedVal"] for item in items),
+                   [item["actualVal"] for item in items])
+
+    def clone(self):
+        """Copy sharing the definitions, with its own copy of the actual values."""
+        table = CfgTable(self.keys_, self.types_, self.names_, self.expected_, index=self.index_)
+        table.generation_ = self.generation_
+        table.overlay_ = self.overlay_.copy()
+        return table
+
+    def without(self, keyIds):
+        """New table with every item but the ones in keyIds."""
+        keep = [i for i, keyId in enumerate(self.keys_) if keyId not in keyIds]
+        return CfgTable(array('I', (self.keys_[i] for i in keep)),
+                        array('B', (self.types_[i] for i in keep)),
+                        tuple(self.names_[i] for i in keep),
+                        tuple(self.expected_[i] for i in keep),
+                        [self.actual_at(i) for i in keep])
+
+    def reset_actual(self):
+        """Forget every actual value, in O(1)."""
+        self.generation_ += 1 # stale entries are overwritten as values are seen again
+
+    def generation(self):
+        """Number of reset_actual() calls so far."""
+        return self.generation_
+
+    def actual_at(self, i):
+        entry = self.overlay_.get(i)
+        return entry[1] if entry is not None and entry[0] == self.generation_ else CFG_VAL_UNKNOWN
+
+    def set_actual_at(self, i, value):
+        self.overlay_[i] = (self.generation_, value)
+
+    # Container interface
+    # ---------------------------------------------
+    def __len__(self):
+        return len(self.keys_)
+
+    def __iter__(self):
+        return iter(self.keys_)
+
+    def __contains__(self, keyId):
+        return keyId in self.pos_
+
+    def __getitem__(self, keyId):
+        return CfgItem(self, self.pos_[keyId])
+
+    def items(self):
+        """(key ID, CfgItem) pairs, like the former config dicts."""
+        return ((keyId, CfgItem(self, i)) for i, keyId in enumerate(self.keys_))
+
+    # Column accessors, O(1) by key ID
+    # ---------------------------------------------
+    def name(self, keyId):
+        return self.names_[self.pos_[keyId]]
+
+    def value_type(self, keyId):
+        return CFG_TYPES[self.types_[self.pos_[keyId]]]
+
+    def expected(self, keyId):
+        return self.expected_[self.pos_[keyId]]
+
+    def actual(self, keyId):
+        return self.actual_at(self.pos_[keyId])
+
+    def set_actual(self, keyId, value):
+        self.overlay_[self.pos_[keyId]] = (self.generation_, value)
+
+    def is_set(self, keyId):
+        """Whether the item is known to hold its expected value."""
+        i = self.pos_[keyId]
+        return self.actual_at(i) == self.expected_[i]
+
+    # Name indexes
+    # ---------------------------------------------
+    def key_of(self, name):
+        """Key ID of the item called name (e.g. "CFG-PM-POSUPDATEPERIOD"), None if there is none."""
+        i = self.byName_.get(name)
+        return None if i is None else self.keys_[i]
+
+    def find(self, name):
+        """CfgItem called name, None if there is none."""
+        i = self.byName_.get(name)
+        return None if i is None else CfgItem(self, i)
+
+    def groups(self):
+        """Names of the groups of items in the table, e.g. "CFG-MSGOUT"."""
+        return self.groups_
+
+    def group(self, prefix):
+        """CfgView of the items whose name starts with prefix (a group name, or any other prefix)."""
+        rows = self.prefixes_.get(prefix)
+        if rows is None:
+            # Cache it for every clone, dict assignment is atomic
+            rows = array('H', (i for i, name in enumerate(self.names_) if name.startswith(prefix)))
+            self.prefixes_[prefix] = rows
+        return CfgView(self, rows)
+
+    # Compact form
+    # ---------------------------------------------
+    def to_columns(self):
+        """Immutable columns and indexes as plain marshal-able values, what from_columns() takes back."""
+        pos, byName, prefixes, groups = self.index_
+        return (self.keys_.tobytes(), self.types_.tobytes(), self.names_, self.expected_,
+                (pos, byName, {prefix: rows.tobytes() for prefix, rows in prefixes.items()}, groups))
+
+    @classmethod
+    def from_columns(cls, keys, types, names, expected, index):
+        pos, byName, prefixes, groups = index
+        return cls(array('I', keys), array('B', types), names, expected,
+                   index=(pos, byName, {prefix: array('H', rows) for prefix, rows in prefixes.items()}, groups))
+
+############################
+### Shared config tables ###
+############################
+# Built on first use rather than at import: importing ubloxCfgIface evaluates the
+# whole ICD literal, so it is only done when the cache below is missing or stale.
+def cfg_sources_stamp():
+    """(mtime, size) of the modules the cached tables are built from."""
+    return tuple((stat.st_mtime_ns, stat.st_size) for stat in map(os.stat, CFG_CACHE_SOURCES))
+
+def load_cfg_cache():
+    """{table name: CfgTable} from CFG_TABLE_CACHE, None if it is missing or stale."""
+    try:
+        with open(CFG_TABLE_CACHE, 'rb') as f:
+            version, stamp, types, tables = marshal.loads(f.read()) # marshal.load(f) reads in tiny pieces
+        if version != CFG_CACHE_VERSION or stamp != cfg_sources_stamp() or types != CFG_TYPES:
+            return None
+        return {name: CfgTable.from_columns(*columns) for name, columns in tables.items()}
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+def write_cfg_cache(tables):
+    """Best effort, the cache is only an optimization."""
+    tmpPath = f"{CFG_TABLE_CACHE}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(CFG_TABLE_CACHE), exist_ok=True)
+        with open(tmpPath, 'wb') as f:
+            marshal.dump((CFG_CACHE_VERSION, cfg_sources_stamp(), CFG_TYPES,
+                          {name: table.to_columns() for name, table in tables.items()}), f)
+        os.replace(tmpPath, CFG_TABLE_CACHE) # never leave a half-written cache behind
+    except OSError:
+        try:
+            os.remove(tmpPath)
+        except OSError:
+            pass
+
+@functools.lru_cache(maxsize=None)
+def cfg_tables():
+    tables = load_cfg_cache()
+    if tables is None:
+        from ubloxCfgIface import UBX_COMPLETE_ICD_DEFAULT_CFG
+        icd = CfgTable.from_dict(UBX_COMPLETE_ICD_DEFAULT_CFG)
+        tables = {"icd": icd, "app": CfgTable.from_dict(APP_SPECIFIC_CFG), "remains": icd.without(APP_SPECIFIC_CFG)}
+        write_cfg_cache(tables)
+    return tables
+
+def icd_cfg_table():
+    """Every cfg item of the ICD with its default as expected value. Shared: clone() it before setting values."""
+    return cfg_tables()["icd"]
+
+def app_cfg_table():
+    """Application-specific config (APP_SPECIFIC_CFG). Shared: clone() it before setting values."""
+    return cfg_tables()["app"]
+
+def remains_cfg_table():
+    """ICD defaults of the cfg items not in the application-specific config. Shared: clone() it before setting values."""
+    return cfg_tables()["remains"]
@@ -0,0 +1,209 @@
+import argparse
+import mmap
+import time
+
+try:
+    import numpy as np
+except ImportError: # optional, only the columnar export needs it
+    np = None
+
+from ubloxDefines import *
+from ubloxFraming import UBX_HEADER_LEN
+
+#################
+### Constants ###
+#################
+COLUMNS_BATCH_BYTES = 8 * 1024 * 1024 # [bytes] of frames gathered at once for checksum verification
+UBX_NAV_STATUS_PAYLOAD_LEN = 16
+UBX_NAV_GEOFENCE_HEADER_LEN = 8 # then numFences * (state, id)
+UBX_MON_RF_HEADER_LEN = 4 # then nBlocks * UBX_MON_RF_BLOCK_LEN
+UBX_MON_RF_BLOCK_LEN = 24
+
+###############
+### Layouts ###
+###############
+# (field, ICD type, payload offset). Reserved bytes are left out.
+NAV_PVT_LAYOUT = (
+    ("iTOW", "U4", 0), ("year", "U2", 4), ("month", "U1", 6), ("day", "U1", 7), ("hour", "U1", 8),
+    ("min", "U1", 9), ("sec", "U1", 10), ("valid", "X1", 11), ("tAcc", "U4", 12), ("nano", "I4", 16),
+    ("fixType", "U1", 20), ("flags", "X1", 21), ("flags2", "X1", 22), ("numSV", "U1", 23),
+    ("lon", "I4", 24), ("lat", "I4", 28), ("height", "I4", 32), ("hMSL", "I4", 36),
+    ("hAcc", "U4", 40), ("vAcc", "U4", 44), ("velN", "I4", 48), ("velE", "I4", 52), ("velD", "I4", 56),
+    ("gSpeed", "I4", 60), ("headMot", "I4", 64), ("sAcc", "U4", 68), ("headAcc", "U4", 72),
+    ("pDOP", "U2", 76), ("flags3", "X2", 78), ("headVeh", "I4", 84), ("magDec", "I2", 88), ("magAcc", "U2", 90),
+)
+NAV_STATUS_LAYOUT = (
+    ("iTOW", "U4", 0), ("gpsFix", "U1", 4), ("flags", "X1", 5), ("fixStat", "X1", 6), ("flags2", "X1", 7),
+    ("ttff", "U4", 8), ("msss", "U4", 12),
+)
+NAV_GEOFENCE_LAYOUT = (
+    ("iTOW", "U4", 0), ("version", "U1", 4), ("status", "U1", 5), ("numFences", "U1", 6), ("combState", "U1", 7),
+)
+MON_RF_BLOCK_LAYOUT = (
+    ("blockId", "U1", 0), ("flags", "X1", 1), ("antStatus", "U1", 2), ("antPower", "U1", 3),
+    ("postStatus", "X4", 4), ("noisePerMS", "U2", 12), ("agcCnt", "U2", 14), ("cwSuppression", "U1", 16),
+    ("ofsI", "I1", 17), ("magI", "U1", 18), ("ofsQ", "I1", 19), ("magQ", "U1", 20),
+)
+ICD_TO_NUMPY = {
+    "U1": 'u1', "X1": 'u1', "I1": 'i1',
+    "U2": '<u2', "X2": '<u2', "I2": '<i2',
+    "U4": '<u4', "X4": '<u4', "I4": '<i4',
+}
+# NAV-PVT fields and the scale to their unit in PVTData
+NAV_PVT_SCALES = {
+    "lon": UBX_NAV_LON_SCALE, "lat": UBX_NAV_LAT_SCALE,
+    "height": UBX_NAV_HEIGHT_SCALE, "hMSL": UBX_NAV_HEIGHT_SCALE,
+    "hAcc": UBX_NAV_ACC_SCALE, "vAcc": UBX_NAV_ACC_SCALE,
+    "velN": UBX_NAV_VEL_SCALE, "velE": UBX_NAV_VEL_SCALE, "velD": UBX_NAV_VEL_SCALE,
+    "gSpeed": UBX_NAV_VEL_SCALE, "sAcc": UBX_NAV_VEL_SCALE,
+    "headMot": UBX_NAV_HEADING_SCALE, "headAcc": UBX_NAV_HEADING_SCALE,
+    "pDOP": UBX_NAV_DOP_SCALE,
+}
+
+def layout_dtype(layout, itemsize):
+    """NumPy structured dtype of a fixed-layout UBX payload (or repeated block) of itemsize bytes."""
+    return np.dtype({
+        "names": [name for name, icdType, offset in layout],
+        "formats": [ICD_TO_NUMPY[icdType] for name, icdType, offset in layout],
+        "offsets": [offset for name, icdType, offset in layout],
+        "itemsize": itemsize,
+    })
+
+########################
+### Columnar decoder ###
+########################
+class _Export:
+    """How one message type becomes rows: record layout and length, and accepted payload lengths."""
+    def __init__(self, layout, row_len, header_len, repeat_len=0):
+        self.layout_ = layout
+        self.rowLen_ = row_len
+        self.headerLen_ = header_len # payload bytes before the repeated blocks
+        self.repeatLen_ = repeat_len # 0: one row per message from the payload start, else one row per block
+
+    def accepts(self, payload_len):
+        if self.repeatLen_:
+            return payload_len >= self.headerLen_ and (payload_len - self.headerLen_) % self.repeatLen_ == 0
+        return payload_len >= self.rowLen_
+
+NAV_COLUMN_EXPORTS = {
+    (UBX_NAV_CLASS, UBX_NAV_PVT_ID): _Export(NAV_PVT_LAYOUT, UBX_NAV_PVT_PAYLOAD_LEN, UBX_NAV_PVT_PAYLOAD_LEN),
+    (UBX_NAV_CLASS, UBX_NAV_STATUS_ID): _Export(NAV_STATUS_LAYOUT, UBX_NAV_STATUS_PAYLOAD_LEN, UBX_NAV_STATUS_PAYLOAD_LEN),
+    (UBX_NAV_CLASS, UBX_NAV_GEOFENCE_ID): _Export(NAV_GEOFENCE_LAYOUT, UBX_NAV_GEOFENCE_HEADER_LEN, UBX_NAV_GEOFENCE_HEADER_LEN),
+    (UBX_MON_CLASS, UBX_MON_RF_ID): _Export(MON_RF_BLOCK_LAYOUT, UBX_MON_RF_BLOCK_LEN, UBX_MON_RF_HEADER_LEN, UBX_MON_RF_BLOCK_LEN),
+}
+
+def decode_nav_columns(source, types=None):
+    """
+    Batch-decode every NAV-PVT, NAV-STATUS, NAV-GEOFENCE and MON-RF frame of a raw
+    capture into NumPy structured arrays, one field (column) per ICD payload field,
+    instead of one dataclass per message. source: a capture file path or a
+    bytes-like object. types: the (class, ID) to export (all of them by default).
+    Frames are located, length-checked and checksum-verified with vectorised
+    operations, and the payloads of each type are reinterpreted in place with
+    np.frombuffer(), so there is no Python work per message.
+    Returns {(class, ID): array}, rows in capture order. NAV-GEOFENCE rows hold the
+    message header (per-fence states are left out), MON-RF has one row per RF block.
+    Values are raw ICD integers: see nav_pvt_scaled() for PVTData units.
+    """
+    if np is None:
+        raise ImportError("decode_nav_columns() needs numpy")
+    types = list(NAV_COLUMN_EXPORTS) if types is None else [tuple(key) for key in types]
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            try:
+                capture = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError: # empty file
+                return {key: np.empty(0, layout_dtype(NAV_COLUMN_EXPORTS[key].layout_, NAV_COLUMN_EXPORTS[key].rowLen_))
+                        for key in types}
+            try:
+                return _decode_columns(capture, types)
+            finally:
+                capture.close()
+    return _decode_columns(source, types)
+
+def _decode_columns(capture, types):
+    data = np.frombuffer(capture, dtype=np.uint8)
+    try:
+        # Candidate frame starts: both sync chars and a complete header
+        syncs = np.flatnonzero(data[: max(0, len(data) - UBX_HEADER_LEN + 1)] == UBX_PREAMBLE_SYNC_CHAR_1)
+        syncs = syncs[data[syncs + 1] == UBX_PREAMBLE_SYNC_CHAR_2]
+        columns = {}
+        for key in types:
+            export = NAV_COLUMN_EXPORTS[key]
+            starts = syncs[(data[syncs + UBX_MSG_CLASS_POS] == key[0]) & (data[syncs + UBX_MSG_ID_POS] == key[1])]
+            columns[key] = _export_rows(data, starts, export)
+        return columns
+    finally:
+        del data # release the buffer export, so that an mmap can be closed
+
+def _export_rows(data, starts, export):
+    dtype = layout_dtype(export.layout_, export.rowLen_)
+    payloadLens = data[starts + UBX_MSG_PAYLOAD_LEN_POS].astype(np.int64) | \
+                  (data[starts + UBX_MSG_PAYLOAD_LEN_POS + 1].astype(np.int64) << 8)
+    complete = starts + UBX_HEADER_LEN + payloadLens + UBX_CHECKSUM_LEN <= len(data)
+    starts, payloadLens = starts[complete], payloadLens[complete]
+
+    # Frames of a type share a handful of lengths: gather each length as a 2D (frames, bytes) block
+    rowStarts, rowChunks = [], []
+    for payloadLen in np.unique(payloadLens).tolist():
+        if not export.accepts(payloadLen):
+            continue
+        frameLen = UBX_HEADER_LEN + payloadLen + UBX_CHECKSUM_LEN
+        sameLen = starts[payloadLens == payloadLen]
+        # Every frameLen-byte window of the capture, as a view: picking rows copies only the frames
+        windows = np.lib.stride_tricks.sliding_window_view(data, frameLen)
+        batch = max(1, COLUMNS_BATCH_BYTES // frameLen)
+        for first in range(0, len(sameLen), batch):
+            frameStarts = sameLen[first : first + batch]
+            frames = windows[frameStarts]
+            ok = ubx_checksums_ok(frames)
+            frames, frameStarts = frames[ok], frameStarts[ok]
+            if export.repeatLen_:
+                blocks = (payloadLen - export.headerLen_) // export.repeatLen_
+                rows = frames[:, UBX_PAYLOAD_POS + export.headerLen_ : UBX_PAYLOAD_POS + payloadLen]
+                rowStarts.append(np.repeat(frameStarts, blocks))
+            else:
+                rows = frames[:, UBX_PAYLOAD_POS : UBX_PAYLOAD_POS + export.rowLen_]
+                rowStarts.append(frameStarts)
+            rowChunks.append(np.frombuffer(np.ascontiguousarray(rows), dtype=dtype))
+    if not rowChunks:
+        return np.empty(0, dtype)
+    # Back to capture order (stable, blocks of a message keep theirs)
+    order = np.argsort(np.concatenate(rowStarts), kind='stable')
+    return np.concatenate(rowChunks)[order]
+
+def ubx_checksums_ok(frames):
+    """Vectorised UBX checksum check of a (frames, frame length) uint8 block of whole frames."""
+    body = frames[:, UBX_MSG_CLASS_POS : -UBX_CHECKSUM_LEN]
+    # CK_A is the sum of the bytes and CK_B the sum of the prefix sums, i.e. byte k weighs (len - k):
+    # both come out of a single (BLAS) matrix product, in float32 while its sums stay exact (< 2**24)
+    bodyLen = body.shape[1]
+    ftype = np.float32 if 255 * bodyLen * (bodyLen + 1) // 2 < 2**24 else np.float64
+    weights = np.empty((bodyLen, 2), dtype=ftype)
+    weights[:, 0] = 1
+    weights[:, 1] = np.arange(bodyLen, 0, -1)
+    sums = (body.astype(ftype) @ weights).astype(np.uint32) & 0xFF
+    ckA, ckB = sums[:, 0], sums[:, 1]
+    return (ckA == frames[:, -2]) & (ckB == frames[:, -1])
+
+def nav_pvt_scaled(pvt):
+    """Float columns of a NAV-PVT export in the units of PVTData (deg, m, m/s)."""
+    return {name: pvt[name] * scale for name, scale in NAV_PVT_SCALES.items()}
+
+############
+### Main ###
+############
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the NAV-PVT, NAV-STATUS, NAV-GEOFENCE and MON-RF of a capture to .npy columns")
+    parser.add_argument("capture")
+    parser.add_argument("--out", default=None, help="write one <out>-<CLASS>-<ID>.npy per message type")
+    args = parser.parse_args()
+
+    startTs = time.perf_counter()
+    columns = decode_nav_columns(args.capture)
+    elapsed = time.perf_counter() - startTs
+    for (msgClass, msgId), rows in columns.items():
+        print(f"  {hex(msgClass)} {hex(msgId)}: {len(rows)} rows")
+        if args.out:
+            np.save(f"{args.out}-{msgClass:02X}-{msgId:02X}.npy", rows)
+    print(f"Decoded in {elapsed*1e3:.1f} ms")
@@ -63,6 +63,33 @@ class GeofenceState(IntEnum):
     eRequesting = 1
     eON = 2
 
+class RxIngestMode(IntEnum):
+    eIngestDeque = 1 # readline() stored byte by byte in a deque
+    eIngestChunk = 2 # bulk read(in_waiting) stored in a preallocated byte ring
+
+class RxReaderMode(IntEnum):
+    eReaderPoll = 1 # spin on in_waiting
+    eReaderBlocking = 2 # sleep in a timed read() until bytes arrive
+    eReaderExternal = 3 # no reader thread, bytes are fed to ingest() by the owner (e.g. a receiver manager)
+
+class FrameKind(IntEnum):
+    eFrameUBX = 1
+    eFrameNMEA = 2
+
+class SubDropPolicy(IntEnum):
+    eDropOldest = 1
+    eDropNewest = 2
+
+class ReqState(IntEnum):
+    eReqPending = 1
+    eReqDone = 2 # response or ACK received
+    eReqNak = 3
+    eReqTimeout = 4 # no response after all retries
+
+class CfgValgetMode(IntEnum):
+    eValgetKeys = 1 # explicit key IDs, MAX_VALGET_REQ_ITEMS per request
+    eValgetGroups = 2 # group wildcards paged through position, for groups with many items to check
+
 #########################
 ### Physics Constants ###
 #########################
@@ -85,6 +112,8 @@ IBIT_TIMEOUT = IBIT_WAIT_AFTER_RST + 10.0 # [seconds]
 MIN_FILESTORE_CAPACITY = 10_000 # [bytes]
 
 GEOFENCE_REQ_PERIOD = 10 # [seconds]
+UBX_RESPONSE_TIMEOUT = 1.0 # [seconds] max wait for the response (or ACK) to a request
+UBX_REQ_RETRIES = 2 # resends of a request not answered in time
 GEOREFERENCE_CONFIDENCE = 2 # 95%
 GEOREFERENCE_RADIUS_M = 20 # [meters]
 GEOREFERENCE_RADIUS_SCALE = 1e-2
@@ -92,8 +121,22 @@ GEOREFERENCE_RADIUS_SCALE = 1e-2
 UBX_NAV_LAT_SCALE = 1e-7
 UBX_NAV_LON_SCALE = 1e-7
 UBX_NAV_HEIGHT_SCALE = 1e-3 # mm to m
+UBX_NAV_ACC_SCALE = 1e-3 # mm to m
+UBX_NAV_VEL_SCALE = 1e-3 # mm/s to m/s
+UBX_NAV_HEADING_SCALE = 1e-5 # deg
+UBX_NAV_DOP_SCALE = 1e-2
 
 CFG_VAL_UNKNOWN = "NA"
+# Cfg item value type -> (length [bytes], struct format)
+UBX_CFG_VALUE_FMT = {
+    "L": (1, 'B'), # single-bit boolean (true = 1, false = 0), stored as U1
+    "U1": (1, 'B'), "E1": (1, 'B'), "X1": (1, 'B'),
+    "U2": (2, 'H'), "E2": (2, 'H'), "X2": (2, 'H'),
+    "U4": (4, 'I'), "E4": (4, 'I'), "X4": (4, 'I'),
+    "U8": (8, 'Q'), "E8": (8, 'Q'), "X8": (8, 'Q'),
+    "R4": (4, 'f'), "R8": (8, 'd'),
+    "I1": (1, 'b'), "I2": (2, 'h'), "I4": (4, 'i'), "I8": (8, 'q'),
+}
 
 APP_SPECIFIC_CFG = {
     # CFG-ANA section
@@ -519,12 +562,14 @@ APP_SPECIFIC_CFG = {
 #################
 UBX_PREAMBLE_SYNC_CHAR_1 = 0xb5
 UBX_PREAMBLE_SYNC_CHAR_2 = 0x62
+UBX_PREAMBLE = bytes((UBX_PREAMBLE_SYNC_CHAR_1, UBX_PREAMBLE_SYNC_CHAR_2))
 
 UBX_MSG_CLASS_POS = 2
 UBX_MSG_ID_POS = 3
 UBX_MSG_PAYLOAD_LEN_POS = 4
 UBX_CHECKSUM_LEN = 2 # checksum composed of 2 bytes (CK_A and CK_B)
 UBX_PAYLOAD_POS = 6
+UBX_MAX_PAYLOAD_LEN = 65535
 
 # UBX-ACK-ACK
 UBX_ACK_CLSID_POS = UBX_PAYLOAD_POS + 0
@@ -577,6 +622,13 @@ UBX_LOG_INFO_RESERVED1 = UBX_PAYLOAD_POS + 8
 
 # UBX-CFG-VALGET
 MAX_VALGET_REQ_ITEMS = 64
+VALGET_PIPELINE_WINDOW = 4 # VALGET batches in flight at once
+VALGET_GROUP_MIN_ITEMS = 8 # items to check for a group to be fetched by wildcard (eValgetGroups)
+UBX_CFG_KEY_GROUP_SHIFT = 16 # key ID bits 16-23 are the group ID
+UBX_CFG_KEY_SIZE_SHIFT = 28 # key ID bits 28-30 are the value storage size
+UBX_CFG_KEY_ITEM_WILDCARD = 0xFFFF # every item of a group
+UBX_CFG_KEY_ALL_WILDCARD = 0x0FFFFFFF # every item of every group
+UBX_CFG_KEY_SIZE_BYTES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8} # storage size code -> value length [bytes]
 UBX_CFG_KEYID_LEN = 4
 UBX_CFG_VALGET_VERSION_POS = UBX_PAYLOAD_POS + 0
 UBX_CFG_VALGET_LAYER_POS = UBX_PAYLOAD_POS + 1
@@ -610,6 +662,13 @@ UBX_NAV_PVT_HACC_POS = UBX_PAYLOAD_POS + 40
 UBX_NAV_PVT_VELN_POS = UBX_PAYLOAD_POS + 48
 UBX_NAV_PVT_VELE_POS = UBX_PAYLOAD_POS + 52
 UBX_NAV_PVT_VELD_POS = UBX_PAYLOAD_POS + 56
+UBX_NAV_PVT_PAYLOAD_LEN = 92
+# Whole payload: iTOW, year, month, day, hour, min, sec, valid, tAcc, nano, fixType, flags, flags2, numSV,
+# lon, lat, height, hMSL, hAcc, vAcc, velN, velE, velD, gSpeed, headMot, sAcc, headAcc, pDOP, flags3,
+# reserved0[4], headVeh, magDec, magAcc
+UBX_NAV_PVT_FMT = '<IHBBBBBBIiBBBBiiiiIIiiiiiIIHH4xihH'
+UBX_NAV_PVT_VALIDDATE_BIT = 0
+UBX_NAV_PVT_VALIDTIME_BIT = 1
 
 # UBX-NAV-STATUS
 UBX_NAV_STATUS_ITOW_POS = UBX_PAYLOAD_POS + 0
@@ -639,10 +698,12 @@ NMEA_TYPE_LEN = 3
 NMEA_FIRST_DELIMITER_POS = 6
 NMEA_MAX_FIELD_LEN = 20
 NMEA_FROM_ASTERISK_TRAIL_LEN = 5 # length of asterisk + checksum (as 2 ascii ints) + \r + \n
+NMEA_MAX_SENTENCE_LEN = 256 # standard limit is 82, leave room for proprietary sentences
 
 NMEA_GGA_MSG_ID = b"GGA"
 NMEA_GSA_MSG_ID = b"GSA"
 NMEA_GLL_MSG_ID = b"GLL"
+NMEA_RMC_MSG_ID = b"RMC"
 NMEA_VTG_MSG_ID = b"VTG"
 NMEA_GST_MSG_ID = b"GST"
 NMEA_GSV_MSG_ID = b"GSV"
@@ -856,6 +917,10 @@ def popN(dq, n):
     popable_bytes = min(len(dq), n)
     return bytes(dq.popleft() for _ in range(popable_bytes))
 
+def ubx_msg_key(msg_class, msg_id):
+    """16-bit key identifying a UBX message by its class and ID."""
+    return (msg_class << 8) | msg_id
+
 def buffer2Ascii(intArr):
     return bytes(intArr).decode('ascii', errors='ignore')
 
@@ -872,7 +937,23 @@ def default_dc_reset(instance):
         else:
             setattr(instance, f.name, None)
 
+def cfg_key_group(keyId):
+    """Group ID of a cfg key ID, e.g. 0x91 for CFG-MSGOUT-*."""
+    return (keyId >> UBX_CFG_KEY_GROUP_SHIFT) & 0xFF
+
+def cfg_group_wildcard(group_id):
+    """Key ID asking CFG-VALGET for every item of a group."""
+    return (group_id << UBX_CFG_KEY_GROUP_SHIFT) | UBX_CFG_KEY_ITEM_WILDCARD
+
+def cfg_key_value_len(keyId):
+    """Length [bytes] of the value of a cfg key ID, from its size bits (None if invalid)."""
+    return UBX_CFG_KEY_SIZE_BYTES.get((keyId >> UBX_CFG_KEY_SIZE_SHIFT) & 0x7)
+
 def get_cfg_by_name(cfgdb, cfg_name):
+    # Config tables (see CfgTable) index their names
+    find = getattr(cfgdb, "find", None)
+    if find is not None:
+        return find(cfg_name)
     for keyId, cfg_data in cfgdb.items():
         if cfg_name == cfg_data["name"]:
             return cfg_data
@@ -0,0 +1,286 @@
+import struct
+from collections import deque
+from itertools import accumulate
+
+from ubloxDefines import *
+
+####################
+### RX Byte Ring ###
+####################
+class RxByteRing:
+    """
+    Preallocated byte ring for chunked RX ingest. The producer appends whole
+    chunks and the parser reads contiguous slices of them, so no per-byte work
+    is done on either side. Unread bytes are compacted back to the start of the
+    buffer when a write does not fit at the end, which keeps the unread region
+    always contiguous. When more room is needed the buffer grows (doubling) up
+    to max_capacity; only past that are the oldest unread bytes dropped.
+    Chunks written with a timestamp are remembered as (stream offset one past
+    their last byte, ts) so that parsed frames can be given their arrival time.
+    """
+    def __init__(self, capacity, max_capacity=None):
+        self.buf_ = bytearray(capacity)
+        self.view_ = memoryview(self.buf_)
+        self.maxCapacity_ = max(capacity, max_capacity or capacity)
+        self.head_ = 0 # first unread byte
+        self.tail_ = 0 # one past the last written byte
+        self.chunkTs_ = deque() # (stream end offset, ts) of the chunks not fully consumed
+        # Analytics
+        self.bytesIn_ = 0
+        self.bytesConsumed_ = 0
+        self.bytesDropped_ = 0
+        self.overflows_ = 0 # writes that had to drop unread bytes
+        self.growths_ = 0
+        self.peakUnread_ = 0
+
+    def __len__(self):
+        return self.tail_ - self.head_
+
+    def capacity(self):
+        return len(self.buf_)
+
+    def reserve(self, size):
+        """Grow the buffer (up to max capacity) so that it can hold size unread bytes. Returns True if it fits."""
+        capacity = len(self.buf_)
+        if size <= capacity:
+            return True
+        if capacity >= self.maxCapacity_:
+            return False
+        while capacity < size:
+            capacity *= 2
+        capacity = min(capacity, self.maxCapacity_)
+        # Fresh buffer instead of an in-place resize, views handed out before remain valid
+        unread = len(self)
+        buf = bytearray(capacity)
+        buf[:unread] = self.view_[self.head_ : self.tail_]
+        self.buf_ = buf
+        self.view_ = memoryview(buf)
+        self.head_ = 0
+        self.tail_ = unread
+        self.growths_ += 1
+        return size <= capacity
+
+    def write(self, data, ts=None):
+        """Append a chunk. Like a deque with maxlen, the oldest unread bytes are dropped on overflow."""
+        n = len(data)
+        if n == 0:
+            return
+        self.bytesIn_ += n
+        if ts is not None:
+            self.chunkTs_.append((self.bytesIn_, ts))
+        if not self.reserve(len(self) + n):
+            self.overflows_ += 1
+        capacity = len(self.buf_)
+        if n >= capacity:
+            # Chunk alone fills the ring: keep only its newest bytes
+            self.bytesDropped_ += len(self) + n - capacity
+            self.view_[:] = data[n - capacity:]
+            self.head_ = 0
+            self.tail_ = capacity
+            self.peakUnread_ = capacity
+            return
+
+        if self.tail_ + n > capacity:
+            overflow = len(self) + n - capacity
+            if overflow > 0:
+                self.head_ += overflow
+                self.bytesDropped_ += overflow
+            self.compact()
+
+        self.view_[self.tail_ : self.tail_ + n] = data
+        self.tail_ += n
+        if self.tail_ - self.head_ > self.peakUnread_:
+            self.peakUnread_ = self.tail_ - self.head_
+
+    def compact(self):
+        """Move the unread bytes to the start of the buffer."""
+        unread = len(self)
+        if self.head_ != 0:
+            self.view_[:unread] = self.view_[self.head_ : self.tail_]
+        self.head_ = 0
+        self.tail_ = unread
+
+    def peek(self):
+        """Contiguous view of all unread bytes. Only valid until the next write."""
+        return self.view_[self.head_ : self.tail_]
+
+    def consume(self, n):
+        n = min(n, len(self))
+        self.head_ += n
+        self.bytesConsumed_ += n
+        if self.head_ == self.tail_:
+            self.head_ = 0
+            self.tail_ = 0
+        # Forget the timestamps of chunks already consumed entirely
+        headOffset = self.bytesIn_ - len(self)
+        chunks = self.chunkTs_
+        while chunks and chunks[0][0] <= headOffset:
+            chunks.popleft()
+
+    def arrival_ts(self, index):
+        """
+        Timestamp of the chunk that brought buf_[index], or None if it was written
+        without one. Lookups must go forward in the stream: older chunks are forgotten.
+        """
+        offset = self.bytesIn_ - (self.tail_ - index)
+        chunks = self.chunkTs_
+        while chunks and chunks[0][0] <= offset:
+            chunks.popleft()
+        return chunks[0][1] if chunks else None
+
+    def clear(self):
+        self.consume(len(self))
+
+#####################
+### Frame scanner ###
+#####################
+NMEA_START = NMEA_START_CHAR.encode('ascii')
+NMEA_END_CR = ord(NMEA_END_CR_CHAR)
+NMEA_END_LF = NMEA_END_LF_CHAR.encode('ascii')
+UBX_HEADER_LEN = UBX_PAYLOAD_POS
+
+def scan_frames(buf, start, end, valid_ubx=None):
+    """
+    Find the complete UBX and NMEA frames in buf[start:end] using whole-buffer
+    searches: one find() per sync pattern and one per NMEA terminator, instead
+    of a state machine step per byte. buf must support find() (bytes, bytearray
+    or mmap). valid_ubx(msg_class, msg_id) optionally rejects unknown UBX
+    headers so that a fortuitous sync pair does not swallow real frames.
+    Returns ([(start, end, FrameKind), ...], resume) where resume is the index
+    of the first byte that still belongs to an incomplete frame (or end).
+    """
+    spans = []
+    pos = start
+    nextUbx = -1
+    nextNmea = -1
+    while True:
+        # Refresh the candidate frame starts once the scan has moved past them
+        if nextUbx < pos:
+            nextUbx = buf.find(UBX_PREAMBLE, pos, end)
+            if nextUbx < 0:
+                nextUbx = end
+        if nextNmea < pos:
+            nextNmea = buf.find(NMEA_START, pos, end)
+            if nextNmea < 0:
+                nextNmea = end
+
+        frameStart = nextUbx if nextUbx < nextNmea else nextNmea
+        if frameStart >= end:
+            # Nothing left but garbage. Keep a trailing sync char 1, its sync char 2 may be on its way.
+            pos = end - 1 if end > pos and buf[end - 1] == UBX_PREAMBLE_SYNC_CHAR_1 else end
+            break
+
+        if frameStart == nextUbx:
+            headerEnd = frameStart + UBX_HEADER_LEN
+            if headerEnd > end:
+                pos = frameStart
+                break
+            if valid_ubx is not None and \
+               not valid_ubx(buf[frameStart + UBX_MSG_CLASS_POS], buf[frameStart + UBX_MSG_ID_POS]):
+                # False alarm, resync right after the sync chars
+                pos = frameStart + 2
+                continue
+            payloadLen = buf[frameStart + UBX_MSG_PAYLOAD_LEN_POS] | (buf[frameStart + UBX_MSG_PAYLOAD_LEN_POS + 1] << 8)
+            frameEnd = headerEnd + payloadLen + UBX_CHECKSUM_LEN
+            if frameEnd > end:
+                pos = frameStart
+                break
+            spans.append((frameStart, frameEnd, FrameKind.eFrameUBX))
+            pos = frameEnd
+
+        else:
+            # A sentence can neither run into the next UBX frame nor exceed the max length
+            limit = min(end, frameStart + NMEA_MAX_SENTENCE_LEN, nextUbx)
+            lf = buf.find(NMEA_END_LF, frameStart + 1, limit)
+            if lf < 0:
+                if limit == end and end - frameStart < NMEA_MAX_SENTENCE_LEN:
+                    pos = frameStart # terminator not received yet
+                    break
+                pos = frameStart + 1 # runaway '$', resync
+                continue
+            pos = lf + 1
+            if buf[lf - 1] == NMEA_END_CR:
+                spans.append((frameStart, pos, FrameKind.eFrameNMEA))
+
+    return spans, pos
+
+def scan_ubx_frames(buf, start, end, valid_ubx=None):
+    """
+    UBX-only counterpart of scan_frames() for captures where UBX frames mostly
+    follow each other: the next frame is expected right where the declared length
+    of the previous one ends, and find() is only used to resync on anything else
+    (NMEA, garbage). valid_ubx as in scan_frames(). Checksums are not verified.
+    Returns ([(start, end), ...], resume).
+    """
+    spans = []
+    pos = start
+    while True:
+        if pos + 1 >= end or buf[pos] != UBX_PREAMBLE_SYNC_CHAR_1 or buf[pos + 1] != UBX_PREAMBLE_SYNC_CHAR_2:
+            pos = buf.find(UBX_PREAMBLE, pos, end)
+            if pos < 0:
+                # Keep a trailing sync char 1, its sync char 2 may be on its way
+                pos = end - 1 if end > start and buf[end - 1] == UBX_PREAMBLE_SYNC_CHAR_1 else end
+                break
+        headerEnd = pos + UBX_HEADER_LEN
+        if headerEnd > end:
+            break
+        if valid_ubx is not None and not valid_ubx(buf[pos + UBX_MSG_CLASS_POS], buf[pos + UBX_MSG_ID_POS]):
+            pos += 2
+            continue
+        frameEnd = headerEnd + (buf[pos + UBX_MSG_PAYLOAD_LEN_POS] | (buf[pos + UBX_MSG_PAYLOAD_LEN_POS + 1] << 8)) + UBX_CHECKSUM_LEN
+        if frameEnd > end:
+            break
+        spans.append((pos, frameEnd))
+        pos = frameEnd
+    return spans, pos
+
+def ubx_frame_len(buf, start, end):
+    """Total length declared by the UBX header at buf[start], or None if there is no complete UBX header there."""
+    if end - start < UBX_HEADER_LEN or buf[start] != UBX_PREAMBLE_SYNC_CHAR_1 or \
+       buf[start + 1] != UBX_PREAMBLE_SYNC_CHAR_2:
+        return None
+    payloadLen = buf[start + UBX_MSG_PAYLOAD_LEN_POS] | (buf[start + UBX_MSG_PAYLOAD_LEN_POS + 1] << 8)
+    return UBX_HEADER_LEN + payloadLen + UBX_CHECKSUM_LEN
+
+####################
+### UBX checksum ###
+####################
+def ubx_checksum(data):
+    """
+    Compute UBX checksum (8-bit Fletcher) with C-level sums instead of a loop per byte.
+    CK_A is the sum of all bytes and CK_B the sum of the running (prefix) sums.
+    data: bytes from CLASS through end of payload (no sync chars).
+    Returns: (CK_A, CK_B)
+    """
+    return sum(data) & 0xFF, sum(accumulate(data)) & 0xFF
+
+def verify_ubx_frames(buf, spans):
+    """
+    Verify the checksums of many complete UBX frames of buf in one call, without
+    copying them out of the buffer. spans are (start, end[, kind]) tuples as
+    returned by scan_frames(). Returns a list of booleans, one per span.
+    """
+    view = memoryview(buf)
+    results = []
+    for span in spans:
+        end = span[1]
+        body = view[span[0] + UBX_MSG_CLASS_POS : end - UBX_CHECKSUM_LEN]
+        results.append(sum(body) & 0xFF == view[end - 2] and sum(accumulate(body)) & 0xFF == view[end - 1])
+    return results
+
+#############
+### Utils ###
+#############
+def pack_ubx_frame(msg_class, msg_id, payload=b""):
+    """Build a complete UBX frame (sync chars, header, payload and checksum)."""
+    body = struct.pack('<BBH', msg_class, msg_id, len(payload)) + bytes(payload)
+    return UBX_PREAMBLE + body + bytes(ubx_checksum(body))
+
+def pack_nmea_sentence(body):
+    """Build an NMEA sentence from its body (the text between '$' and '*')."""
+    if isinstance(body, str):
+        body = body.encode('ascii')
+    checksum = 0
+    for byte in body:
+        checksum ^= byte
+    return b"$" + body + b"*%02X\r\n" % checksum
@@ -0,0 +1,96 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+#################
+### Constants ###
+#################
+# Column name -> array typecode
+PVT_HISTORY_COLUMNS = {
+    "tstamp": 'd', # [s] host monotonic
+    "iTOW": 'I', # [ms]
+    "lat": 'd', # [deg]
+    "lon": 'd', # [deg]
+    "height": 'd', # [m]
+    "heightMSL": 'd', # [m]
+    "numSV": 'B',
+    "fixType": 'B',
+    "hAcc": 'd', # [m]
+    "vAcc": 'd', # [m]
+    "sAcc": 'd', # [m/s]
+}
+
+###################
+### PVT history ###
+###################
+class PVTHistory:
+    """
+    The last capacity NAV-PVT epochs, as preallocated parallel array columns (see
+    PVT_HISTORY_COLUMNS) instead of one PVTData per epoch. Every column is a mirror
+    buffer of twice the capacity: each epoch is written at i and i + capacity, so the
+    last k epochs are always contiguous and can be handed out as memoryview slices,
+    oldest first, without copying. Appending is O(1) and allocates nothing.
+    Views are live: later epochs overwrite them once the history wraps around, so
+    copy what must be kept (e.g. view.tolist() or numpy.array(view)). The driver
+    appends under its lock, read under driver.lock for a consistent set of columns.
+    """
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError(f"PVTHistory capacity must be at least 1, got {capacity}")
+        self.capacity_ = capacity
+        self.cols_ = {name: array(typecode, bytes(array(typecode).itemsize * 2 * capacity))
+                      for name, typecode in PVT_HISTORY_COLUMNS.items()}
+        self.views_ = {name: memoryview(col) for name, col in self.cols_.items()}
+        self.next_ = 0 # slot of the next epoch, in [0, capacity)
+        self.count_ = 0
+        # Per column writers, so that append() does no dict lookups
+        self.tstamp_, self.iTOW_, self.lat_, self.lon_, self.height_, self.heightMSL_, \
+            self.numSV_, self.fixType_, self.hAcc_, self.vAcc_, self.sAcc_ = self.cols_.values()
+
+    def __len__(self):
+        return self.count_
+
+    def append(self, tstamp, iTOW, lat, lon, height, heightMSL, numSV, fixType, hAcc, vAcc, sAcc):
+        i = self.next_
+        j = i + self.capacity_
+        self.tstamp_[i] = self.tstamp_[j] = tstamp
+        self.iTOW_[i] = self.iTOW_[j] = iTOW
+        self.lat_[i] = self.lat_[j] = lat
+        self.lon_[i] = self.lon_[j] = lon
+        self.height_[i] = self.height_[j] = height
+        self.heightMSL_[i] = self.heightMSL_[j] = heightMSL
+        self.numSV_[i] = self.numSV_[j] = numSV
+        self.fixType_[i] = self.fixType_[j] = fixType
+        self.hAcc_[i] = self.hAcc_[j] = hAcc
+        self.vAcc_[i] = self.vAcc_[j] = vAcc
+        self.sAcc_[i] = self.sAcc_[j] = sAcc
+        self.next_ = 0 if i + 1 == self.capacity_ else i + 1
+        if self.count_ < self.capacity_:
+            self.count_ += 1
+
+    def clear(self):
+        self.next_ = 0
+        self.count_ = 0
+
+    def span(self, k=None):
+        """(start, end) column indices of the last k epochs (all of them if k is None)."""
+        k = self.count_ if k is None else max(0, min(k, self.count_))
+        end = self.next_ + self.capacity_
+        return end - k, end
+
+    def columns(self, start, end):
+        """{column: memoryview} of the epochs in column indices [start, end)."""
+        return {name: view[start:end] for name, view in self.views_.items()}
+
+    def last(self, k):
+        """{column: memoryview} of the last k epochs, oldest first."""
+        return self.columns(*self.span(k))
+
+    def between(self, t0, t1, column="tstamp"):
+        """
+        {column: memoryview} of the epochs with t0 <= column <= t1, oldest first, found by
+        binary search. column must grow along the history: tstamp (default) always does,
+        iTOW does within a GPS week.
+        """
+        start, end = self.span()
+        keys = self.views_[column][start:end]
+        return self.columns(start + bisect_left(keys, t0), start + bisect_right(keys, t1))
@@ -0,0 +1,247 @@
+import argparse
+import mmap
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+from ubloxDefines import *
+from ubloxFraming import scan_ubx_frames, verify_ubx_frames, ubx_frame_len, UBX_HEADER_LEN
+
+#################
+### Constants ###
+#################
+FIDX_EXT = ".fidx"
+FIDX_MAGIC = b"UBXF"
+FIDX_VERSION = 2
+FIDX_SCAN_WINDOW = 4 * 1024 * 1024 # [bytes] scanned per scan_ubx_frames() call, bounds the span list
+FIDX_WRITE_BATCH = 65536 # entries packed per sidecar write
+# Sidecar: header, then one directory entry per message type, then the frame entries grouped by type
+FIDX_HEADER = struct.Struct('<4sHxxQqI') # magic, version, capture size, capture mtime [ns], message types
+FIDX_GROUP = struct.Struct('<HB5xQQ') # ubx_msg_key, iTOW sorted flag, first entry, entries
+FIDX_ENTRY = struct.Struct('<QBBHI') # capture offset, class, ID, payload length, iTOW
+FIDX_ENTRY_ITOW_POS = 12
+UBX_ITOW_NONE = 0xFFFFFFFF # message without an iTOW
+SUPPORTED_UBX_KEYS = frozenset(ubx_msg_key(msg_class, msg_id)
+                               for msg_class, msg_ids in SUPPORTED_UBX_MSGS.items() for msg_id in msg_ids)
+
+def supported_ubx(msg_class, msg_id):
+    return ubx_msg_key(msg_class, msg_id) in SUPPORTED_UBX_KEYS
+
+class _ItowColumn:
+    """Read-only sequence of the iTOWs of a group of sidecar entries, for bisect."""
+    def __init__(self, buf, base, count):
+        self.buf_ = buf
+        self.base_ = base + FIDX_ENTRY_ITOW_POS
+        self.count_ = count
+
+    def __len__(self):
+        return self.count_
+
+    def __getitem__(self, i):
+        return struct.unpack_from('<I', self.buf_, self.base_ + i * FIDX_ENTRY.size)[0]
+
+###########################
+### Capture frame index ###
+###########################
+class CaptureFrameIndex:
+    """
+    Random access to the UBX frames of a (possibly multi-gigabyte) raw capture, such
+    as the ones written by CaptureRecorder. The capture is memory-mapped and scanned
+    once with scan_ubx_frames() (sync chars and declared length, checksums verified
+    in bulk); the result is saved next to it as a sidecar of packed
+    (offset, class, ID, payload length, iTOW) entries grouped by message type, and
+    reused while the capture size and mtime do not change.
+    Queries bisect the iTOW column of a single message type in the memory-mapped
+    sidecar and return zero-copy memoryviews of the capture, so only the pages of
+    the matching entries and frames are read. NMEA sentences are not indexed.
+    iTOW is taken from the first payload field of NAV class messages; a time range
+    query needs iTOW to grow along the capture (it does within a GPS week), other
+    groups are filtered linearly.
+    Release the returned views before close().
+    """
+    def __init__(self, capture_path, rebuild=False, verify=True, valid_ubx=supported_ubx):
+        self.capturePath_ = capture_path
+        self.sidecarPath_ = capture_path + FIDX_EXT
+        self.verify_ = verify
+        self.validUbx_ = valid_ubx
+        self.groups_ = {} # ubx_msg_key -> (iTOW sorted, first entry, entries)
+        self.captureFile_ = open(capture_path, 'rb')
+        stat = os.fstat(self.captureFile_.fileno())
+        self.captureSize_ = stat.st_size
+        self.captureMtime_ = stat.st_mtime_ns
+        self.capture_ = mmap.mmap(self.captureFile_.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+        self.sidecarFile_ = None
+        self.sidecar_ = b""
+        # Analytics
+        self.buildTime_ = 0.0 # [seconds] 0 if the sidecar was reused
+        self.cksumErrors_ = 0
+
+        if rebuild or not self.load_sidecar():
+            self.build()
+            self.load_sidecar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for buf in (self.sidecar_, self.capture_):
+            if isinstance(buf, mmap.mmap):
+                buf.close()
+        if self.sidecarFile_ is not None:
+            self.sidecarFile_.close()
+        self.captureFile_.close()
+
+    # Index build
+    # ---------------------------------------------
+    def build(self):
+        """Scan the whole capture and write the sidecar."""
+        startTs = time.perf_counter()
+        capture = self.capture_
+        groups = {} # ubx_msg_key -> (offsets, payload lengths, iTOWs)
+        pos = 0
+        size = self.captureSize_
+        while pos < size:
+            end = min(size, pos + FIDX_SCAN_WINDOW)
+            spans, resume = scan_ubx_frames(capture, pos, end, self.validUbx_)
+            valid = verify_ubx_frames(capture, spans) if self.verify_ else [True] * len(spans)
+            resynced = False
+            for (start, stop), ok in zip(spans, valid):
+                if not ok:
+                    # Maybe a corrupted length swallowed real frames: resync right after its sync chars
+                    self.cksumErrors_ += 1
+                    resume = start + 2
+                    resynced = True
+                    break
+                msgClass, msgId, payloadLen = struct.unpack_from('<BBH', capture, start + UBX_MSG_CLASS_POS)
+                iTOW = UBX_ITOW_NONE
+                if msgClass == UBX_NAV_CLASS and payloadLen >= 4:
+                    iTOW = struct.unpack_from('<I', capture, start + UBX_PAYLOAD_POS)[0]
+                key = ubx_msg_key(msgClass, msgId)
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = (array('Q'), array('H'), array('I'))
+                group[0].append(start)
+                group[1].append(payloadLen)
+                group[2].append(iTOW)
+            if not resynced and end == size and resume < size:
+                # The capture is complete, so a header running past its end is not a frame still
+                # on its way (e.g. a corrupted length, or stray sync chars): resync after its sync chars
+                if ubx_frame_len(capture, resume, size) is None:
+                    break # only a partial header (or sync char) left at the end of the capture
+                self.cksumErrors_ += 1
+                resume += 2
+            elif resume <= pos:
+                break
+            pos = resume
+        self.write_sidecar(groups)
+        self.buildTime_ = time.perf_counter() - startTs
+
+    def write_sidecar(self, groups):
+        tmpPath = self.sidecarPath_ + ".tmp"
+        with open(tmpPath, 'wb') as f:
+            f.write(FIDX_HEADER.pack(FIDX_MAGIC, FIDX_VERSION, self.captureSize_, self.captureMtime_, len(groups)))
+            first = 0
+            for key, (offsets, lengths, itows) in sorted(groups.items()):
+                f.write(FIDX_GROUP.pack(key, all(a <= b for a, b in zip(itows, itows[1:])), first, len(offsets)))
+                first += len(offsets)
+            for key, (offsets, lengths, itows) in sorted(groups.items()):
+                msgClass, msgId = key >> 8, key & 0xFF
+                for batch in range(0, len(offsets), FIDX_WRITE_BATCH):
+                    f.write(b"".join(FIDX_ENTRY.pack(offset, msgClass, msgId, length, iTOW) for offset, length, iTOW in
+                                     zip(offsets[batch : batch + FIDX_WRITE_BATCH], lengths[batch : batch + FIDX_WRITE_BATCH],
+                                         itows[batch : batch + FIDX_WRITE_BATCH])))
+        os.replace(tmpPath, self.sidecarPath_) # never leave a half-written sidecar behind
+
+    def load_sidecar(self):
+        """Map the sidecar if it matches the capture. Returns False if it is missing or stale."""
+        try:
+            sidecarFile = open(self.sidecarPath_, 'rb')
+        except OSError:
+            return False
+        sidecar = mmap.mmap(sidecarFile.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(sidecarFile.fileno()).st_size else b""
+        header = FIDX_HEADER.unpack_from(sidecar) if len(sidecar) >= FIDX_HEADER.size else None
+        if header is None or header[:4] != (FIDX_MAGIC, FIDX_VERSION, self.captureSize_, self.captureMtime_):
+            if isinstance(sidecar, mmap.mmap):
+                sidecar.close()
+            sidecarFile.close()
+            return False
+        nGroups = header[4]
+        if isinstance(self.sidecar_, mmap.mmap):
+            self.sidecar_.close()
+            self.sidecarFile_.close()
+        self.sidecarFile_, self.sidecar_ = sidecarFile, sidecar
+        # Entries start after the directory
+        entriesBase = FIDX_HEADER.size + nGroups * FIDX_GROUP.size
+        self.groups_ = {}
+        for key, itowSorted, first, count in FIDX_GROUP.iter_unpack(
+                sidecar[FIDX_HEADER.size : entriesBase]):
+            self.groups_[key] = (bool(itowSorted), entriesBase + first * FIDX_ENTRY.size, count)
+        return True
+
+    # Queries
+    # ---------------------------------------------
+    def types(self):
+        """{(class, ID): frames} of every message type in the capture."""
+        return {(key >> 8, key & 0xFF): group[2] for key, group in self.groups_.items()}
+
+    def count(self, msg_class, msg_id):
+        group = self.groups_.get(ubx_msg_key(msg_class, msg_id))
+        return 0 if group is None else group[2]
+
+    def entries(self, msg_class, msg_id, itow_from=None, itow_to=None):
+        """Yield (offset, payload length, iTOW) of the msg_class/msg_id frames with itow_from <= iTOW <= itow_to."""
+        group = self.groups_.get(ubx_msg_key(msg_class, msg_id))
+        if group is None:
+            return
+        itowSorted, base, count = group
+        timed = itow_from is not None or itow_to is not None
+        lo, hi = 0, count
+        if timed and itowSorted:
+            column = _ItowColumn(self.sidecar_, base, count)
+            if itow_from is not None:
+                lo = bisect_left(column, itow_from)
+            if itow_to is not None:
+                hi = bisect_right(column, itow_to, lo)
+        for i in range(lo, hi):
+            offset, msgClass, msgId, length, iTOW = FIDX_ENTRY.unpack_from(self.sidecar_, base + i * FIDX_ENTRY.size)
+            if timed and not itowSorted:
+                if iTOW == UBX_ITOW_NONE or (itow_from is not None and iTOW < itow_from) or \
+                   (itow_to is not None and iTOW > itow_to):
+                    continue
+            yield offset, length, iTOW
+
+    def frames(self, msg_class, msg_id, itow_from=None, itow_to=None):
+        """Yield zero-copy memoryviews of the whole matching frames (sync chars to checksum)."""
+        view = memoryview(self.capture_)
+        for offset, length, iTOW in self.entries(msg_class, msg_id, itow_from, itow_to):
+            yield view[offset : offset + UBX_HEADER_LEN + length + UBX_CHECKSUM_LEN]
+
+############
+### Main ###
+############
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index the UBX frames of a raw capture and query them")
+    parser.add_argument("capture")
+    parser.add_argument("--rebuild", action="store_true", help="ignore an existing sidecar")
+    parser.add_argument("--no-verify", action="store_true", help="skip checksum verification while indexing")
+    parser.add_argument("--type", nargs=2, type=lambda x: int(x, 0), metavar=("CLASS", "ID"), help="e.g. 0x01 0x07")
+    parser.add_argument("--itow-from", type=int, default=None)
+    parser.add_argument("--itow-to", type=int, default=None)
+    args = parser.parse_args()
+
+    with CaptureFrameIndex(args.capture, args.rebuild, not args.no_verify) as index:
+        if index.buildTime_:
+            print(f"Indexed {index.captureSize_} bytes in {index.buildTime_:.2f} s "
+                  f"({index.captureSize_/index.buildTime_/1e6:.1f} MB/s), {index.cksumErrors_} checksum errors")
+        if args.type is None:
+            for (msgClass, msgId), count in sorted(index.types().items()):
+                print(f"  {hex(msgClass)} {hex(msgId)}: {count} frames")
+        else:
+            startTs = time.perf_counter()
+            matches = sum(1 for _ in index.entries(*args.type, args.itow_from, args.itow_to))
+            print(f"{matches} frames matched in {(time.perf_counter() - startTs)*1e3:.2f} ms")
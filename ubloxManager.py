@@ -0,0 +1,109 @@
+import selectors
+import time
+import serial
+
+from ubloxDefines import *
+from ubloxTalk import logger, RUN_IDLE_PERIOD
+
+###################################
+### GNSS Receiver Manager class ###
+###################################
+class GNSSReceiverManager:
+    """
+    Serve many GNSSDriver instances from a single thread. Every serial port is
+    registered in one selectors (epoll on Linux) loop instead of having a reader
+    thread plus a Run() loop per receiver: readable ports are drained into their
+    driver and parsed right away, and a shared timer steps every driver FSM each
+    run period. Drivers are switched to RxReaderMode.eReaderExternal (reconnected
+    if they were already connected, so their own reader thread stops).
+    """
+    def __init__(self, run_period=RUN_IDLE_PERIOD):
+        self.sel_ = selectors.DefaultSelector()
+        self.drivers_ = []
+        self.serials_ = {} # driver -> serial port registered in the selector
+        self.runPeriod_ = run_period
+        self.running = False
+        # Analytics
+        self.wakeups_ = 0
+        self.bytesIn_ = 0
+
+    def add(self, driver):
+        """Take over a driver, connecting it if needed."""
+        if driver.is_connected() and driver.readerMode_ != RxReaderMode.eReaderExternal:
+            # Stop its reader thread, and reopen the port non-blocking
+            driver.disconnect()
+        driver.readerMode_ = RxReaderMode.eReaderExternal
+        if not driver.is_connected():
+            driver.connect()
+        self.drivers_.append(driver)
+        self.watch(driver)
+
+    def remove(self, driver):
+        self.unwatch(driver)
+        self.drivers_.remove(driver)
+
+    def watch(self, driver):
+        if driver.is_connected():
+            self.sel_.register(driver.ser.fileno(), selectors.EVENT_READ, driver)
+            self.serials_[driver] = driver.ser
+
+    def unwatch(self, driver):
+        ser = self.serials_.pop(driver, None)
+        if ser is not None:
+            try:
+                self.sel_.unregister(ser.fileno())
+            except (KeyError, ValueError, serial.SerialException, OSError):
+                pass # port already closed
+
+    def on_readable(self, driver):
+        ser = driver.ser
+        try:
+            data = ser.read(ser.in_waiting or 1)
+        except (serial.SerialException, OSError) as e:
+            logger.error(f"Receiver at {driver.port} lost: {e}")
+            self.unwatch(driver)
+            driver.disconnect()
+            return
+        if data:
+            self.bytesIn_ += len(data)
+            # Only parse here, the FSM is stepped by tick()
+            driver.ingest(data)
+            driver.read_rx_ring()
+
+    def tick(self):
+        for driver in self.drivers_:
+            # Follow reconnections (e.g. IBIT restarts the serial port after a reset)
+            if self.serials_.get(driver) is not driver.ser:
+                self.unwatch(driver)
+                self.watch(driver)
+            driver.Run()
+
+    def run(self, duration=None):
+        """Serve all receivers until stop() or for duration seconds."""
+        self.running = True
+        now = time.monotonic()
+        endTs = None if duration is None else now + duration
+        nextTick = now
+        while self.running:
+            now = time.monotonic()
+            if endTs is not None and now >= endTs:
+                break
+            if now >= nextTick:
+                self.tick()
+                nextTick += self.runPeriod_
+                if nextTick < now:
+                    nextTick = now + self.runPeriod_ # fell behind, do not burst
+            timeout = nextTick - now if endTs is None else min(nextTick, endTs) - now
+            for key, events in self.sel_.select(max(0.0, timeout)):
+                self.wakeups_ += 1
+                self.on_readable(key.data)
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        for driver in list(self.drivers_):
+            self.remove(driver)
+            driver.disconnect()
+        self.sel_.close()
@@ -0,0 +1,235 @@
+from typing import NamedTuple, Optional, Tuple
+
+from ubloxDefines import *
+
+NMEA_DELIMITER = NMEA_DELIMITER_CHAR.encode('ascii')
+
+####################
+### NMEA records ###
+####################
+# Times are seconds of the UTC day, positions are signed decimal degrees and
+# empty NMEA fields decode to None.
+class GGAData(NamedTuple):
+    talker: bytes
+    time: Optional[float]
+    lat: Optional[float]
+    lon: Optional[float]
+    quality: int
+    numSV: int
+    hdop: Optional[float]
+    alt: Optional[float] # [m] above MSL
+    sep: Optional[float] # [m] geoid separation
+    diffAge: Optional[float]
+    diffStation: Optional[int]
+
+class RMCData(NamedTuple):
+    talker: bytes
+    time: Optional[float]
+    valid: bool
+    lat: Optional[float]
+    lon: Optional[float]
+    sog: Optional[float] # [knots]
+    cog: Optional[float] # [deg]
+    date: Optional[Tuple[int, int, int]] # (year, month, day)
+    posMode: bytes
+
+class GLLData(NamedTuple):
+    talker: bytes
+    lat: Optional[float]
+    lon: Optional[float]
+    time: Optional[float]
+    valid: bool
+    posMode: bytes
+
+class GSAData(NamedTuple):
+    talker: bytes
+    opMode: bytes
+    navMode: int
+    svids: Tuple[int, ...]
+    pdop: Optional[float]
+    hdop: Optional[float]
+    vdop: Optional[float]
+    systemId: Optional[int]
+
+class VTGData(NamedTuple):
+    talker: bytes
+    cogTrue: Optional[float] # [deg]
+    cogMag: Optional[float] # [deg]
+    sogKnots: Optional[float]
+    sogKmh: Optional[float]
+    posMode: bytes
+
+class GSTData(NamedTuple):
+    talker: bytes
+    time: Optional[float]
+    rangeRms: Optional[float]
+    stdMajor: Optional[float]
+    stdMinor: Optional[float]
+    orient: Optional[float]
+    stdLat: Optional[float]
+    stdLon: Optional[float]
+    stdAlt: Optional[float]
+
+class GSVSat(NamedTuple):
+    svid: int
+    elv: Optional[int]
+    az: Optional[int]
+    cno: Optional[int]
+
+class GSVData(NamedTuple):
+    """Satellites in view of one talker and signal, aggregated over all sentences of a GSV sequence."""
+    talker: bytes
+    signalId: Optional[int]
+    numSV: int
+    sats: Tuple[GSVSat, ...]
+
+class ZDAData(NamedTuple):
+    talker: bytes
+    time: Optional[float]
+    day: int
+    month: int
+    year: int
+    ltzh: Optional[int]
+    ltzn: Optional[int]
+
+class TXTData(NamedTuple):
+    talker: bytes
+    numMsg: int
+    msgNum: int
+    msgType: int # 0: error, 1: warning, 2: notice, 7: user
+    text: str
+
+#############
+### Utils ###
+#############
+# float() and int() accept ASCII bytes directly, so fields are never decoded to str
+def nmea_float(field):
+    return float(field) if field else None
+
+def nmea_int(field):
+    return int(field) if field else None
+
+def nmea_time(field):
+    """hhmmss.ss -> seconds of the day."""
+    if not field:
+        return None
+    return int(field[0:2]) * 3600 + int(field[2:4]) * 60 + float(field[4:])
+
+def nmea_coord(field, hemisphere):
+    """(d)ddmm.mmmmm + N/S/E/W -> signed decimal degrees."""
+    if not field:
+        return None
+    value = float(field)
+    degrees = int(value // 100)
+    degrees += (value - degrees * 100) / 60.0
+    return -degrees if hemisphere in (b'S', b'W') else degrees
+
+####################
+### NMEA decoder ###
+####################
+class NmeaDecoder:
+    """
+    Decode checksum-verified NMEA sentences into typed records. Sentences are
+    split into fields with a single bytes.split() and every field is converted
+    straight from its bytes slice.
+    """
+    def __init__(self):
+        self.decoders_ = {
+            NMEA_GGA_MSG_ID: self.decodeGGA,
+            NMEA_RMC_MSG_ID: self.decodeRMC,
+            NMEA_GLL_MSG_ID: self.decodeGLL,
+            NMEA_GSA_MSG_ID: self.decodeGSA,
+            NMEA_VTG_MSG_ID: self.decodeVTG,
+            NMEA_GST_MSG_ID: self.decodeGST,
+            NMEA_GSV_MSG_ID: self.decodeGSV,
+            NMEA_ZDA_MSG_ID: self.decodeZDA,
+            NMEA_TXT_MSG_ID: self.decodeTXT,
+        }
+        # GSV sequences in progress: (talker, signalId) -> [next msgNum, sats]
+        self.gsvParts_ = {}
+        # Analytics
+        self.malformed_ = 0
+
+    def decode(self, sentence):
+        """
+        sentence: bytes between '$' and '*' (address field and data fields).
+        Returns the decoded record, or None if the type is not supported, the
+        sentence is malformed or it is a GSV part of a sequence still incomplete.
+        """
+        fields = sentence.split(NMEA_DELIMITER)
+        address = fields[0]
+        decoder = self.decoders_.get(address[2:])
+        if decoder is None:
+            return None
+        try:
+            return decoder(address[:2], fields)
+        except (ValueError, IndexError):
+            self.malformed_ += 1
+            return None
+
+    def decodeGGA(self, talker, f):
+        return GGAData(talker, nmea_time(f[1]), nmea_coord(f[2], f[3]), nmea_coord(f[4], f[5]),
+                       int(f[6] or 0), int(f[7] or 0), nmea_float(f[8]), nmea_float(f[9]),
+                       nmea_float(f[11]), nmea_float(f[13]), nmea_int(f[14]))
+
+    def decodeRMC(self, talker, f):
+        date = f[9]
+        return RMCData(talker, nmea_time(f[1]), f[2] == b'A', nmea_coord(f[3], f[4]), nmea_coord(f[5], f[6]),
+                       nmea_float(f[7]), nmea_float(f[8]),
+                       (2000 + int(date[4:6]), int(date[2:4]), int(date[0:2])) if date else None,
+                       f[12] if len(f) > 12 else b'')
+
+    def decodeGLL(self, talker, f):
+        return GLLData(talker, nmea_coord(f[1], f[2]), nmea_coord(f[3], f[4]), nmea_time(f[5]),
+                       f[6] == b'A', f[7] if len(f) > 7 else b'')
+
+    def decodeGSA(self, talker, f):
+        return GSAData(talker, f[1], int(f[2] or 0), tuple(int(sv) for sv in f[3:15] if sv),
+                       nmea_float(f[15]), nmea_float(f[16]), nmea_float(f[17]),
+                       nmea_int(f[18]) if len(f) > 18 else None)
+
+    def decodeVTG(self, talker, f):
+        return VTGData(talker, nmea_float(f[1]), nmea_float(f[3]), nmea_float(f[5]), nmea_float(f[7]),
+                       f[9] if len(f) > 9 else b'')
+
+    def decodeGST(self, talker, f):
+        return GSTData(talker, nmea_time(f[1]), nmea_float(f[2]), nmea_float(f[3]), nmea_float(f[4]),
+                       nmea_float(f[5]), nmea_float(f[6]), nmea_float(f[7]), nmea_float(f[8]))
+
+    def decodeGSV(self, talker, f):
+        numMsg = int(f[1])
+        msgNum = int(f[2])
+        numSV = int(f[3] or 0)
+        # Satellite blocks of 4 fields, optionally followed by a lone signal ID (NMEA 4.10+)
+        nSatFields = (len(f) - 4) // 4 * 4
+        signalId = nmea_int(f[4 + nSatFields]) if len(f) - 4 > nSatFields else None
+
+        key = (talker, signalId)
+        if msgNum == 1:
+            part = [1, []]
+            self.gsvParts_[key] = part
+        else:
+            part = self.gsvParts_.get(key)
+            if part is None or part[0] != msgNum:
+                # Out of sequence, drop whatever was aggregated so far
+                self.gsvParts_.pop(key, None)
+                return None
+
+        sats = part[1]
+        for i in range(4, 4 + nSatFields, 4):
+            if f[i]:
+                sats.append(GSVSat(int(f[i]), nmea_int(f[i + 1]), nmea_int(f[i + 2]), nmea_int(f[i + 3])))
+
+        if msgNum < numMsg:
+            part[0] = msgNum + 1
+            return None
+        del self.gsvParts_[key]
+        return GSVData(talker, signalId, numSV, tuple(sats))
+
+    def decodeZDA(self, talker, f):
+        return ZDAData(talker, nmea_time(f[1]), int(f[2]), int(f[3]), int(f[4]), nmea_int(f[5]), nmea_int(f[6]))
+
+    def decodeTXT(self, talker, f):
+        # The text itself may contain commas
+        return TXTData(talker, int(f[1]), int(f[2]), int(f[3]),
+                       NMEA_DELIMITER.join(f[4:]).decode('ascii', errors='ignore'))
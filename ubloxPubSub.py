@@ -0,0 +1,125 @@
+import logging
+import threading
+from collections import deque
+from queue import Empty
+
+from ubloxDefines import *
+
+logger = logging.getLogger("GNSSDriver")
+
+#################
+### Constants ###
+#################
+SUB_QUEUE_DEFAULT_LEN = 64
+
+#########################
+### Subscription keys ###
+#########################
+def subscription_key(key):
+    """
+    Normalize what subscribers ask for into the key messages are published under:
+    (class, id) for UBX messages, NMEA msg ID (e.g. "GGA" or b"GGA") for NMEA ones.
+    """
+    if isinstance(key, tuple):
+        return ubx_msg_key(*key)
+    if isinstance(key, str):
+        return key.encode('ascii')
+    return bytes(key)
+
+####################
+### Subscription ###
+####################
+class Subscription:
+    """
+    One subscriber of a message type. Messages are delivered as (arrival ts, record)
+    either straight to callback(ts, record), run in the parser context, or into a
+    bounded queue drained by the subscriber at its own pace with get(). A full queue
+    never blocks the parser: depending on the drop policy the oldest queued message
+    or the new one is dropped, and counted.
+    """
+    def __init__(self, key, callback=None, maxlen=SUB_QUEUE_DEFAULT_LEN, drop_policy=SubDropPolicy.eDropOldest):
+        self.key_ = key
+        self.callback_ = callback
+        self.dropPolicy_ = drop_policy
+        self.queue_ = deque(maxlen=maxlen) if callback is None else None
+        self.ready_ = threading.Condition(threading.Lock())
+        # Analytics
+        self.delivered_ = 0
+        self.drops_ = 0
+        self.errors_ = 0
+
+    def deliver(self, ts, record):
+        if self.callback_ is not None:
+            try:
+                self.callback_(ts, record)
+            except Exception as e:
+                # A faulty subscriber must not break message parsing
+                self.errors_ += 1
+                logger.error(f"Subscriber of {self.key_!r} failed: {e}")
+                return
+            self.delivered_ += 1
+            return
+
+        with self.ready_:
+            if len(self.queue_) == self.queue_.maxlen:
+                self.drops_ += 1
+                if self.dropPolicy_ == SubDropPolicy.eDropNewest:
+                    return
+            # With a maxlen, the deque itself discards the oldest entry
+            self.queue_.append((ts, record))
+            self.delivered_ += 1
+            self.ready_.notify()
+
+    def get(self, timeout=None):
+        """Next (ts, record) of a queued subscription. Raises queue.Empty on timeout."""
+        with self.ready_:
+            if not self.ready_.wait_for(lambda: self.queue_, timeout):
+                raise Empty
+            return self.queue_.popleft()
+
+    def get_all(self):
+        """Drain every queued (ts, record) without blocking."""
+        with self.ready_:
+            items = list(self.queue_)
+            self.queue_.clear()
+            return items
+
+    def __len__(self):
+        return len(self.queue_) if self.queue_ is not None else 0
+
+###################
+### Message bus ###
+###################
+class MessageBus:
+    """
+    Fan out decoded messages to their subscribers. The subscriber table is replaced
+    as a whole on every (un)subscribe, so publish() reads it without locking and
+    subscribing from within a callback is allowed.
+    """
+    def __init__(self):
+        self.lock_ = threading.Lock()
+        self.subs_ = {} # key -> tuple of Subscription
+
+    def subscribe(self, subscription):
+        with self.lock_:
+            subs = dict(self.subs_)
+            subs[subscription.key_] = subs.get(subscription.key_, ()) + (subscription,)
+            self.subs_ = subs
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock_:
+            subs = dict(self.subs_)
+            remaining = tuple(s for s in subs.get(subscription.key_, ()) if s is not subscription)
+            if remaining:
+                subs[subscription.key_] = remaining
+            else:
+                subs.pop(subscription.key_, None)
+            self.subs_ = subs
+
+    def wants(self, key):
+        return key in self.subs_
+
+    def publish(self, key, ts, record):
+        for subscription in self.subs_.get(key, ()):
+            subscription.deliver(ts, record)
@@ -0,0 +1,233 @@
+import argparse
+import glob
+import logging
+import os
+import struct
+import threading
+import time
+from collections import deque
+
+from ubloxDefines import *
+from ubloxTalk import GNSSDriver, logger, RUN_IDLE_PERIOD
+
+#################
+### Constants ###
+#################
+REC_FILE_EXT = ".ubx"
+REC_INDEX_EXT = ".idx"
+REC_WRITE_BUFFER_SIZE = 1024 * 1024 # [bytes] user-space buffer of each capture file
+REC_MAX_FILE_SIZE = 64 * 1024 * 1024 # [bytes] rotate once a capture file reaches it
+REC_ROTATE_PERIOD = 3600.0 # [seconds] rotate once a capture file is this old (0 = never)
+REC_MAX_FILES = 48 # oldest capture files are deleted beyond it (0 = keep all)
+REC_FLUSH_PERIOD = 1.0 # [seconds] max time recorded bytes stay in user-space buffers
+REC_QUEUE_LEN = 4096 # chunks waiting for the writer thread before new ones are dropped
+REC_DRAIN_PERIOD = 0.05 # [seconds] writer thread wake-up period
+# Index file: header, then one entry per recorded chunk
+REC_INDEX_MAGIC = b"UBXI"
+REC_INDEX_VERSION = 1
+REC_INDEX_HEADER = struct.Struct('<4sHdd') # magic, version, wall clock and monotonic ts at file open
+REC_INDEX_ENTRY = struct.Struct('<dQ') # host monotonic arrival ts, capture file offset of the chunk first byte
+
+##############################
+### Chunk index read back ###
+##############################
+def load_chunk_index(path):
+    """
+    Read a capture index file. Returns (wall clock ts, monotonic ts) at capture open, and
+    the list of (monotonic arrival ts, file offset) of every recorded chunk. A truncated
+    last entry (recorder killed mid-write) is ignored.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, wallTs, monoTs = REC_INDEX_HEADER.unpack_from(data)
+    if magic != REC_INDEX_MAGIC or version != REC_INDEX_VERSION:
+        raise ValueError(f"{path} is not a capture index (v{REC_INDEX_VERSION})")
+    body = memoryview(data)[REC_INDEX_HEADER.size:]
+    body = body[: len(body) - len(body) % REC_INDEX_ENTRY.size]
+    return (wallTs, monoTs), list(REC_INDEX_ENTRY.iter_unpack(body))
+
+########################
+### Capture recorder ###
+########################
+class CaptureRecorder:
+    """
+    Records the raw bytes a driver receives, so that a field issue can be replayed
+    later (see CaptureReplay). Chunks handed to record() by GNSSDriver.ingest() are
+    only appended to a queue, with no locking or signalling: a writer thread wakes up
+    every REC_DRAIN_PERIOD and appends them to the current capture file through a
+    large buffered write, and the (host monotonic arrival ts, file offset) of each
+    chunk to a compact binary index file next to it. Files are rotated by size and
+    age, and only the newest max_files are kept, so it can be left on permanently.
+    If the writer falls behind by more than REC_QUEUE_LEN chunks, new chunks are
+    dropped (and counted) instead of stalling the read path.
+    """
+    def __init__(self, directory, prefix="gnss", max_file_size=REC_MAX_FILE_SIZE, rotate_period=REC_ROTATE_PERIOD,
+                 max_files=REC_MAX_FILES, flush_period=REC_FLUSH_PERIOD, buffer_size=REC_WRITE_BUFFER_SIZE):
+        self.directory_ = directory
+        self.prefix_ = prefix
+        self.maxFileSize_ = max_file_size
+        self.rotatePeriod_ = rotate_period
+        self.maxFiles_ = max_files
+        self.flushPeriod_ = flush_period
+        self.bufferSize_ = buffer_size
+        self.queue_ = deque() # (ts, chunk) waiting for the writer
+        self.stopEvent_ = threading.Event()
+        self.thread_ = None
+        self.running = False
+        # Current capture
+        self.file_ = None
+        self.indexFile_ = None
+        self.path_ = None
+        self.fileSeq_ = 0
+        self.fileOffset_ = 0
+        self.fileOpenTs_ = 0.0
+        self.lastFlushTs_ = 0.0
+        # Analytics
+        self.bytesRecorded_ = 0
+        self.chunksRecorded_ = 0
+        self.chunksDropped_ = 0
+        self.filesRotated_ = 0
+
+    # Lifecycle
+    # ---------------------------------------------
+    def start(self):
+        os.makedirs(self.directory_, exist_ok=True)
+        self.running = True
+        self.stopEvent_.clear()
+        self.thread_ = threading.Thread(target=self._write_loop, daemon=True)
+        self.thread_.start()
+        return self
+
+    def stop(self):
+        """Write whatever is queued, then close the current capture."""
+        if not self.running:
+            return
+        self.running = False
+        self.stopEvent_.set()
+        self.thread_.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # Read path side
+    # ---------------------------------------------
+    def record(self, data, ts):
+        """Queue a received chunk and its arrival ts. Never blocks."""
+        if not self.running:
+            return
+        if len(self.queue_) >= REC_QUEUE_LEN:
+            self.chunksDropped_ += 1
+        else:
+            self.queue_.append((ts, bytes(data)))
+
+    # Writer thread
+    # ---------------------------------------------
+    def _write_loop(self):
+        stopped = False
+        while not stopped:
+            stopped = self.stopEvent_.wait(REC_DRAIN_PERIOD)
+            now = time.monotonic()
+            # deque appends and pops are thread-safe, whatever is queued meanwhile is taken next time
+            for _ in range(len(self.queue_)):
+                self.write_chunk(*self.queue_.popleft(), now)
+            if self.file_ is not None:
+                if self.rotation_due(now):
+                    self.close_capture()
+                    self.filesRotated_ += 1
+                elif now - self.lastFlushTs_ >= self.flushPeriod_:
+                    self.flush(now)
+        self.close_capture()
+
+    def write_chunk(self, ts, data, now):
+        if self.file_ is None or self.rotation_due(now):
+            self.rotate(now)
+        self.indexFile_.write(REC_INDEX_ENTRY.pack(ts, self.fileOffset_))
+        self.file_.write(data)
+        self.fileOffset_ += len(data)
+        self.bytesRecorded_ += len(data)
+        self.chunksRecorded_ += 1
+
+    def rotation_due(self, now):
+        if self.fileOffset_ >= self.maxFileSize_:
+            return True
+        return self.rotatePeriod_ > 0 and now - self.fileOpenTs_ >= self.rotatePeriod_
+
+    def rotate(self, now):
+        if self.file_ is not None:
+            self.close_capture()
+            self.filesRotated_ += 1
+        self.fileSeq_ += 1
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.path_ = os.path.join(self.directory_, f"{self.prefix_}-{stamp}-{self.fileSeq_:04d}{REC_FILE_EXT}")
+        try:
+            self.file_ = open(self.path_, 'wb', buffering=self.bufferSize_)
+            self.indexFile_ = open(self.path_[: -len(REC_FILE_EXT)] + REC_INDEX_EXT, 'wb')
+        except OSError as e:
+            logger.error(f"Recorder cannot open {self.path_}: {e}")
+            raise
+        self.indexFile_.write(REC_INDEX_HEADER.pack(REC_INDEX_MAGIC, REC_INDEX_VERSION, time.time(), now))
+        self.fileOffset_ = 0
+        self.fileOpenTs_ = now
+        self.lastFlushTs_ = now
+        logger.debug(f"Recording to {self.path_}")
+        self.prune()
+
+    def flush(self, now):
+        # Capture first, so that a flushed index never points past the flushed bytes
+        self.file_.flush()
+        self.indexFile_.flush()
+        self.lastFlushTs_ = now
+
+    def close_capture(self):
+        if self.file_ is None:
+            return
+        self.file_.close()
+        self.indexFile_.close()
+        self.file_ = None
+        self.indexFile_ = None
+
+    def prune(self):
+        if self.maxFiles_ <= 0:
+            return
+        captures = sorted(glob.glob(os.path.join(self.directory_, f"{self.prefix_}-*{REC_FILE_EXT}")))
+        for path in captures[: max(0, len(captures) - self.maxFiles_)]:
+            for stale in (path, path[: -len(REC_FILE_EXT)] + REC_INDEX_EXT):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+
+############
+### Main ###
+############
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the GNSSDriver on a port while recording everything it receives")
+    parser.add_argument("port")
+    parser.add_argument("directory", help="where capture and index files are written")
+    parser.add_argument("--baud", type=int, default=38400)
+    parser.add_argument("--prefix", default="gnss")
+    parser.add_argument("--max-size", type=int, default=REC_MAX_FILE_SIZE, help="rotate at this many bytes")
+    parser.add_argument("--rotate", type=float, default=REC_ROTATE_PERIOD, help="rotate after this many seconds (0 = never)")
+    parser.add_argument("--max-files", type=int, default=REC_MAX_FILES, help="capture files kept (0 = all)")
+    parser.add_argument("--flush", type=float, default=REC_FLUSH_PERIOD, help="flush period [s]")
+    args = parser.parse_args()
+
+    logger.setLevel(logging.INFO)
+    recorder = CaptureRecorder(args.directory, args.prefix, args.max_size, args.rotate, args.max_files, args.flush)
+    driver = GNSSDriver(port=args.port, baudrate=args.baud, ingest_mode=RxIngestMode.eIngestChunk,
+                        reader_mode=RxReaderMode.eReaderBlocking)
+    driver.attach_recorder(recorder.start())
+    driver.connect()
+    try:
+        while driver.is_connected():
+            driver.wait_for_rx(timeout=RUN_IDLE_PERIOD)
+            driver.Run()
+    except KeyboardInterrupt:
+        pass
+    driver.disconnect()
+    recorder.stop()
+    print(f"\n[CaptureRecorder] {recorder.bytesRecorded_} bytes in {recorder.chunksRecorded_} chunks recorded "
+          f"({recorder.chunksDropped_} dropped, {recorder.filesRotated_} rotations)")
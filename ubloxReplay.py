@@ -0,0 +1,118 @@
+import argparse
+import logging
+import time
+from dataclasses import dataclass
+
+from ubloxDefines import *
+from ubloxTalk import GNSSDriver, logger
+
+#################
+### Constants ###
+#################
+REPLAY_CHUNK_SIZE = 4096 # [bytes] as a read(in_waiting) of a busy serial port would return
+REPLAY_PACING_PERIOD = 0.01 # [seconds] of capture fed per chunk in real-time replay
+REPLAY_DEFAULT_BAUD = 38400
+SERIAL_BITS_PER_BYTE = 10 # start + 8 data + stop bits
+
+####################
+### Replay stats ###
+####################
+@dataclass
+class ReplayStats:
+    bytes: int = 0
+    ubxFrames: int = 0
+    nmeaFrames: int = 0
+    cksumErrors: int = 0
+    elapsed: float = 0.0 # [seconds]
+
+    def frames(self):
+        return self.ubxFrames + self.nmeaFrames
+
+    def frames_per_sec(self):
+        return self.frames() / self.elapsed if self.elapsed > 0 else 0.0
+
+    def mb_per_sec(self):
+        return self.bytes / self.elapsed / 1e6 if self.elapsed > 0 else 0.0
+
+    def __str__(self):
+        return (f"{self.bytes} bytes, {self.frames()} frames ({self.ubxFrames} UBX, {self.nmeaFrames} NMEA), "
+                f"{self.cksumErrors} checksum errors in {self.elapsed:.3f} s: "
+                f"{self.frames_per_sec():.0f} frames/s, {self.mb_per_sec():.2f} MB/s")
+
+######################
+### Capture replay ###
+######################
+class CaptureReplay:
+    """
+    Replay transport: feed a recorded UBX/NMEA capture to a driver through the
+    same ingest() -> read_rx_ring() -> parse* path as live serial data, without
+    any serial device. Either at maximum speed, or paced in real time as the
+    bytes would arrive at baudrate. Chunks are timestamped with the time their
+    last byte would have arrived at baudrate since the replay start, so
+    subscribers see realistic arrival times in both modes.
+    The driver FSM is not run: nothing is ever sent to a receiver.
+    """
+    def __init__(self, driver, baudrate=REPLAY_DEFAULT_BAUD, realtime=False, chunk_size=None):
+        self.driver_ = driver
+        self.driver_.readerMode_ = RxReaderMode.eReaderExternal
+        self.byteRate_ = baudrate / SERIAL_BITS_PER_BYTE # [bytes/s]
+        self.realtime_ = realtime
+        if chunk_size is None:
+            chunk_size = max(1, int(self.byteRate_ * REPLAY_PACING_PERIOD)) if realtime else REPLAY_CHUNK_SIZE
+        if driver.ingestMode_ == RxIngestMode.eIngestDeque:
+            # The legacy ring drops what does not fit between two parses
+            chunk_size = min(chunk_size, driver.rxRing_.maxlen)
+        self.chunkSize_ = chunk_size
+
+    def replay(self, source):
+        """Replay source: a capture file path, an open binary file or a bytes-like object. Returns ReplayStats."""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            view = memoryview(source)
+            chunks = (view[start : start + self.chunkSize_] for start in range(0, len(view), self.chunkSize_))
+            return self.feed(chunks)
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                return self.feed(iter(lambda: f.read(self.chunkSize_), b""))
+        return self.feed(iter(lambda: source.read(self.chunkSize_), b""))
+
+    def feed(self, chunks):
+        driver = self.driver_
+        stats = ReplayStats()
+        ubxFrames, nmeaFrames, cksumErrors = driver.ubxFrames_, driver.nmeaFrames_, driver.cksumErrors
+
+        startTs = time.monotonic()
+        offset = 0
+        for chunk in chunks:
+            offset += len(chunk)
+            arrivalTs = startTs + offset / self.byteRate_
+            if self.realtime_:
+                delay = arrivalTs - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            driver.ingest(chunk, arrivalTs)
+            driver.read_rx_ring()
+
+        stats.elapsed = time.monotonic() - startTs
+        stats.bytes = offset
+        stats.ubxFrames = driver.ubxFrames_ - ubxFrames
+        stats.nmeaFrames = driver.nmeaFrames_ - nmeaFrames
+        stats.cksumErrors = driver.cksumErrors - cksumErrors
+        return stats
+
+############
+### Main ###
+############
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded UBX/NMEA capture through the GNSSDriver parser")
+    parser.add_argument("capture", help="raw UBX/NMEA capture file")
+    parser.add_argument("--realtime", action="store_true", help="pace the replay at the serial baud rate")
+    parser.add_argument("--baud", type=int, default=REPLAY_DEFAULT_BAUD)
+    parser.add_argument("--chunk", type=int, default=None, help="bytes fed per ingest() call")
+    parser.add_argument("--deque", action="store_true", help="use the legacy deque ingest path")
+    parser.add_argument("--debug", action="store_true", help="log every decoded message")
+    args = parser.parse_args()
+
+    logger.setLevel(logging.DEBUG if args.debug else logging.WARNING)
+    driver = GNSSDriver(ingest_mode=RxIngestMode.eIngestDeque if args.deque else RxIngestMode.eIngestChunk)
+    stats = CaptureReplay(driver, args.baud, args.realtime, args.chunk).replay(args.capture)
+    print(stats)
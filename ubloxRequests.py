@@ -0,0 +1,119 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+from ubloxDefines import *
+
+########################
+### Pending requests ###
+########################
+@dataclass
+class PendingRequest:
+    seq: int
+    key: int # ubx_msg_key of the command sent
+    msg: bytes
+    ack: bool # answered by ACK/NAK, else by a message of the same class/ID
+    deadline: float
+    retries: int # resends left
+    state: ReqState = ReqState.eReqPending
+    tries: int = 1
+    tag: Any = None # caller data telling requests of the same class/ID apart, e.g. the keys of a CFG-VALGET
+
+    def done(self):
+        return self.state != ReqState.eReqPending
+
+#########################
+### Correlation table ###
+#########################
+class RequestTable:
+    """
+    In-flight requests, so that several commands can be outstanding at once.
+    Requests are matched to their answer by class/ID: poll requests by the
+    response message, ACK-able commands by the clsID/msgID the ACK or NAK refers
+    to. Requests sharing a class/ID are answered in order by the receiver, so
+    they queue FIFO. Each request carries a deadline; when it expires the request
+    is sent again while it has retries left, and then times out.
+    Every request gets a sequence number, so that a transaction (e.g. a CFG
+    VALSET batch) can be told apart from a later one of the same class/ID.
+    Answers that say which request they belong to (e.g. CFG-VALGET responses
+    echo the requested keys) can be matched by content instead, so that a lost
+    answer does not shift the FIFO onto the following requests.
+    """
+    def __init__(self, send, timeout=UBX_RESPONSE_TIMEOUT, retries=UBX_REQ_RETRIES):
+        self.send_ = send
+        self.timeout_ = timeout
+        self.retries_ = retries
+        self.pending_ = {} # (ack, ubx_msg_key) -> deque of PendingRequest, oldest first
+        self.nextSeq_ = 1
+        # Analytics
+        self.resends_ = 0
+        self.naks_ = 0
+        self.timeouts_ = 0
+
+    def __len__(self):
+        return sum(len(requests) for requests in self.pending_.values())
+
+    def submit(self, msg, now, ack=False, timeout=None, retries=None, tag=None):
+        """Send msg and track it until answered. Returns its PendingRequest."""
+        request = PendingRequest(self.nextSeq_, ubx_msg_key(msg[UBX_MSG_CLASS_POS], msg[UBX_MSG_ID_POS]), bytes(msg),
+                                 ack, now + (self.timeout_ if timeout is None else timeout),
+                                 self.retries_ if retries is None else retries, tag=tag)
+        self.nextSeq_ += 1
+        self.pending_.setdefault((ack, request.key), deque()).append(request)
+        self.send_(request.msg)
+        return request
+
+    def resolve(self, key, ack=False, state=ReqState.eReqDone, match=None):
+        """
+        Mark the oldest request waiting for this answer (the oldest one match(request) accepts,
+        if given) as finished. Returns it, or None if unsolicited.
+        """
+        requests = self.pending_.get((ack, key))
+        if not requests:
+            return None
+        if match is None:
+            request = requests.popleft()
+        else:
+            request = next((request for request in requests if match(request)), None)
+            if request is None:
+                return None
+            requests.remove(request)
+        if not requests:
+            del self.pending_[(ack, key)]
+        request.state = state
+        if state == ReqState.eReqNak:
+            self.naks_ += 1
+        return request
+
+    def service(self, now):
+        """Resend or time out the requests past their deadline. Returns the ones that timed out."""
+        expired = []
+        for slot, requests in list(self.pending_.items()):
+            for request in list(requests):
+                if now < request.deadline:
+                    continue
+                if request.retries > 0:
+                    request.retries -= 1
+                    request.tries += 1
+                    request.deadline = now + self.timeout_
+                    self.resends_ += 1
+                    self.send_(request.msg)
+                else:
+                    request.state = ReqState.eReqTimeout
+                    requests.remove(request)
+                    self.timeouts_ += 1
+                    expired.append(request)
+            if not requests:
+                del self.pending_[slot]
+        return expired
+
+    def in_flight(self, ack=None, key=None):
+        """
+        Whether any request (only ACK-able ones, or only polls, if ack is given; only of the
+        ubx_msg_key key, if given) is still pending.
+        """
+        return any(requests for (isAck, reqKey), requests in self.pending_.items()
+                   if (ack is None or isAck == ack) and (key is None or reqKey == key))
+
+    def clear(self):
+        self.pending_.clear()
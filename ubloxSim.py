@@ -0,0 +1,340 @@
+import argparse
+import heapq
+import os
+import random
+import select
+import struct
+import threading
+import time
+import tty
+
+from ubloxDefines import *
+from ubloxCfgTable import icd_cfg_table
+from ubloxFraming import pack_ubx_frame, scan_frames
+
+#################
+### Constants ###
+#################
+SIM_DEFAULT_BAUD = 38400
+SIM_DEFAULT_NAV_RATE = 1.0 # [Hz]
+SIM_FLASH_CAPACITY = 4 * 1024 * 1024 # [bytes]
+SIM_RX_CHUNK_SIZE = 4096
+SIM_POLL_PERIOD = 0.1 # [seconds] max time the RX/TX threads block before checking for stop
+SIM_SW_VERSION = b"ROM SPG 5.10 (7b202e)"
+SIM_HW_VERSION = b"000A0000"
+SIM_EXTENSIONS = (b"FWVER=SPG 5.10", b"PROTVER=34.10", b"MOD=SIM", b"GPS;GLO;GAL;BDS")
+SIM_GNSS_MASK = 0b00001111 # GPS, GLONASS, BeiDou, Galileo
+SIM_START_ITOW = 300_000_000 # [ms]
+SERIAL_BITS_PER_BYTE = 10 # start + 8 data + stop bits
+
+###########################
+### Synthetic messages ###
+###########################
+def synthetic_nav_pvt(iTOW):
+    payload = bytearray(UBX_NAV_PVT_PAYLOAD_LEN)
+    struct.pack_into('<IHBBBBBB', payload, 0, iTOW, 2026, 10, 18, 12, 0, (iTOW // 1000) % 60, 0x37)
+    struct.pack_into('<BBBB', payload, 20, 3, 0x01, 0x00, 14)
+    struct.pack_into('<iiii', payload, 24, 21_700_000, 413_800_000, 120_000, 70_000)
+    struct.pack_into('<II', payload, 40, 1500, 2500)
+    return pack_ubx_frame(UBX_NAV_CLASS, UBX_NAV_PVT_ID, payload)
+
+def synthetic_nav_status(iTOW):
+    payload = struct.pack('<IBBBBII', iTOW, 3, 0x0D, 0x00, 0x00, 25_000, iTOW)
+    return pack_ubx_frame(UBX_NAV_CLASS, UBX_NAV_STATUS_ID, payload)
+
+def synthetic_nav_geofence(iTOW):
+    payload = struct.pack('<IBBBBBB', iTOW, 0, 1, 0, 1, 1, 0) # version, status, numFences, combState, state, id
+    return pack_ubx_frame(UBX_NAV_CLASS, UBX_NAV_GEOFENCE_ID, payload)
+
+############################
+### Simulated receiver ###
+############################
+class SimulatedReceiver:
+    """
+    Stand-in for a u-blox M10 receiver on a pseudo-terminal: open `port` as if it
+    were the real serial device. It talks the UBX subset the driver uses:
+    - CFG-VALGET answered from a layered cfg store (RAM over flash over the ICD
+      defaults of UBX_COMPLETE_ICD_DEFAULT_CFG), group wildcards paged through
+      position, CFG-VALSET and CFG-CFG ACKed, unknown key IDs NAKed, CFG-RST
+      reloads RAM silently.
+    - MON-VER, MON-GNSS, MON-RF, MON-COMMS, LOG-INFO, NAV-PVT and NAV-GEOFENCE polls.
+    - NAV-PVT + NAV-STATUS streamed at nav_rate.
+    Output is paced at baudrate. Faults can be injected per transmitted frame:
+    drop probability, single byte corruption probability and response latency.
+    """
+    def __init__(self, nav_rate=SIM_DEFAULT_NAV_RATE, baudrate=SIM_DEFAULT_BAUD, flash=True,
+                 drop_rate=0.0, corrupt_rate=0.0, latency=0.0, seed=None):
+        self.master_, self.slave_ = os.openpty()
+        tty.setraw(self.slave_)
+        self.port = os.ttyname(self.slave_)
+        self.navRate_ = nav_rate
+        self.byteRate_ = baudrate / SERIAL_BITS_PER_BYTE # [bytes/s]
+        self.flash_ = flash
+        self.dropRate_ = drop_rate
+        self.corruptRate_ = corrupt_rate
+        self.latency_ = latency
+        self.rng_ = random.Random(seed)
+
+        # Cfg store per layer
+        self.icdCfg_ = icd_cfg_table()
+        self.defaultCfg_ = dict(zip(self.icdCfg_, self.icdCfg_.expected_))
+        self.flashCfg_ = {}
+        self.ramCfg_ = dict(self.defaultCfg_)
+
+        # TX schedule: heap of (due ts, seq, frame)
+        self.txHeap_ = []
+        self.txSeq_ = 0
+        self.txReady_ = threading.Condition()
+        self.handlers_ = {
+            ubx_msg_key(UBX_CFG_CLASS, UBX_CFG_VALGET_ID): self.on_cfg_valget,
+            ubx_msg_key(UBX_CFG_CLASS, UBX_CFG_VALSET_ID): self.on_cfg_valset,
+            ubx_msg_key(UBX_CFG_CLASS, UBX_CFG_CFG_ID): self.on_cfg_cfg,
+            ubx_msg_key(UBX_CFG_CLASS, UBX_CFG_RST_ID): self.on_cfg_rst,
+            ubx_msg_key(UBX_MON_CLASS, UBX_MON_VER_ID): self.on_mon_ver,
+            ubx_msg_key(UBX_MON_CLASS, UBX_MON_GNSS_ID): self.on_mon_gnss,
+            ubx_msg_key(UBX_MON_CLASS, UBX_MON_RF_ID): self.on_mon_rf,
+            ubx_msg_key(UBX_MON_CLASS, UBX_MON_COMMS_ID): self.on_mon_comms,
+            ubx_msg_key(UBX_LOG_CLASS, UBX_LOG_INFO_ID): self.on_log_info,
+            ubx_msg_key(UBX_NAV_CLASS, UBX_NAV_PVT_ID): self.on_nav_pvt,
+            ubx_msg_key(UBX_NAV_CLASS, UBX_NAV_GEOFENCE_ID): self.on_nav_geofence,
+        }
+
+        self.running = False
+        self.threads_ = []
+        self.startTs_ = 0.0
+        # Analytics
+        self.rxFrames_ = 0
+        self.txFrames_ = 0
+        self.txBytes_ = 0
+        self.dropped_ = 0
+        self.corrupted_ = 0
+        self.naks_ = 0
+
+    # Lifecycle
+    # ---------------------------------------------
+    def start(self):
+        self.running = True
+        self.startTs_ = time.monotonic()
+        self.threads_ = [threading.Thread(target=self._rx_loop, daemon=True),
+                         threading.Thread(target=self._tx_loop, daemon=True)]
+        for thread in self.threads_:
+            thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        with self.txReady_:
+            self.txReady_.notify()
+        for thread in self.threads_:
+            thread.join()
+        os.close(self.master_)
+        os.close(self.slave_)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def itow(self):
+        return SIM_START_ITOW + int((time.monotonic() - self.startTs_) * 1000)
+
+    # RX: commands from the driver
+    # ---------------------------------------------
+    def _rx_loop(self):
+        buf = bytearray()
+        while self.running:
+            readable, _, _ = select.select([self.master_], [], [], SIM_POLL_PERIOD)
+            if not readable:
+                continue
+            try:
+                buf += os.read(self.master_, SIM_RX_CHUNK_SIZE)
+            except OSError:
+                continue # driver side not open (yet)
+            spans, resume = scan_frames(buf, 0, len(buf))
+            for start, end, kind in spans:
+                if kind == FrameKind.eFrameUBX:
+                    self.rxFrames_ += 1
+                    frame = bytes(buf[start:end])
+                    handler = self.handlers_.get(ubx_msg_key(frame[UBX_MSG_CLASS_POS], frame[UBX_MSG_ID_POS]))
+                    if handler is not None:
+                        handler(frame[UBX_MSG_CLASS_POS], frame[UBX_MSG_ID_POS], frame[UBX_PAYLOAD_POS:-UBX_CHECKSUM_LEN])
+            del buf[:resume]
+
+    def respond(self, frame):
+        self.schedule(frame, time.monotonic() + self.latency_)
+
+    def ack(self, msg_class, msg_id):
+        self.respond(pack_ubx_frame(UBX_ACK_CLASS, UBX_ACK_ACK_ID, bytes((msg_class, msg_id))))
+
+    def nak(self, msg_class, msg_id):
+        self.naks_ += 1
+        self.respond(pack_ubx_frame(UBX_ACK_CLASS, UBX_ACK_NAK_ID, bytes((msg_class, msg_id))))
+
+    def on_cfg_valget(self, msg_class, msg_id, payload):
+        layer = payload[1]
+        keyIds = struct.unpack_from(f'<{(len(payload) - 4) // 4}I', payload, 4)
+        if layer == CfgMemLayer.eLayerRAM:
+            store = self.ramCfg_
+        elif layer == CfgMemLayer.eLayerFlash:
+            store = self.flashCfg_
+        else: # default layer
+            store = self.defaultCfg_
+        position = struct.unpack_from('<H', payload, 2)[0]
+        items = []
+        for keyId in keyIds:
+            if keyId & UBX_CFG_KEY_ITEM_WILDCARD == UBX_CFG_KEY_ITEM_WILDCARD:
+                # Every item of the group (of every group for UBX_CFG_KEY_ALL_WILDCARD) held by the layer
+                groupId = cfg_key_group(keyId)
+                items += [item for item in sorted(store) if groupId == 0xFF or cfg_key_group(item) == groupId]
+            elif keyId not in self.defaultCfg_:
+                self.nak(msg_class, msg_id)
+                return
+            elif keyId in store:
+                items.append(keyId)
+        body = bytearray(struct.pack('<BBH', 1, layer, position))
+        for keyId in items[position : position + MAX_VALGET_REQ_ITEMS]:
+            val_len, val_fmt = UBX_CFG_VALUE_FMT[self.icdCfg_.value_type(keyId)]
+            body += struct.pack('<I' + val_fmt, keyId, store[keyId])
+        self.respond(pack_ubx_frame(msg_class, msg_id, body))
+
+    def on_cfg_valset(self, msg_class, msg_id, payload):
+        layers = payload[1]
+        pos = 4
+        items = []
+        while pos < len(payload):
+            keyId = struct.unpack_from('<I', payload, pos)[0]
+            pos += UBX_CFG_KEYID_LEN
+            if keyId not in self.defaultCfg_:
+                self.nak(msg_class, msg_id)
+                return
+            valueType = self.icdCfg_.value_type(keyId)
+            val_len, val_fmt = UBX_CFG_VALUE_FMT[valueType]
+            keyValue = struct.unpack_from('<' + val_fmt, payload, pos)[0]
+            if valueType == "L":
+                keyValue = bool(keyValue)
+            items.append((keyId, keyValue))
+            pos += val_len
+        if layers & (1 << CfgMemLayer.eLayerFlash) and not self.flash_:
+            self.nak(msg_class, msg_id)
+            return
+        for keyId, keyValue in items:
+            if layers & (1 << CfgMemLayer.eLayerRAM):
+                self.ramCfg_[keyId] = keyValue
+            if layers & (1 << CfgMemLayer.eLayerFlash):
+                self.flashCfg_[keyId] = keyValue
+        self.ack(msg_class, msg_id)
+
+    def reload_ram_cfg(self):
+        self.ramCfg_ = dict(self.defaultCfg_)
+        self.ramCfg_.update(self.flashCfg_)
+
+    def on_cfg_cfg(self, msg_class, msg_id, payload):
+        clearMask, saveMask, loadMask = struct.unpack_from('<III', payload)
+        if clearMask:
+            self.flashCfg_.clear()
+        if loadMask:
+            self.reload_ram_cfg()
+        self.ack(msg_class, msg_id)
+
+    def on_cfg_rst(self, msg_class, msg_id, payload):
+        # Not acknowledged by the receiver
+        self.reload_ram_cfg()
+
+    def on_mon_ver(self, msg_class, msg_id, payload):
+        body = SIM_SW_VERSION.ljust(UBX_MON_VER_SW_VERSION_LEN, b"\0") + SIM_HW_VERSION.ljust(UBX_MON_VER_HW_VERSION_LEN, b"\0")
+        body += b"".join(extension.ljust(30, b"\0") for extension in SIM_EXTENSIONS)
+        self.respond(pack_ubx_frame(msg_class, msg_id, body))
+
+    def on_mon_gnss(self, msg_class, msg_id, payload):
+        self.respond(pack_ubx_frame(msg_class, msg_id, bytes((0, SIM_GNSS_MASK, SIM_GNSS_MASK, SIM_GNSS_MASK, 4, 0, 0, 0))))
+
+    def on_mon_rf(self, msg_class, msg_id, payload):
+        block = bytes((0, 0x01, ANT_STATUS_OK, ANT_PWR_ON)) + bytes(20) # blockId, flags (jamming OK), antStatus, antPower
+        self.respond(pack_ubx_frame(msg_class, msg_id, bytes((0, 1, 0, 0)) + block))
+
+    def on_mon_comms(self, msg_class, msg_id, payload):
+        self.respond(pack_ubx_frame(msg_class, msg_id, bytes(8))) # version, nPorts, txErrors, reserved0, protIds
+
+    def on_log_info(self, msg_class, msg_id, payload):
+        body = struct.pack('<B3xI', 1, SIM_FLASH_CAPACITY if self.flash_ else 0) + bytes(40)
+        self.respond(pack_ubx_frame(msg_class, msg_id, body))
+
+    def on_nav_pvt(self, msg_class, msg_id, payload):
+        self.respond(synthetic_nav_pvt(self.itow()))
+
+    def on_nav_geofence(self, msg_class, msg_id, payload):
+        self.respond(synthetic_nav_geofence(self.itow()))
+
+    # TX: responses and periodic nav output
+    # ---------------------------------------------
+    def schedule(self, frame, due):
+        with self.txReady_:
+            heapq.heappush(self.txHeap_, (due, self.txSeq_, frame))
+            self.txSeq_ += 1
+            self.txReady_.notify()
+
+    def _tx_loop(self):
+        nextEpoch = time.monotonic()
+        while self.running:
+            now = time.monotonic()
+            if self.navRate_ > 0 and now >= nextEpoch:
+                iTOW = self.itow()
+                self.schedule(synthetic_nav_pvt(iTOW) + synthetic_nav_status(iTOW), now)
+                nextEpoch += 1.0 / self.navRate_
+                if nextEpoch < now:
+                    nextEpoch = now + 1.0 / self.navRate_ # output saturated, skip epochs
+
+            with self.txReady_:
+                frame = None
+                if self.txHeap_ and self.txHeap_[0][0] <= now:
+                    frame = heapq.heappop(self.txHeap_)[2]
+                else:
+                    wakeTs = nextEpoch if self.navRate_ > 0 else now + SIM_POLL_PERIOD
+                    if self.txHeap_:
+                        wakeTs = min(wakeTs, self.txHeap_[0][0])
+                    self.txReady_.wait(min(max(0.0, wakeTs - now), SIM_POLL_PERIOD))
+            if frame is not None:
+                self.transmit(frame)
+
+    def transmit(self, frame):
+        if self.dropRate_ and self.rng_.random() < self.dropRate_:
+            self.dropped_ += 1
+            return
+        if self.corruptRate_ and self.rng_.random() < self.corruptRate_:
+            frame = bytearray(frame)
+            frame[self.rng_.randrange(len(frame))] ^= self.rng_.randrange(1, 256)
+            self.corrupted_ += 1
+        try:
+            os.write(self.master_, frame)
+        except OSError:
+            return
+        self.txFrames_ += 1
+        self.txBytes_ += len(frame)
+        # The line stays busy while the frame is shifted out at the baud rate
+        time.sleep(len(frame) / self.byteRate_)
+
+############
+### Main ###
+############
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulated u-blox receiver on a pseudo-terminal")
+    parser.add_argument("--rate", type=float, default=SIM_DEFAULT_NAV_RATE, help="NAV-PVT/NAV-STATUS rate [Hz]")
+    parser.add_argument("--baud", type=int, default=SIM_DEFAULT_BAUD)
+    parser.add_argument("--no-flash", action="store_true", help="simulate a receiver without flash")
+    parser.add_argument("--drop", type=float, default=0.0, help="frame drop probability")
+    parser.add_argument("--corrupt", type=float, default=0.0, help="frame corruption probability")
+    parser.add_argument("--latency", type=float, default=0.0, help="response latency [s]")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    sim = SimulatedReceiver(args.rate, args.baud, not args.no_flash, args.drop, args.corrupt, args.latency, args.seed)
+    sim.start()
+    print(f"[SimulatedReceiver] Listening on {sim.port}")
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        sim.stop()
+        print(f"\n[SimulatedReceiver] Stopped: {sim.rxFrames_} frames in, {sim.txFrames_} frames out "
+              f"({sim.dropped_} dropped, {sim.corrupted_} corrupted)")
@@ -0,0 +1,108 @@
+import time
+from dataclasses import fields, MISSING
+from operator import attrgetter
+
+#########################
+### Seqlock snapshots ###
+#########################
+class SeqlockRecord:
+    """
+    Latest value of a record shared by one writer (the parser) and any number of
+    reader threads, without locks. The writer updates the fields in place between
+    two increments of a sequence counter, odd while a store is in progress (seqlock).
+    Readers copy the fields and retry if the counter was odd or moved meanwhile, so
+    they never see a half-written record and never block the writer.
+    Subclasses are built with seqlock_record(); their fields are __slots__.
+    store_from() and read(into) copy field by field, so they allocate nothing.
+    """
+    __slots__ = ("seq_",)
+    FIELDS = ()
+    DEFAULTS = ()
+    EXTRA_FIELDS = () # (field, owner attribute) of the fields not in the dataclass, leading FIELDS
+    RECORD_FIELDS = () # fields of the dataclass
+    GETTER = None
+
+    def __init__(self):
+        self.seq_ = 0
+        self._set(self.DEFAULTS)
+
+    def _set(self, values):
+        for name, value in zip(self.FIELDS, values):
+            setattr(self, name, value)
+
+    def store(self, values):
+        """Writer side: replace every field, values in FIELDS order."""
+        self.seq_ += 1
+        self._set(values)
+        self.seq_ += 1
+
+    def store_from(self, record, owner=None):
+        """
+        Writer side: replace every field with the same named attribute of record (e.g. the
+        dataclass). Extra fields are taken from owner, as attributes named like them plus a
+        trailing underscore (e.g. driverMode from driver.driverMode_).
+        """
+        self.seq_ += 1
+        for name, source in self.EXTRA_FIELDS:
+            setattr(self, name, getattr(owner, source))
+        for name in self.RECORD_FIELDS:
+            setattr(self, name, getattr(record, name))
+        self.seq_ += 1
+
+    def load(self):
+        """Reader side: torn-free (sequence, tuple of the field values in FIELDS order)."""
+        while True:
+            seq = self.seq_
+            if not seq & 1:
+                values = self.GETTER(self)
+                if self.seq_ == seq:
+                    return seq, values
+            time.sleep(0) # store in progress, let the writer thread finish it
+
+    def read(self, into=None):
+        """
+        Reader side: torn-free copy as a detached record, reusing into (same type) if
+        given. The copy keeps the version() it was taken at.
+        """
+        if into is None:
+            into = type(self)()
+        while True:
+            seq = self.seq_
+            if not seq & 1:
+                for name in self.FIELDS:
+                    setattr(into, name, getattr(self, name))
+                if self.seq_ == seq:
+                    into.seq_ = seq
+                    return into
+            time.sleep(0) # store in progress, let the writer thread finish it
+
+    def version(self):
+        """Number of stores so far, to tell whether anything new arrived since the last read."""
+        return self.seq_ >> 1
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{name}={getattr(self, name)!r}' for name in self.FIELDS)})"
+
+def seqlock_record(datacls, name=None, extra=()):
+    """
+    SeqlockRecord subclass with the fields (and defaults) of a dataclass, preceded by
+    extra (name, default) pairs (see SeqlockRecord.store_from()).
+    """
+    specs = list(extra)
+    for f in fields(datacls):
+        if f.default is not MISSING:
+            default = f.default
+        elif f.default_factory is not MISSING:
+            default = f.default_factory()
+        else:
+            default = None
+        specs.append((f.name, default))
+    names = tuple(spec[0] for spec in specs)
+    return type(name or f"{datacls.__name__}Snapshot", (SeqlockRecord,), {
+        "__slots__": names,
+        "FIELDS": names,
+        "EXTRA_FIELDS": tuple((name, name + "_") for name in names[:len(extra)]),
+        "RECORD_FIELDS": names[len(extra):],
+        "DEFAULTS": tuple(spec[1] for spec in specs),
+        "GETTER": attrgetter(*names) if len(names) > 1 else staticmethod(lambda record: (getattr(record, names[0]),)),
+    })
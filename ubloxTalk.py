@@ -1,17 +1,23 @@
 import serial
-import copy
 import threading
-from collections import deque
+from collections import Counter, deque
 import time
 import struct
 import logging
 import re
 import sys
+import functools
 from dataclasses import dataclass, field, fields, MISSING
-from typing import List, Dict, Any
+from typing import List, Dict, Set, Any
 
 from ubloxDefines import *
-from ubloxCfgIface import UBX_REMAINS_DEFAULT_CFG, UBX_COMPLETE_ICD_DEFAULT_CFG
+from ubloxCfgTable import icd_cfg_table, app_cfg_table, remains_cfg_table
+from ubloxFraming import RxByteRing, scan_frames, ubx_frame_len, ubx_checksum
+from ubloxNmea import NmeaDecoder
+from ubloxRequests import RequestTable
+from ubloxHistory import PVTHistory
+from ubloxSnapshot import seqlock_record
+from ubloxPubSub import MessageBus, Subscription, subscription_key, SUB_QUEUE_DEFAULT_LEN
 
 ##############
 ### Logger ###
@@ -45,6 +51,11 @@ logger = setup_logger("GNSSDriver")
 #################
 BUFFER_SIZE = 1024
 FIFO_QUEUE_SIZE = 512
+RX_CHUNK_RING_SIZE = 16 * BUFFER_SIZE
+RX_CHUNK_RING_MAX_SIZE = 256 * BUFFER_SIZE # fits several max-size (64 KiB payload) UBX frames
+RUN_IDLE_PERIOD = 0.025 # [seconds] max time between Run() calls with no RX data
+PVT_HISTORY_LEN = 600 # NAV-PVT epochs kept, 1 min at 10 Hz
+UBX_NAV_PVT_STRUCT = struct.Struct(UBX_NAV_PVT_FMT)
 
 #########################
 ### GNSS Driver class ###
@@ -125,21 +136,35 @@ class GNSSDriver:
         lastGeofenceReqTs_: float = 0.0
         cbit_period_: float = CBIT_PERIOD # [sec]
         gfence_state: GeofenceState = GeofenceState.eOFF
+        gfenceReq_: Any = None # PendingRequest of the last geofence CFG-VALSET
 
         def reset(self):
             default_dc_reset(self)
 
+    @dataclass(frozen=True)
+    class CfgGroupPage:
+        # One CFG-VALGET of the wildcards of several groups, answering up to MAX_VALGET_REQ_ITEMS items
+        # of their combined answer from position on
+        groupIds: tuple
+        position: int
+        last: bool # the last page the groups are expected to need, followed by another one if it comes back full
+        keyIds: tuple = () # cfg items of the groups not set as desired yet, on the first page
+
     @dataclass
     class CfgCtrlData:
         subMode_: CfgCtrlSubmode = CfgCtrlSubmode.SubModeValget
-        sentValget_: bool = False
-        keyIdsToValset_: List[int] = field(default_factory=list)
-        bMoreValgetNeeded_: bool = False
+        valgetRound_: bool = False # every cfg item not known to be set is being VALGET
+        keyIdsToValset_: Set[int] = field(default_factory=set)
         sentValset_: bool = False
-        valget_items_cntr: int = 0
         success_: bool = False
         rxValgetItemsRing_: Dict[str, Any] = field(default_factory=dict)
-        currentMemLayer_: CfgMemLayer = CfgMemLayer.eLayerRAM
+        rxValgetKeyIds_: Any = frozenset() # key IDs of the last VALGET response, to match it to its batch
+        rxValgetPosition_: int = 0 # position of the last VALGET response
+        rxValgetPairs_: int = 0 # key ID/value pairs of the last VALGET response, unknown keys included
+        rxValgetPages_: Dict[int, int] = field(default_factory=dict) # seq of an answered group page -> items answered
+        valgetTodo_: deque = field(default_factory=deque) # key ID batches and CfgGroupPages of the round not sent yet
+        valgetReqs_: List[Any] = field(default_factory=list) # PendingRequest of each VALGET batch in flight
+        valsetReqs_: List[Any] = field(default_factory=list) # PendingRequest of each layer VALSET in flight
 
         def reset(self):
             default_dc_reset(self)
@@ -152,6 +177,32 @@ class GNSSDriver:
         lat: float = 0
         height: float = 0
         heightMSL: float = 0
+        iTOW: int = 0
+        year: int = 0
+        month: int = 0
+        day: int = 0
+        hour: int = 0
+        min: int = 0
+        sec: int = 0
+        nano: int = 0
+        validDate: bool = False
+        validTime: bool = False
+        tAcc: int = 0 # [ns]
+        fixType: int = 0
+        gnssFixOK: bool = False
+        diffSoln: bool = False
+        flags: int = 0
+        flags2: int = 0
+        hAcc: float = 0 # [m]
+        vAcc: float = 0 # [m]
+        velN: float = 0 # [m/s]
+        velE: float = 0 # [m/s]
+        velD: float = 0 # [m/s]
+        gSpeed: float = 0 # [m/s]
+        headMot: float = 0 # [deg]
+        sAcc: float = 0 # [m/s]
+        headAcc: float = 0 # [deg]
+        pDOP: float = 0
 
         def reset(self):
             default_dc_reset(self)
@@ -187,7 +238,60 @@ class GNSSDriver:
         def reset(self):
             default_dc_reset(self)
 
-    def __init__(self, port='COM3', baudrate=9600, timeout=1):
+    # Records only handed to subscribers, the driver keeps no copy of them
+    @dataclass
+    class AckData:
+        ack: bool = False # False for NAK
+        clsID: int = 0
+        msgID: int = 0
+
+    @dataclass
+    class CfgValget:
+        version: int = 0
+        layer: int = 0
+        position: int = 0
+        items: Dict[int, Any] = field(default_factory=dict) # key ID -> value
+
+    @dataclass
+    class LogInfo:
+        filestoreCapacity: int = 0
+
+    @dataclass
+    class MonComms:
+        txErrors: int = 0
+
+    @dataclass
+    class MonVer:
+        swVersion: str = ""
+        hwVersion: str = ""
+        spg: float = None
+        protver: float = None
+
+    @dataclass
+    class MonGnss:
+        supported: int = 0
+        defaultGnss: int = 0
+        enabled: int = 0
+        simultaneous: int = 0
+
+    @dataclass
+    class MonRf:
+        jammingState: int = 0
+        antStatus: int = 0
+        antPwr: int = 0
+
+    # Latest state as seen by other threads, see get_pvt() and friends
+    PVTSnapshot = seqlock_record(PVTData)
+    NavStatusSnapshot = seqlock_record(NavStatus)
+    GFenceSnapshot = seqlock_record(GFence)
+    MonRfSnapshot = seqlock_record(MonRf)
+    DriverStateSnapshot = seqlock_record(PendingCmds, "DriverStateSnapshot",
+                                         extra=(("driverMode", GnssDriverMode.NoMode),))
+
+    def __init__(self, port='COM3', baudrate=9600, timeout=1, ingest_mode=RxIngestMode.eIngestDeque,
+                 reader_mode=RxReaderMode.eReaderPoll, rx_ring_cap=RX_CHUNK_RING_MAX_SIZE,
+                 pvt_history_len=PVT_HISTORY_LEN, valget_window=VALGET_PIPELINE_WINDOW,
+                 valget_mode=CfgValgetMode.eValgetKeys):
         # USB Connection
         self.port = port
         self.baudrate = baudrate
@@ -196,16 +300,44 @@ class GNSSDriver:
         self.running = False
         self.lock = threading.Lock()
         self.read_thread = None
+        self.readerMode_ = reader_mode
+        self.rxEvent_ = threading.Event() # set by the reader whenever new bytes are in the ring
+        self.recorder_ = None # optional CaptureRecorder of every received chunk
 
         # Circular buffer for RX
-        self.rxRing_ = deque(maxlen=BUFFER_SIZE)
+        self.ingestMode_ = ingest_mode
+        if self.ingestMode_ == RxIngestMode.eIngestChunk:
+            self.rxRing_ = RxByteRing(RX_CHUNK_RING_SIZE, max_capacity=rx_ring_cap)
+        else:
+            self.rxRing_ = deque(maxlen=BUFFER_SIZE)
         self.ringBytesToRead_ = 1
         self.msgBuffer_ = bytearray(BUFFER_SIZE)
         self.msgIdx_ = 0 # working index of the msg buffer
         self.parserState_ = MsgParserState.eParserNone
+        # UBX dispatch registry: ubx_msg_key(class, ID) -> handler (None if valid but not decoded).
+        # Replaced as a whole on every (un)register, so the parser reads it without locking
+        self.ubxDefaultHandlers_ = self.default_ubx_handlers()
+        self.ubxHandlers_ = dict(self.ubxDefaultHandlers_)
+        self.ubxHandlersLock_ = threading.Lock()
+        # Subscribers of decoded messages
+        self.bus_ = MessageBus()
+        self.rxFrameEnd_ = None # ring index one past the frame being parsed (chunk mode)
 
         # Pending message responses
         self.cmds = self.PendingCmds()
+        # Requests in flight, matched to their response or ACK
+        self.reqs_ = RequestTable(self.send_command)
+        # Responses matched to their request by content, ubx_msg_key -> match(request)
+        self.respMatchers_ = {ubx_msg_key(UBX_CFG_CLASS, UBX_CFG_VALGET_ID): self.valget_response_matches}
+        # Poll ubx_msg_key -> PendingCmds flag raised while it is unanswered
+        self.pollPendingFlags_ = {
+            ubx_msg_key(UBX_MON_CLASS, UBX_MON_VER_ID): "bPendingMonVer_",
+            ubx_msg_key(UBX_MON_CLASS, UBX_MON_COMMS_ID): "bPendingMonComms_",
+            ubx_msg_key(UBX_MON_CLASS, UBX_MON_RF_ID): "bPendingMonRf_",
+            ubx_msg_key(UBX_LOG_CLASS, UBX_LOG_INFO_ID): "bPendingLogInfo_",
+            ubx_msg_key(UBX_MON_CLASS, UBX_MON_GNSS_ID): "bPendingMonGnss_",
+            ubx_msg_key(UBX_NAV_CLASS, UBX_NAV_PVT_ID): "bPendingPVT_",
+        }
 
         # [RX Internal Data]
         self.bFlashAttached_ = False
@@ -215,10 +347,23 @@ class GNSSDriver:
         self.ant_status_ = 0
         self.ant_pwr_ = 0
         self.last_pvt = self.PVTData()
+        # Last epochs, for consumers needing a short history (None if pvt_history_len is 0)
+        self.pvtHistory_ = PVTHistory(pvt_history_len) if pvt_history_len else None
         self.last_status = self.NavStatus()
         self.gfence = self.GFence()
+        self.nmea_ = NmeaDecoder()
+        self.last_nmea = {} # NMEA msg ID (e.g. b"GGA") -> last decoded record
+        # Lock-free copies of the above for other threads, updated in place by the parser
+        self.pvtSnap_ = self.PVTSnapshot()
+        self.statusSnap_ = self.NavStatusSnapshot()
+        self.gfenceSnap_ = self.GFenceSnapshot()
+        self.rfSnap_ = self.MonRfSnapshot()
+        self.stateSnap_ = self.DriverStateSnapshot()
         # Analytics
         self.cksumErrors = 0
+        self.ubxFrames_ = 0 # frames with a valid checksum
+        self.nmeaFrames_ = 0
+        self.oversizeFrames_ = 0 # UBX frames dropped for not fitting in the RX ring cap
         self.wcet_ = 0.0
 
         # Driver's Finite State Machine (FSM) mode
@@ -226,6 +371,8 @@ class GNSSDriver:
 
         # [CFG Handler] Used by BIT and CBIT
         self.cfgr = self.CfgCtrlData()
+        self.valgetWindow_ = valget_window
+        self.valgetMode_ = valget_mode
 
         # [BIT] mode variables
         self.bit = self.BIT()
@@ -233,7 +380,7 @@ class GNSSDriver:
         # [PBIT] mode variables
         self.pbit = self.PBIT()
         # Application-specific config only with cfg items that differ from RX defaults
-        self.ascfg_ = copy.deepcopy(APP_SPECIFIC_CFG)
+        self.ascfg_ = app_cfg_table().clone()
 
         # [IBIT] mode variables
         self.ibit = self.IBIT()
@@ -241,7 +388,7 @@ class GNSSDriver:
         # [CBIT] mode variables
         self.cbit = self.CBIT()
         # Default config of the Ublox receiver according to ICD
-        self.defcfg_ = copy.deepcopy(UBX_REMAINS_DEFAULT_CFG)
+        self.defcfg_ = remains_cfg_table().clone()
 
         # [Operational] mode variables
         self.opmode = self.Operational()
@@ -251,11 +398,16 @@ class GNSSDriver:
     # ---------------------------------------------
     def connect(self):
         try:
-            self.ser = serial.Serial(self.port, self.baudrate, timeout=self.timeout)
+            if self.readerMode_ == RxReaderMode.eReaderExternal:
+                # Whoever feeds the driver polls the port, reads must never block
+                self.ser = serial.Serial(self.port, self.baudrate, timeout=0)
+            else:
+                self.ser = serial.Serial(self.port, self.baudrate, timeout=self.timeout)
             logger.debug(f"Connected to {self.port} at {self.baudrate} baud.")
             self.running = True
-            self.read_thread = threading.Thread(target=self._read_loop, daemon=True)
-            self.read_thread.start()
+            if self.readerMode_ != RxReaderMode.eReaderExternal:
+                self.read_thread = threading.Thread(target=self._read_loop, daemon=True)
+                self.read_thread.start()
         except serial.SerialException as e:
             logger.error(f"Connection failed: {e}")
             self.ser = None
@@ -275,13 +427,117 @@ class GNSSDriver:
         """Simulates interrupt-driven reception: producer that writes to RX buffer."""
         while self.running and self.is_connected():
             try:
-                if self.ser.in_waiting:
-                    with self.lock:
-                        # Note: calling list to store bytes as ints one by one
-                        self.rxRing_.extend( list(self.ser.readline()) )
+                if self.readerMode_ == RxReaderMode.eReaderBlocking:
+                    # Sleep in the kernel until the first byte arrives (or the serial timeout
+                    # expires), then drain whatever else came along with it
+                    data = self.ser.read(1)
+                    if data:
+                        self.ingest(data + self.ser.read(self.ser.in_waiting))
+                elif self.ser.in_waiting:
+                    if self.ingestMode_ == RxIngestMode.eIngestChunk:
+                        # One bulk read of everything the OS has buffered
+                        self.ingest(self.ser.read(self.ser.in_waiting))
+                    else:
+                        self.ingest(self.ser.readline())
             except Exception as e:
                 break
 
+    def ingest(self, data, ts=None):
+        """Store a chunk of received bytes into the RX ring. ts: its arrival time (now if not given)."""
+        if ts is None:
+            ts = time.monotonic()
+        with self.lock:
+            if self.ingestMode_ == RxIngestMode.eIngestChunk:
+                self.rxRing_.write(data, ts)
+            else:
+                # Note: bytes are stored as ints one by one
+                self.rxRing_.extend(data)
+        self.rxEvent_.set()
+        recorder = self.recorder_
+        if recorder is not None:
+            recorder.record(data, ts)
+
+    def attach_recorder(self, recorder):
+        """Hand every received chunk, with its arrival ts, to recorder (e.g. a started CaptureRecorder)."""
+        self.recorder_ = recorder
+
+    def detach_recorder(self):
+        recorder, self.recorder_ = self.recorder_, None
+        return recorder
+
+    def wait_for_rx(self, timeout=None):
+        """Block until the reader stores new bytes or timeout expires. Returns True if woken by data."""
+        woken = self.rxEvent_.wait(timeout)
+        self.rxEvent_.clear()
+        return woken
+
+    def register_ubx_handler(self, msg_class, msg_id, handler):
+        """
+        Decode a UBX message with handler(frame) instead of the built-in decoder, if any.
+        Unsupported class/IDs become valid. frame is a memoryview of the whole message,
+        from the sync chars to the checksum, only valid during the call.
+        May be called from handlers and subscriber callbacks: it takes effect from the next message.
+        """
+        with self.ubxHandlersLock_:
+            handlers = dict(self.ubxHandlers_)
+            handlers[ubx_msg_key(msg_class, msg_id)] = functools.partial(self.call_app_ubx_handler, handler)
+            self.ubxHandlers_ = handlers
+
+    def unregister_ubx_handler(self, msg_class, msg_id):
+        """
+        Remove an application handler, restoring the built-in behaviour for that message.
+        May be called from handlers and subscriber callbacks, like register_ubx_handler().
+        """
+        key = ubx_msg_key(msg_class, msg_id)
+        with self.ubxHandlersLock_:
+            handlers = dict(self.ubxHandlers_)
+            if key in self.ubxDefaultHandlers_:
+                handlers[key] = self.ubxDefaultHandlers_[key]
+            else:
+                handlers.pop(key, None)
+            self.ubxHandlers_ = handlers
+
+    def subscribe(self, key, callback=None, maxlen=SUB_QUEUE_DEFAULT_LEN, drop_policy=SubDropPolicy.eDropOldest):
+        """
+        Get every decoded message of a type, as (host arrival ts, record), instead of polling.
+        key: (class, id) of a UBX message or NMEA msg ID such as "GGA".
+        With a callback, callback(ts, record) runs in the parser context (under the driver
+        lock, so it must be quick). Without one, messages go to a queue of maxlen entries
+        read with get() on the returned subscription; once full, drop_policy decides
+        which message is lost so a slow subscriber never stalls read_rx_ring().
+        UBX messages without a built-in decoder are delivered as raw frame bytes.
+        """
+        return self.bus_.subscribe(Subscription(subscription_key(key), callback, maxlen, drop_policy))
+
+    def unsubscribe(self, subscription):
+        self.bus_.unsubscribe(subscription)
+
+    def get_pvt(self, into=None):
+        """
+        Latest NAV-PVT as a PVTSnapshot, safe to call from any thread without the driver
+        lock: the parser updates the snapshot in place under a sequence counter and the
+        copy is retried if it raced a store, so it is never torn. Pass a previous result
+        as into to reuse it instead of allocating a new one. Its version() counts the
+        NAV-PVTs decoded so far, to tell whether a newer one arrived since.
+        """
+        return self.pvtSnap_.read(into)
+
+    def get_nav_status(self, into=None):
+        """Latest NAV-STATUS as a NavStatusSnapshot, see get_pvt()."""
+        return self.statusSnap_.read(into)
+
+    def get_geofence(self, into=None):
+        """Latest NAV-GEOFENCE as a GFenceSnapshot, see get_pvt()."""
+        return self.gfenceSnap_.read(into)
+
+    def get_rf_status(self, into=None):
+        """Latest MON-RF as a MonRfSnapshot, see get_pvt()."""
+        return self.rfSnap_.read(into)
+
+    def get_driver_state(self, into=None):
+        """Driver mode and pending commands as of the end of the last Run(), see get_pvt()."""
+        return self.stateSnap_.read(into)
+
     def launch_ibit(self):
         self.cmds.bLaunchIBIT_ = True
 
@@ -300,6 +556,7 @@ class GNSSDriver:
         self.cbit.reset()
         self.opmode.reset()
         self.cmds.reset()
+        self.reqs_.clear()
         self.reset_ascfg_knowledge()
         self.reset_defcfg_knowledge()
 
@@ -313,6 +570,9 @@ class GNSSDriver:
         # Handle priority commands
         self.handle_priority_cmd()
 
+        # Resend or time out unanswered requests
+        self.service_requests()
+
         # Handle current mode actions
         self.handle_mode()
 
@@ -324,6 +584,9 @@ class GNSSDriver:
         if runExecTime > self.wcet_:
             self.wcet_ = runExecTime
 
+        # Publish mode and pending commands for get_driver_state()
+        self.stateSnap_.store_from(self.cmds, self)
+
 
     # Private member functions
     # ---------------------------------------------
@@ -343,6 +606,17 @@ class GNSSDriver:
             self.cmds.bLaunchGeofence_ = False
             self.cmds.bTeardownGeofence_ = False
 
+    def service_requests(self):
+        expired = self.reqs_.service(time.monotonic())
+        for request in expired:
+            logger.warning(f"Request {hex(request.key)} (seq {request.seq}) unanswered after {request.tries} tries")
+            # A poll given up on is no longer pending, unless another one of its message is in flight
+            flag = self.pollPendingFlags_.get(request.key)
+            if not request.ack and flag is not None and not self.reqs_.in_flight(ack=False, key=request.key):
+                setattr(self.cmds, flag, False)
+        if expired:
+            self.cmds.bPendingAck_ = self.reqs_.in_flight(ack=True)
+
     def handle_mode(self):
         if self.driverMode_ == GnssDriverMode.NoMode:
             # Transition to first mode
@@ -391,6 +665,9 @@ class GNSSDriver:
                 self.req_mon_ver()
                 self.req_flash_mem()
                 self.pbit.requestedVer_ = True
+                # Pipeline the constellations request too, its response is checked at next submode
+                self.req_supported_constellations()
+                self.pbit.requestedConstellations_ = True
             # Request was sent, and...
             else:
                 rx_version_ok = True # TODO
@@ -489,6 +766,9 @@ class GNSSDriver:
             if not self.bit.requested_comms_:
                 self.req_mon_comms()
                 self.bit.requested_comms_ = True
+                # Pipeline the interference state request too, its response is checked later
+                self.req_mon_rf()
+                self.bit.requested_mon_rf_ = True
             # Request was sent and...
             else:
                 # response arrived and comms are OK
@@ -535,148 +815,254 @@ class GNSSDriver:
         # Get values of application-specific configuration items
         # ----------------------------------------------------------------------
         if self.cfgr.subMode_ == CfgCtrlSubmode.SubModeValget:
-            # [Prepare VALGET] with ascfg to see its values
-            if not self.cfgr.sentValget_:
-                # Construct a UBX-CFG-VALGET message asking for the values of the following application-specific
-                # configuration items. Thay may already be set as desired in RAM if they were stored in flash memory
-                # in a previous BIT.
-                valget_msg = [0xB5, 0x62, 0x06, 0x8B, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00]
-                valget_fmt = '<BB8B'
-                valget_len = 4 # version, layer and position make up the 4 bytes
-                self.cfgr.valget_items_cntr = 0
-                self.cfgr.bMoreValgetNeeded_ = False
-                keys_cntr = 0
-                for keyId in cfgdb:
-                    keys_cntr += 1
-                    if self.cfgr.valget_items_cntr+1 > MAX_VALGET_REQ_ITEMS: # mind max query limit
-                        self.cfgr.bMoreValgetNeeded_ = True
-                        break
-                    # Skip those cfg items whose value is already the desired one
-                    if cfgdb[keyId]["actualVal"] == cfgdb[keyId]["expectedVal"]:
-                        continue
-
-                    valget_msg.append(keyId)
-                    valget_fmt += 'I'
-                    valget_len += 4
-                    self.cfgr.valget_items_cntr += 1
-
-                valget_msg[UBX_MSG_PAYLOAD_LEN_POS : UBX_PAYLOAD_POS] = valget_len.to_bytes(2, byteorder='little', signed=False) # add total payload length
-                valget_msg = struct.pack(valget_fmt, *valget_msg) # array of ints to bytes
-
-                if self.cfgr.valget_items_cntr == 0:
+            # [Start a VALGET round] over the cfg items of cfgdb not known to be set as desired yet,
+            # in batches. They may already be set as desired in RAM if they were stored in flash
+            # memory in a previous BIT.
+            if not self.cfgr.valgetRound_:
+                self.cfgr.valgetTodo_.extend(self.cfg_valget_batches(cfgdb))
+                if not self.cfgr.valgetTodo_:
                     logger.debug(f"CFG CTRL > VALGET not needed, all cfg values set!")
                     self.cfgr.success_ = True
-                else:
-                    # Add CRC and send the CFG-VALGET command
-                    crc = struct.pack('<BB', *self.computeUbxCRC(valget_msg[2:]))
-                    valget_msg = bytearray(valget_msg + crc)
-                    self.send_command(valget_msg)
-                    logger.debug(f"CFG CTRL > Sending VALGET for {keys_cntr}/{len(cfgdb)} cfg items")
-
-                    self.cfgr.sentValget_ = True
-
-            # [VALGET requested] awaiting response
-            else:
-                # [VALGET received] ring has data from the request
-                if len(self.cfgr.rxValgetItemsRing_) >= self.cfgr.valget_items_cntr:
-                    self.cfgr.sentValget_ = False
-                    for keyId in list(self.cfgr.rxValgetItemsRing_):
-                        # Store values in config and check if value is as expected. If not, put the
-                        # key into a "keys to VALSET" list.
-                        if keyId in cfgdb:
-                            cfgdb[keyId]["actualVal"] = self.cfgr.rxValgetItemsRing_.pop(keyId)
-                            if cfgdb[keyId]["actualVal"] != cfgdb[keyId]["expectedVal"]:
-                                self.cfgr.keyIdsToValset_.append(keyId)
-                            else:
-                                if keyId in self.cfgr.keyIdsToValset_:
-                                    self.cfgr.keyIdsToValset_.remove(keyId)
-
-                    # If all cfg values set, BIT success. If not, go to VALSET them.
-                    bAllCfgValuesSet = (len(self.cfgr.keyIdsToValset_) == 0)
-                    if bAllCfgValuesSet:
-                        if not self.cfgr.bMoreValgetNeeded_:
-                            logger.debug(f"CFG CTRL > All cfg values set!")
-                            self.cfgr.success_ = True
+                    return
+                logger.debug(f"CFG CTRL > VALGET round of {len(self.cfgr.valgetTodo_)} batches for {len(cfgdb)} cfg items")
+                # Items of the fetched groups count as not set as desired until a page answers them
+                self.cfgr.keyIdsToValset_ = {keyId for batch in self.cfgr.valgetTodo_
+                                             if isinstance(batch, self.CfgGroupPage) for keyId in batch.keyIds}
+                self.cfgr.rxValgetPages_.clear()
+                self.cfgr.valgetRound_ = True
+
+            # [VALGET batches answered] store values in config and check if they are as expected.
+            # If not, put the key into the "keys to VALSET" set.
+            inFlight = []
+            for request in self.cfgr.valgetReqs_:
+                if request.state == ReqState.eReqPending:
+                    inFlight.append(request)
+                elif request.state == ReqState.eReqDone:
+                    if isinstance(request.tag, self.CfgGroupPage):
+                        self.cfg_valget_group_page(cfgdb, request)
                     else:
-                        self.cfgr.subMode_ = CfgCtrlSubmode.SubModeValset
+                        self.cfg_valget_check(cfgdb, request.tag)
+                # [VALGET batch unanswered] even after retries, ask again
+                else:
+                    logger.debug(f"CFG CTRL > VALGET seq {request.seq} lost, requesting its batch again")
+                    self.cfgr.valgetTodo_.appendleft(request.tag)
+
+            # [Send VALGET batches] keeping up to valgetWindow_ of them in flight. Group pages are
+            # told apart by position (an empty answer holds nothing else), so a page waits while
+            # another one at its position is in flight.
+            deferred = []
+            while self.cfgr.valgetTodo_ and len(inFlight) < self.valgetWindow_:
+                batch = self.cfgr.valgetTodo_.popleft()
+                if isinstance(batch, self.CfgGroupPage):
+                    if any(isinstance(request.tag, self.CfgGroupPage) and request.tag.position == batch.position
+                           for request in inFlight):
+                        deferred.append(batch)
+                        continue
+                    request = self.send_request(self.build_cfg_valget_keys(tuple(map(cfg_group_wildcard, batch.groupIds)),
+                                                                           batch.position), tag=batch)
+                    logger.debug(f"CFG CTRL > Sending VALGET for {len(batch.groupIds)} groups from position "
+                                 f"{batch.position} (seq {request.seq})")
+                else:
+                    request = self.send_request(self.build_cfg_valget_keys(batch), tag=batch)
+                    logger.debug(f"CFG CTRL > Sending VALGET for {len(batch)} cfg items (seq {request.seq})")
+                inFlight.append(request)
+            self.cfgr.valgetTodo_.extendleft(reversed(deferred))
+            self.cfgr.valgetReqs_ = inFlight
+
+            # [VALGET round done] if all cfg values set, success. If not, go to VALSET them.
+            if not inFlight:
+                self.cfgr.valgetRound_ = False
+                if not self.cfgr.keyIdsToValset_:
+                    logger.debug(f"CFG CTRL > All cfg values set!")
+                    self.cfgr.success_ = True
+                else:
+                    self.cfgr.subMode_ = CfgCtrlSubmode.SubModeValset
 
         # Set values of application-specific configuration items
         # ----------------------------------------------------------------------
         elif self.cfgr.subMode_ == CfgCtrlSubmode.SubModeValset:
-            layer = self.cfgr.currentMemLayer_.value
-            # [Prepare VALSET] with application-specific configuration values
+            # [Prepare VALSET] one per memory layer, all of them sent at once. BBR is skipped since
+            # it was fully erased at the beginning of PBIT, we want flash (if attached).
             if not self.cfgr.sentValset_:
-                valset_msg = [0xB5, 0x62, 0x06, 0x8a, 0x00, 0x00, 0x00, 2**layer, 0x00, 0x00]
-                #                 Header,class,   ID,     length, vers,    layer,  reserved0
-                valset_fmt = '<BB8B'
-                valset_len = 4 # version, layer and reserved0 make up the 4 bytes
-                cfg_items_cntr = 0
-                # Iterate for all cfg items
-                for keyId in self.cfgr.keyIdsToValset_:
-                    # Keep in mind only 64 cfg items can be queried
-                    if cfg_items_cntr >= MAX_VALSET_REQ_ITEMS:
-                        break
-
-                    # Some messages cannot be set on some layers...
-                    if self.skip_cfg_item(keyId, self.cfgr.currentMemLayer_):
-                        cfgdb[keyId]["actualVal"] = cfgdb[keyId]["expectedVal"]
-                        continue
-
-                    # Skip those cfg items that already have the desired value
-                    if cfgdb[keyId]["actualVal"] == cfgdb[keyId]["expectedVal"]:
+                layers = [CfgMemLayer.eLayerRAM] + ([CfgMemLayer.eLayerFlash] if self.bFlashAttached_ else [])
+                for layer in layers:
+                    valset_msg, cfg_items_cntr = self.build_cfg_valset(cfgdb, self.cfgr.keyIdsToValset_, layer)
+                    if cfg_items_cntr == 0:
                         continue
+                    request = self.send_request(valset_msg, ack=True)
+                    self.cfgr.valsetReqs_.append(request)
+                    logger.debug(f"CFG CTRL > Sending CFG-VALSET command for {cfg_items_cntr} cfg items for "
+                                 f"layer={layer.value} (seq {request.seq})")
 
-                    # Add keyId to message
-                    valset_msg.append(keyId)
-                    valset_fmt += 'I'
-                    valset_len += 4
-
-                    # Add corresponding value
-                    keyValue = cfgdb[keyId]["expectedVal"]
-                    valset_msg.append(keyValue)
-                    vlen, vfmt = self.getKeyLenAndFmt(cfgdb[keyId]["type"])
-                    valset_fmt += vfmt
-                    valset_len += vlen
-
-                    cfg_items_cntr += 1
-
-                # Add total payload length
-                valset_msg[UBX_MSG_PAYLOAD_LEN_POS : UBX_PAYLOAD_POS] = valset_len.to_bytes(2, byteorder='little', signed=False)
-                # Array of ints to bytes message
-                valset_msg = struct.pack(valset_fmt, *valset_msg)
-
-                if cfg_items_cntr == 0:
+                if not self.cfgr.valsetReqs_:
                     logger.debug(f"CFG CTRL > VALSET not needed, all cfg values set!")
                     self.cfgr.subMode_ = CfgCtrlSubmode.SubModeValget
                 else:
-                    # Add CRC and send the CFG-VALSET command
-                    crc = struct.pack('<BB', *self.computeUbxCRC(valset_msg[2:]))
-                    valset_msg = bytearray(valset_msg + crc)
-                    # print("Valset send:", [hex(x) for x in valset_msg])
-                    self.send_command(valset_msg)
                     self.cmds.bPendingAck_ = True
                     self.cfgr.sentValset_ = True
-                    logger.debug(f"CFG CTRL > Sending CFG-VALSET command for {cfg_items_cntr} cfg items for {layer=}")
 
-            # [VALSET sent] awaiting ACK
+            # [VALSET sent] awaiting the ACK of every layer
             else:
-                # ACK arrived and no more cfg items pending sending
-                if not self.cmds.bPendingAck_:
+                if all(request.done() for request in self.cfgr.valsetReqs_):
+                    for request in self.cfgr.valsetReqs_:
+                        if request.state != ReqState.eReqDone:
+                            logger.warning(f"CFG CTRL > CFG-VALSET seq {request.seq} failed ({request.state.name})")
+                    self.cfgr.valsetReqs_.clear()
                     self.cfgr.sentValset_ = False
+                    # Go send another VALGET to check the values you sent are properly set
+                    self.cfgr.subMode_ = CfgCtrlSubmode.SubModeValget
+
+    def cfg_valget_batches(self, cfgdb):
+        """
+        VALGETs of the cfg items of cfgdb not known to be set as desired yet: batches of at most
+        MAX_VALGET_REQ_ITEMS key IDs and, in eValgetGroups mode, CfgGroupPages of groups with at least
+        VALGET_GROUP_MIN_ITEMS of them. Their wildcards share requests (up to MAX_VALGET_REQ_ITEMS per
+        request), paged over the combined answer. Groups are taken fullest first, as long as they do not
+        add to the requests of the round: a large group with few items wanted is read by key instead.
+        A group is expected to hold as many items in the receiver as in the ICD, so all the pages can
+        be in flight at once.
+        """
+        keyIds = [keyId for keyId in cfgdb if not cfgdb.is_set(keyId)]
+        pages = []
+        if self.valgetMode_ == CfgValgetMode.eValgetGroups:
+            groups = {}
+            for keyId in keyIds:
+                groups.setdefault(cfg_key_group(keyId), []).append(keyId)
+            icdSizes = Counter(map(cfg_key_group, icd_cfg_table()))
+            sizes = {groupId: max(icdSizes[groupId], len(groupKeyIds)) for groupId, groupKeyIds in groups.items()}
+            requests = lambda items: -(-items // MAX_VALGET_REQ_ITEMS)
+            candidates = sorted((groupId for groupId, groupKeyIds in groups.items() if len(groupKeyIds) >= VALGET_GROUP_MIN_ITEMS),
+                                key=lambda groupId: len(groups[groupId]) / sizes[groupId], reverse=True)
+            # Fewest requests over the fullest n groups fetched (the most groups on a tie, fewer bytes)
+            best, bestRequests = 0, requests(len(keyIds))
+            fetchedItems = 0 # in the combined answer
+            byKey = len(keyIds)
+            for n, groupId in enumerate(candidates, 1):
+                fetchedItems += sizes[groupId]
+                byKey -= len(groups[groupId])
+                if requests(fetchedItems) + requests(byKey) <= bestRequests:
+                    best, bestRequests = n, requests(fetchedItems) + requests(byKey)
+            fetched = sorted(candidates[:best])
+            for i in range(0, len(fetched), MAX_VALGET_REQ_ITEMS):
+                groupIds = tuple(fetched[i : i + MAX_VALGET_REQ_ITEMS])
+                size = sum(sizes[groupId] for groupId in groupIds)
+                pages += [self.CfgGroupPage(groupIds, position, position + MAX_VALGET_REQ_ITEMS >= size,
+                                            tuple(keyId for groupId in groupIds for keyId in groups[groupId])
+                                            if position == 0 else ())
+                          for position in range(0, size, MAX_VALGET_REQ_ITEMS)]
+            keyIds = [keyId for keyId in keyIds if cfg_key_group(keyId) not in fetched]
+        return pages + [tuple(keyIds[i : i + MAX_VALGET_REQ_ITEMS]) for i in range(0, len(keyIds), MAX_VALGET_REQ_ITEMS)]
+
+    def cfg_valget_check(self, cfgdb, keyIds):
+        """Store the values VALGET for keyIds in cfgdb, and track the ones not as expected for VALSET."""
+        for keyId in keyIds:
+            if keyId in self.cfgr.rxValgetItemsRing_:
+                cfgdb.set_actual(keyId, self.cfgr.rxValgetItemsRing_.pop(keyId))
+            if cfgdb.is_set(keyId):
+                self.cfgr.keyIdsToValset_.discard(keyId)
+            else: # includes keys left out of the response
+                self.cfgr.keyIdsToValset_.add(keyId)
+
+    def cfg_valget_group_page(self, cfgdb, request):
+        """
+        Store the values of an answered group page in cfgdb and check them, asking for one more page if
+        the groups turned out larger than expected. Items of the groups never answered stay to VALSET.
+        """
+        page = request.tag
+        answered = self.cfgr.rxValgetPages_.pop(request.seq, 0)
+        groupKeyIds = [keyId for keyId in self.cfgr.rxValgetItemsRing_ if cfg_key_group(keyId) in page.groupIds]
+        for keyId in groupKeyIds:
+            if keyId not in cfgdb: # item of the groups this table does not configure
+                del self.cfgr.rxValgetItemsRing_[keyId]
+        self.cfg_valget_check(cfgdb, [keyId for keyId in groupKeyIds if keyId in cfgdb])
+        if page.last and answered >= MAX_VALGET_REQ_ITEMS:
+            self.cfgr.valgetTodo_.append(self.CfgGroupPage(page.groupIds, page.position + answered, True))
+
+    def valget_response_matches(self, request):
+        """
+        Whether the CFG-VALGET response just parsed answers request: the one with its keys, or the
+        group page at its position (the only one in flight, see cfg_ctrl()), which then takes the
+        number of items answered.
+        """
+        tag = request.tag
+        if tag is None:
+            return True
+        keyIds = self.cfgr.rxValgetKeyIds_
+        if isinstance(tag, self.CfgGroupPage):
+            if self.cfgr.rxValgetPosition_ != tag.position or \
+               (keyIds and not any(cfg_key_group(keyId) in tag.groupIds for keyId in keyIds)):
+                return False
+            self.cfgr.rxValgetPages_[request.seq] = self.cfgr.rxValgetPairs_
+            return True
+        return not keyIds.isdisjoint(tag)
+
+    def build_cfg_valget_keys(self, keyIds, position=0):
+        """
+        Construct a UBX-CFG-VALGET message asking for the RAM layer values of keyIds (wildcards
+        included), skipping the first position items of the answer.
+        """
+        valget_msg = [0xB5, 0x62, 0x06, 0x8B, 0x00, 0x00, 0x00, 0x00, position & 0xFF, position >> 8]
+        valget_fmt = '<BB8B'
+        valget_len = 4 # version, layer and position make up the 4 bytes
+        for keyId in keyIds:
+            valget_msg.append(keyId)
+            valget_fmt += 'I'
+            valget_len += 4
+
+        valget_msg[UBX_MSG_PAYLOAD_LEN_POS : UBX_PAYLOAD_POS] = valget_len.to_bytes(2, byteorder='little', signed=False) # add total payload length
+        valget_msg = struct.pack(valget_fmt, *valget_msg) # array of ints to bytes
+
+        # Add CRC
+        crc = struct.pack('<BB', *self.computeUbxCRC(valget_msg[2:]))
+        return bytearray(valget_msg + crc)
+
+    def build_cfg_valset(self, cfgdb, keyIds, mem_layer):
+        """
+        Construct a UBX-CFG-VALSET message setting the expected value of the keyIds of cfgdb in mem_layer.
+        Returns (msg, items set).
+        """
+        valset_msg = [0xB5, 0x62, 0x06, 0x8a, 0x00, 0x00, 0x00, 2**mem_layer.value, 0x00, 0x00]
+        #                 Header,class,   ID,     length, vers,    layer,  reserved0
+        valset_fmt = '<BB8B'
+        valset_len = 4 # version, layer and reserved0 make up the 4 bytes
+        cfg_items_cntr = 0
+        # Iterate for all cfg items
+        for keyId in keyIds:
+            # Keep in mind only 64 cfg items can be queried
+            if cfg_items_cntr >= MAX_VALSET_REQ_ITEMS:
+                break
+
+            # Some messages cannot be set on some layers...
+            if self.skip_cfg_item(keyId, mem_layer):
+                cfgdb.set_actual(keyId, cfgdb.expected(keyId))
+                continue
+
+            # Skip those cfg items that already have the desired value
+            if cfgdb.is_set(keyId):
+                continue
 
-                    # Go to set cfg for next layer
-                    self.cfgr.currentMemLayer_ = CfgMemLayer(self.cfgr.currentMemLayer_ + 1)
+            # Add keyId to message
+            valset_msg.append(keyId)
+            valset_fmt += 'I'
+            valset_len += 4
 
-                    # Skip BBR layer since it was fully erased at the beginning of PBIT, we want flash
-                    if self.cfgr.currentMemLayer_ == CfgMemLayer.eLayerBBR:
-                        if not self.bFlashAttached_:
-                            self.cfgr.subMode_ = CfgCtrlSubmode.SubModeValget
-                        else:
-                            self.cfgr.currentMemLayer_ = CfgMemLayer(self.cfgr.currentMemLayer_ + 1)
-                    # Last memory layer done
-                    elif self.cfgr.currentMemLayer_ >= CfgMemLayer.eLayerEnumSize:
-                        # Go send another VALGET to check the values you sent are properly set
-                        self.cfgr.subMode_ = CfgCtrlSubmode.SubModeValget
+            # Add corresponding value
+            keyValue = cfgdb.expected(keyId)
+            valset_msg.append(keyValue)
+            vlen, vfmt = self.getKeyLenAndFmt(cfgdb.value_type(keyId))
+            valset_fmt += vfmt
+            valset_len += vlen
+
+            cfg_items_cntr += 1
+
+        # Add total payload length
+        valset_msg[UBX_MSG_PAYLOAD_LEN_POS : UBX_PAYLOAD_POS] = valset_len.to_bytes(2, byteorder='little', signed=False)
+        # Array of ints to bytes message
+        valset_msg = struct.pack(valset_fmt, *valset_msg)
+
+        # Add CRC
+        crc = struct.pack('<BB', *self.computeUbxCRC(valset_msg[2:]))
+        return bytearray(valset_msg + crc), cfg_items_cntr
 
     def skip_cfg_item(self, keyId, mem_layer):
         skip = False
@@ -754,7 +1140,7 @@ class GNSSDriver:
         self.cfgr.reset()
 
     def reset_defcfg_knowledge(self):
-        self.defcfg_ = copy.deepcopy(UBX_REMAINS_DEFAULT_CFG)
+        self.defcfg_.reset_actual()
     ####################################### [END] > CBIT member functions < [END] ######################################
 
 
@@ -839,7 +1225,7 @@ class GNSSDriver:
         self.ibit.reset()
 
     def reset_ascfg_knowledge(self):
-        self.ascfg_ = copy.deepcopy(APP_SPECIFIC_CFG)
+        self.ascfg_.reset_actual()
     ###################################### [END] > IBIT member functions < [END] #######################################
 
 
@@ -898,8 +1284,8 @@ class GNSSDriver:
                     self.opmode.gfence_state = GeofenceState.eRequesting
                     self.cmds.bPendingGeofence_ = True
                     self.opmode.lastGeofenceReqTs_ = time.monotonic()
-                    # self.req_cfg_geofence(self.last_pvt.lat, self.last_pvt.lon)
-                    self.req_cfg_geofence_disable()
+                    # self.opmode.gfenceReq_ = self.req_cfg_geofence(self.last_pvt.lat, self.last_pvt.lon)
+                    self.opmode.gfenceReq_ = self.req_cfg_geofence_disable()
                 else:
                     logger.warning("Operational Mode > Geofencing does not meet conditions.")
         elif self.opmode.gfence_state == GeofenceState.eRequesting:
@@ -909,8 +1295,13 @@ class GNSSDriver:
                 if self.cmds.bLaunchGeofence_:
                     logger.info("Operational Mode > Geofence already requested, WAIT!")
                 # Wait acknowledgement of the geofence request
-                if not self.cmds.bPendingAck_: # success
-                    self.opmode.gfence_state = GeofenceState.eON
+                if not self.cmds.bPendingAck_:
+                    request = self.opmode.gfenceReq_
+                    if request is None or request.state == ReqState.eReqDone: # success
+                        self.opmode.gfence_state = GeofenceState.eON
+                    else: # NAKed or unanswered
+                        self.opmode.gfence_state = GeofenceState.eOFF
+                        logger.warning("Operational Mode > couldn't set geofence.")
                 elif time_diff_from(self.opmode.lastGeofenceReqTs_) > 2.0:
                     self.opmode.gfence_state = GeofenceState.eOFF
                     logger.warning("Operational Mode > couldn't set geofence.")
@@ -932,6 +1323,10 @@ class GNSSDriver:
 
     def read_rx_ring(self):
         with self.lock:
+            if self.ingestMode_ == RxIngestMode.eIngestChunk:
+                self.scan_rx_ring()
+                return
+
             # Read until emptying the ring
             while True:
                 # Read a certain number of bytes from the RX ring into a <class 'bytes'>
@@ -961,6 +1356,59 @@ class GNSSDriver:
                     else:
                         logger.critical("[FAIL] Wrong parser state")
 
+    def scan_rx_ring(self):
+        """Chunk mode parser: frame the whole unread ring at once and hand each frame to its handler."""
+        ring = self.rxRing_
+        while True:
+            spans, resume = scan_frames(ring.buf_, ring.head_, ring.tail_, self.validUbxClassAndID)
+            self.dispatch_frames(ring.view_, spans)
+            ring.consume(resume - ring.head_)
+
+            # A pending UBX frame larger than the ring makes it grow. If it would not fit
+            # even at the ring cap, drop it and resync right after its sync chars.
+            frameLen = ubx_frame_len(ring.buf_, ring.head_, ring.tail_)
+            if frameLen is None or ring.reserve(frameLen):
+                break
+            self.oversizeFrames_ += 1
+            logger.error(f"UBX frame of {frameLen} bytes exceeds the RX ring cap of {ring.maxCapacity_}, dropping it")
+            ring.consume(len(UBX_PREAMBLE))
+
+    def dispatch_frames(self, view, spans):
+        # Handlers read each frame straight from the ring through a view, whatever its size
+        fixedBuffer = self.msgBuffer_
+        try:
+            for frameStart, frameEnd, kind in spans:
+                self.msgBuffer_ = view[frameStart:frameEnd]
+                self.msgIdx_ = frameEnd - frameStart
+                self.rxFrameEnd_ = frameEnd
+                if kind == FrameKind.eFrameUBX:
+                    self.parseUbxPayload()
+                else:
+                    self.decodeNMEA()
+        finally:
+            self.msgBuffer_ = fixedBuffer
+            self.msgIdx_ = 0
+            self.rxFrameEnd_ = None
+
+    def publish(self, key, record):
+        """Hand a decoded message to its subscribers, if any."""
+        if not self.bus_.wants(key):
+            return
+        ts = None
+        if self.rxFrameEnd_ is not None:
+            ts = self.rxRing_.arrival_ts(self.rxFrameEnd_ - 1)
+        if ts is None:
+            # Deque ingest does not timestamp chunks, use the parse time instead
+            ts = time.monotonic()
+        self.bus_.publish(key, ts, record)
+
+    def send_request(self, msg, ack=False, tag=None):
+        """
+        Send a UBX command that expects an answer: a message of its same class/ID, or an
+        ACK/NAK if ack. It is tracked until answered, resent if late. Returns its PendingRequest.
+        """
+        return self.reqs_.submit(msg, time.monotonic(), ack, tag=tag)
+
     def send_command(self, command):
         """Send a command string or bytes to the GNSS module."""
         if not self.is_connected():
@@ -988,32 +1436,32 @@ class GNSSDriver:
 
     def req_mon_ver(self):
         msg = struct.pack('>HBBHBB', 0xB562, 0x0A, 0x04, 0x0000, 0x0E, 0x34)
-        self.send_command(msg)
+        self.send_request(msg)
         self.cmds.bPendingMonVer_ = True
 
     def req_mon_comms(self):
         msg = struct.pack('>H6B', 0xB562, 0x0A, 0x36, 0x00, 0x00, 0x40, 0xCA)
-        self.send_command(msg)
+        self.send_request(msg)
         self.cmds.bPendingMonComms_ = True
 
     def req_mon_rf(self):
         msg = struct.pack('>H6B', 0xB562, 0x0A, 0x38, 0x00, 0x00, 0x42, 0xD0)
-        self.send_command(msg)
+        self.send_request(msg)
         self.cmds.bPendingMonRf_ = True
 
     def req_flash_mem(self):
         msg = struct.pack('>HBBHBB', 0xB562, 0x21, 0x08, 0x0000, 0x29, 0x9C)
-        self.send_command(msg)
+        self.send_request(msg)
         self.cmds.bPendingLogInfo_ = True
 
     def req_supported_constellations(self):
         msg = struct.pack('>HBBHBB', 0xB562, 0x0A, 0x28, 0x0000, 0x32, 0xA0)
-        self.send_command(msg)
+        self.send_request(msg)
         self.cmds.bPendingMonGnss_ = True
 
     def req_ubx_nav_pvt(self):
         msg = struct.pack('>H6B', 0xB562, 0x01, 0x07, 0x00, 0x00, 0x08, 0x19)
-        self.send_command(msg)
+        self.send_request(msg)
         self.cmds.bPendingPVT_ = True
 
     def req_cfg_geofence(self, lat, lon):
@@ -1045,8 +1493,9 @@ class GNSSDriver:
         # Add CRC and send
         crc = struct.pack('<BB', *self.computeUbxCRC(msg[2:]))
         msg = bytearray(msg + crc)
-        self.send_command(msg)
+        request = self.send_request(msg, ack=True)
         self.cmds.bPendingAck_ = True
+        return request
 
     def req_cfg_geofence_disable(self):
         # Disable all fences just in case
@@ -1062,18 +1511,19 @@ class GNSSDriver:
         # Add CRC and send
         crc = struct.pack('<BB', *self.computeUbxCRC(msg[2:]))
         msg = bytearray(msg + crc)
-        self.send_command(msg)
+        request = self.send_request(msg, ack=True)
         self.cmds.bPendingAck_ = True
+        return request
 
     def req_nav_geofence(self):
         msg = struct.pack('<8B', 0xB5, 0x62, 0x01, 0x39, 0x00, 0x00, 0x3A, 0xAF)
-        self.send_command(msg)
+        self.send_request(msg)
 
     def req_clear_all(self):
         # valdel_msg = struct.pack('>H14B', 0xB562, 0x06, 0x8C, 0x08, 0x00, 0x00, 0x06, 0x00, 0x00, 0x00, 0x00, 0xFF, 0x0F, 0xAE, 0xD3)
         #                                 Header, Class & ID,     Length, vers, lyrs,  reserved0,                   keys,        CRC
         msg = struct.pack('21B', 0xB5, 0x62, 0x06, 0x09, 0x0D, 0x00, 0xFF, 0xFF, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0xFF, 0xFF, 0x00, 0x00, 0x17, 0x2F, 0xAE)
-        self.send_command(msg)
+        self.send_request(msg, ack=True)
         self.cmds.bPendingAck_ = True
 
     def req_ubx_cfg_rst(self):
@@ -1127,28 +1577,17 @@ class GNSSDriver:
         ck_a, ck_b = self.computeUbxCRC(msgForCRC)
 
         if ck_a == self.msgBuffer_[self.msgIdx_ - 2] and ck_b == self.msgBuffer_[self.msgIdx_ - 1]:
-            if UBX_ACK_CLASS == self.msgBuffer_[UBX_MSG_CLASS_POS]:
-                self.parseAckClassMsg()
-            elif UBX_INF_CLASS == self.msgBuffer_[UBX_MSG_CLASS_POS]:
-                self.parseInfClassMsg()
-            elif UBX_CFG_CLASS == self.msgBuffer_[UBX_MSG_CLASS_POS]:
-                self.parseCfgClassMsg()
-            elif UBX_LOG_CLASS == self.msgBuffer_[UBX_MSG_CLASS_POS]:
-                self.parseLogClassMsg()
-            elif UBX_MGA_CLASS == self.msgBuffer_[UBX_MSG_CLASS_POS]:
-                self.parseMgaClassMsg()
-            elif UBX_MON_CLASS == self.msgBuffer_[UBX_MSG_CLASS_POS]:
-                self.parseMonClassMsg()
-            elif UBX_NAV_CLASS == self.msgBuffer_[UBX_MSG_CLASS_POS]:
-                self.parseNavClassMsg()
-            elif UBX_RXM_CLASS == self.msgBuffer_[UBX_MSG_CLASS_POS]:
-                self.parseRxmClassMsg()
-            elif UBX_SEC_CLASS == self.msgBuffer_[UBX_MSG_CLASS_POS]:
-                self.parseSecClassMsg()
-            elif UBX_TIM_CLASS == self.msgBuffer_[UBX_MSG_CLASS_POS]:
-                self.parseTimClassMsg()
-            elif UBX_UPD_CLASS == self.msgBuffer_[UBX_MSG_CLASS_POS]:
-                self.parseUpdClassMsg()
+            self.ubxFrames_ += 1
+            # Single lookup resolves the handler of this class/ID (None if there is no decoder for it)
+            key = ubx_msg_key(self.msgBuffer_[UBX_MSG_CLASS_POS], self.msgBuffer_[UBX_MSG_ID_POS])
+            handler = self.ubxHandlers_.get(key)
+            if handler is not None:
+                handler()
+            else:
+                self.publish(key, bytes(self.msgBuffer_[:self.msgIdx_]))
+            # Answer to a poll request in flight?
+            if self.reqs_.pending_:
+                self.reqs_.resolve(key, match=self.respMatchers_.get(key))
         else:
             self.cksumErrors += 1
             logger.error(f"Non-matching CRCs for UBX message {[hex(x) for x in msgForCRC]}")
@@ -1159,21 +1598,43 @@ class GNSSDriver:
         self.msgIdx_ = 0
         self.ringBytesToRead_ = 1
 
+    def default_ubx_handlers(self):
+        # Every UBX message defined in the ICD is recognized, even if not decoded
+        handlers = {ubx_msg_key(msg_class, msg_id): None
+                    for msg_class, msg_ids in SUPPORTED_UBX_MSGS.items() for msg_id in msg_ids}
+        handlers.update({
+            ubx_msg_key(UBX_ACK_CLASS, UBX_ACK_ACK_ID): self.parseAckClassMsg,
+            ubx_msg_key(UBX_ACK_CLASS, UBX_ACK_NAK_ID): self.parseAckClassMsg,
+            ubx_msg_key(UBX_CFG_CLASS, UBX_CFG_VALGET_ID): self.parse_cfg_valget,
+            ubx_msg_key(UBX_LOG_CLASS, UBX_LOG_INFO_ID): self.parseLogInfo,
+            ubx_msg_key(UBX_MON_CLASS, UBX_MON_COMMS_ID): self.parseMonComms,
+            ubx_msg_key(UBX_MON_CLASS, UBX_MON_VER_ID): self.parseMonVer,
+            ubx_msg_key(UBX_MON_CLASS, UBX_MON_GNSS_ID): self.parseMonGnss,
+            ubx_msg_key(UBX_MON_CLASS, UBX_MON_RF_ID): self.parseMonRf,
+            ubx_msg_key(UBX_NAV_CLASS, UBX_NAV_PVT_ID): self.parseNavPvt,
+            ubx_msg_key(UBX_NAV_CLASS, UBX_NAV_STATUS_ID): self.parseNavStatus,
+            ubx_msg_key(UBX_NAV_CLASS, UBX_NAV_GEOFENCE_ID): self.parseNavGeofence,
+        })
+        return handlers
+
+    def call_app_ubx_handler(self, handler):
+        with memoryview(self.msgBuffer_)[:self.msgIdx_] as frame:
+            handler(frame)
+
     def parseAckClassMsg(self):
         clsID = struct.unpack('B', self.msgBuffer_[UBX_ACK_CLSID_POS : UBX_ACK_MSGID_POS])[0]
         msgID = struct.unpack('B', self.msgBuffer_[UBX_ACK_MSGID_POS : UBX_ACK_MSGID_POS + 1])[0]
-        if self.msgBuffer_[UBX_MSG_ID_POS] == UBX_ACK_ACK_ID:
-            logger.debug(f"ACK for {hex(clsID)} {hex(msgID)}")
-            self.cmds.bPendingAck_ = False
-        elif self.msgBuffer_[UBX_MSG_ID_POS] == UBX_ACK_NAK_ID:
-            logger.debug(f"NACK for {hex(clsID)} {hex(msgID)}")
-
-    def parseInfClassMsg(self):
-        pass # TODO: implement
-
-    def parseCfgClassMsg(self):
-        if self.msgBuffer_[UBX_MSG_ID_POS] == UBX_CFG_VALGET_ID:
-            self.parse_cfg_valget()
+        msgId = self.msgBuffer_[UBX_MSG_ID_POS]
+        request = self.reqs_.resolve(ubx_msg_key(clsID, msgID), ack=True,
+                                     state=ReqState.eReqDone if msgId == UBX_ACK_ACK_ID else ReqState.eReqNak)
+        seq = f" (seq {request.seq})" if request is not None else ""
+        if msgId == UBX_ACK_ACK_ID:
+            logger.debug(f"ACK for {hex(clsID)} {hex(msgID)}{seq}")
+        elif msgId == UBX_ACK_NAK_ID:
+            logger.warning(f"NACK for {hex(clsID)} {hex(msgID)}{seq}")
+        # Lowered once every ACK-able command in flight is answered, ACKed or NAKed
+        self.cmds.bPendingAck_ = self.reqs_.in_flight(ack=True)
+        self.publish(ubx_msg_key(UBX_ACK_CLASS, msgId), self.AckData(msgId == UBX_ACK_ACK_ID, clsID, msgID))
 
     def parse_cfg_valget(self):
         payloadLen = struct.unpack('<H', self.msgBuffer_[UBX_MSG_PAYLOAD_LEN_POS : UBX_PAYLOAD_POS])[0]
@@ -1181,15 +1642,19 @@ class GNSSDriver:
         layer = struct.unpack('B', self.msgBuffer_[UBX_CFG_VALGET_LAYER_POS : UBX_CFG_VALGET_POSITION_POS])[0]
         position = struct.unpack('<H', self.msgBuffer_[UBX_CFG_VALGET_POSITION_POS : UBX_CFG_VALGET_FIRST_KEYID_POS])[0]
 
+        items = {}
         bParsingKeyId = True # starts by parsing key ID
         msgIdx = UBX_CFG_VALGET_FIRST_KEYID_POS
         payloadByteIdx = 4 # [bytes] since version, layer and position have already been parsed
-        while True:
+        pairs = 0 # key ID/value pairs, unknown ones included
+        # An empty response is valid, e.g. a group wildcard paged past its last item
+        while payloadByteIdx < payloadLen:
             if bParsingKeyId:
                 keyId = struct.unpack('<I', self.msgBuffer_[msgIdx : msgIdx + UBX_CFG_KEYID_LEN])[0]
-                # If Key ID is unknown, alert of error and break
-                if not keyId in UBX_COMPLETE_ICD_DEFAULT_CFG:
-                    logger.error(f"CFG-VALGET received has an unknown Key ID of {hex(keyId)}! Ignoring it...")
+                # If Key ID is unknown (e.g. returned by a wildcard), alert and skip its value
+                if not keyId in icd_cfg_table():
+                    logger.warning(f"CFG-VALGET received has an unknown Key ID of {hex(keyId)}! Ignoring it...")
+                pairs += 1
 
                 # Increment index and bytes of payload parsed
                 msgIdx += UBX_CFG_KEYID_LEN
@@ -1198,12 +1663,23 @@ class GNSSDriver:
                 bParsingKeyId = False
 
             else: # it's key value
+                if not keyId in icd_cfg_table():
+                    valueLen = cfg_key_value_len(keyId)
+                    if valueLen is None:
+                        logger.error(f"CFG-VALGET Key ID {hex(keyId)} has an invalid size, dropping the rest of the message")
+                        break
+                    msgIdx += valueLen
+                    payloadByteIdx += valueLen
+                    bParsingKeyId = True
+                    continue
+
                 # Get the type of the value that corresponds to the key ID
-                keyValue, valueLen = self.parseCfgValgetValue(self.msgBuffer_, msgIdx, UBX_COMPLETE_ICD_DEFAULT_CFG[keyId]["type"])
+                keyValue, valueLen = self.parseCfgValgetValue(self.msgBuffer_, msgIdx, icd_cfg_table().value_type(keyId))
                 logger.debug(f"VALGET parser says: KeyId {hex(keyId)} = {keyValue}")
 
                 # Store key Id/Value pair to rx VALGET dict
                 self.cfgr.rxValgetItemsRing_[keyId] = keyValue
+                items[keyId] = keyValue
 
                 # Increment index and bytes of payload parsed
                 msgIdx += valueLen
@@ -1211,11 +1687,11 @@ class GNSSDriver:
                 # Next follows a key ID
                 bParsingKeyId = True
 
-            # Stop parsing Key ID/Values pairs when payload length is reached
-            if payloadByteIdx >= payloadLen:
-                break
-
+        self.cfgr.rxValgetKeyIds_ = items.keys()
+        self.cfgr.rxValgetPosition_ = position
+        self.cfgr.rxValgetPairs_ = pairs
         logger.debug(f"CFG-VALGET parsed: {payloadLen=}, {version=}, {layer=}, {position=}")
+        self.publish(ubx_msg_key(UBX_CFG_CLASS, UBX_CFG_VALGET_ID), self.CfgValget(version, layer, position, items))
 
     def parseCfgValgetValue(self, msgBuff, currIdx, keyValueType):
         val_len, val_fmt = self.getKeyLenAndFmt(keyValueType)
@@ -1225,84 +1701,29 @@ class GNSSDriver:
         return keyValue, val_len
 
     def getKeyLenAndFmt(self, keyValueType):
-        # L: single-bit boolean (true = 1, false = 0), stored as U1
-        if keyValueType == "L":
-            val_len = 1
-            val_fmt = 'B'
-        # Unsigned little-endian 8-bit widths
-        elif keyValueType == "U1" or keyValueType == "E1" or keyValueType == "X1":
-            val_len = 1
-            val_fmt = 'B'
-        # Unsigned little-endian 16-bit widths
-        elif keyValueType == "U2" or keyValueType == "E2" or keyValueType == "X2":
-            val_len = 2
-            val_fmt = 'H'
-        # Unsigned little-endian 32-bit widths
-        elif keyValueType == "U4" or keyValueType == "E4" or keyValueType == "X4":
-            val_len = 4
-            val_fmt = 'I'
-        # Unsigned little-endian 64-bit widths
-        elif keyValueType == "U8" or keyValueType == "E8" or keyValueType == "X8":
-            val_len = 8
-            val_fmt = 'Q'
-        # IEEE 754 single (32-bit) and double (64-bit) precision floats
-        elif keyValueType == "R4":
-            val_len = 4
-            val_fmt = 'f'
-        elif keyValueType == "R8":
-            val_len = 8
-            val_fmt = 'd'
-        # I1, I2, I4, I8: signed little-endian, two's complement integers of 8-, 16-, 32- and 64-bit widths
-        elif keyValueType == "I1":
-            val_len = 1
-            val_fmt = 'b'
-        elif keyValueType == "I2":
-            val_len = 2
-            val_fmt = 'h'
-        elif keyValueType == "I4":
-            val_len = 4
-            val_fmt = 'i'
-        elif keyValueType == "I8":
-            val_len = 8
-            val_fmt = 'q'
+        # (None, None) for unknown types
+        return UBX_CFG_VALUE_FMT.get(keyValueType, (None, None))
+
+    def parseLogInfo(self):
+        flash_size = int.from_bytes(self.msgBuffer_[UBX_LOG_INFO_FILESTORE_CAPACITY_POS : UBX_LOG_INFO_RESERVED1],
+                                    byteorder='little')
+        if  flash_size >= MIN_FILESTORE_CAPACITY:
+            self.bFlashAttached_ = True
+            logger.info(f"Flash device detected with {flash_size} bytes")
         else:
-            val_len = None
-            val_fmt = None
-
-        return val_len, val_fmt
-
-    def parseLogClassMsg(self):
-        if self.msgBuffer_[UBX_MSG_ID_POS] == UBX_LOG_INFO_ID:
-            flash_size = int.from_bytes(self.msgBuffer_[UBX_LOG_INFO_FILESTORE_CAPACITY_POS : UBX_LOG_INFO_RESERVED1],
-                                        byteorder='little')
-            if  flash_size >= MIN_FILESTORE_CAPACITY:
-                self.bFlashAttached_ = True
-                logger.info(f"Flash device detected with {flash_size} bytes")
-            else:
-                # Explicitly lower it in case from PBIT to PBIT (between successive wake-ups)
-                # flash gets somehow filled
-                self.bFlashAttached_ = False
-                logger.info("Flash device NOT detected")
-            self.cmds.bPendingLogInfo_ = False
-
-    def parseMgaClassMsg(self):
-        pass # TODO: implement
-
-    def parseMonClassMsg(self):
-        if self.msgBuffer_[UBX_MSG_ID_POS] == UBX_MON_COMMS_ID:
-            self.parseMonComms()
-        elif self.msgBuffer_[UBX_MSG_ID_POS] == UBX_MON_VER_ID:
-            self.parseMonVer()
-        elif self.msgBuffer_[UBX_MSG_ID_POS] == UBX_MON_GNSS_ID:
-            self.parseMonGnss()
-        elif self.msgBuffer_[UBX_MSG_ID_POS] == UBX_MON_RF_ID:
-            self.parseMonRf()
+            # Explicitly lower it in case from PBIT to PBIT (between successive wake-ups)
+            # flash gets somehow filled
+            self.bFlashAttached_ = False
+            logger.info("Flash device NOT detected")
+        self.cmds.bPendingLogInfo_ = False
+        self.publish(ubx_msg_key(UBX_LOG_CLASS, UBX_LOG_INFO_ID), self.LogInfo(flash_size))
 
     def parseMonComms(self):
         txErrors = struct.unpack('<B', self.msgBuffer_[UBX_MON_COMMS_TXERRORS_POS : UBX_MON_COMMS_RESERVED0_POS])[0]
         self.txErrors_mem_ = txErrors & 0b0001
         self.txErrors_alloc_ = txErrors & 0b0010
         self.cmds.bPendingMonComms_ = False
+        self.publish(ubx_msg_key(UBX_MON_CLASS, UBX_MON_COMMS_ID), self.MonComms(txErrors))
 
     def parseMonVer(self):
         # Parse SW and HW version fields
@@ -1330,6 +1751,7 @@ class GNSSDriver:
         self.rx_version_ = (spg, protver)
         self.cmds.bPendingMonVer_ = False
         logger.debug(f"MON-VER parsed: {swVersion=}, {hwVersion=}, {protver=}, {spg=}")
+        self.publish(ubx_msg_key(UBX_MON_CLASS, UBX_MON_VER_ID), self.MonVer(swVersion, hwVersion, spg, protver))
 
     def parseMonGnss(self):
         supported = struct.unpack('<B', self.msgBuffer_[UBX_MON_GNSS_SUPPORTED_MASK_POS : UBX_MON_GNSS_DEFAULT_GNSS_MASK_POS])[0]
@@ -1341,6 +1763,7 @@ class GNSSDriver:
         self.cmds.bPendingMonGnss_ = False
         logger.debug(f"UBX-MON-GNSS returns > supported: {format(supported, '08b')} | defaultGnss: {format(defaultGnss, '08b')} | "\
                         f"enabled: {format(enabled, '08b')} | simultaneous: {simultaneous}")
+        self.publish(ubx_msg_key(UBX_MON_CLASS, UBX_MON_GNSS_ID), self.MonGnss(supported, defaultGnss, enabled, simultaneous))
 
     def parseMonRf(self):
         self.jamming_state = struct.unpack('<B', self.msgBuffer_[UBX_MON_RF_FLAGS_POS : UBX_MON_RF_ANTSTATUS_POS])[0]
@@ -1348,98 +1771,127 @@ class GNSSDriver:
         self.ant_pwr_ = struct.unpack('<B', self.msgBuffer_[UBX_MON_RF_ANTPOWER_POS : UBX_MON_RF_POSTSTATUS_POS])[0]
 
         self.cmds.bPendingMonRf_ = False
+        monRf = self.MonRf(self.jamming_state, self.ant_status_, self.ant_pwr_)
+        self.rfSnap_.store_from(monRf)
         logger.debug(f"UBX-MON-RF returns > JAM STATE: {self.jamming_state} | ANT_STATUS: {self.ant_status_} | ANT_PWR: {self.ant_pwr_}")
+        self.publish(ubx_msg_key(UBX_MON_CLASS, UBX_MON_RF_ID), monRf)
 
-    def parseNavClassMsg(self):
-        if self.msgBuffer_[UBX_MSG_ID_POS] == UBX_NAV_PVT_ID:
-            self.cmds.bPendingPVT_ = False
-            numSV = struct.unpack('<B', self.msgBuffer_[UBX_NAV_PVT_NUMSV_POS : UBX_NAV_PVT_LON_POS])[0]
-            lon = struct.unpack('<i', self.msgBuffer_[UBX_NAV_PVT_LON_POS : UBX_NAV_PVT_LAT_POS])[0] * UBX_NAV_LON_SCALE
-            lat = struct.unpack('<i', self.msgBuffer_[UBX_NAV_PVT_LAT_POS : UBX_NAV_PVT_HEIGHT_POS])[0] * UBX_NAV_LAT_SCALE
-            height = struct.unpack('<i', self.msgBuffer_[UBX_NAV_PVT_HEIGHT_POS : UBX_NAV_PVT_HMSL_POS])[0] * UBX_NAV_HEIGHT_SCALE
-            heightMSL = struct.unpack('<i', self.msgBuffer_[UBX_NAV_PVT_HMSL_POS : UBX_NAV_PVT_HACC_POS])[0] * UBX_NAV_HEIGHT_SCALE
-
-            # Fill last PVT data struct with PVT that just arrived
-            self.last_pvt = self.PVTData(
-                tstamp=time.monotonic(),
-                numSV=numSV,
-                lon=lon,
-                lat=lat,
-                height=height,
-                heightMSL=heightMSL,
-            )
-            logger.debug(f"{numSV=} {lon=} {lat=} {heightMSL=} | Last update: {self.last_pvt.tstamp}")
-
-        elif self.msgBuffer_[UBX_MSG_ID_POS] == UBX_NAV_STATUS_ID:
-            self.cmds.bPendingStatus_ = False
-            iTOW = struct.unpack('<I', self.msgBuffer_[UBX_NAV_STATUS_ITOW_POS : UBX_NAV_STATUS_GPSFIX_POS])[0]
-            gpsFix = struct.unpack('<B', self.msgBuffer_[UBX_NAV_STATUS_GPSFIX_POS : UBX_NAV_STATUS_FLAGS_POS])[0]
-            flags = struct.unpack('<B', self.msgBuffer_[UBX_NAV_STATUS_FLAGS_POS : UBX_NAV_STATUS_FIXSTAT_POS])[0]
-            gpsFixOk = bool(flags & (1 << 0))
-            diffSoln = bool(flags & (1 << 1))
-            wknSet = bool(flags & (1 << 2))
-            towSet = bool(flags & (1 << 3))
-
-            fixStat = struct.unpack('<B', self.msgBuffer_[UBX_NAV_STATUS_FIXSTAT_POS : UBX_NAV_STATUS_FLAGS2_POS])[0]
-            diffCorr = bool(flags & (1 << 0))
-            carrSolnValid = bool(flags & (1 << 1))
-            mapMatching = (fixStat >> 6) & 0b11
-            flags2 = struct.unpack('<B', self.msgBuffer_[UBX_NAV_STATUS_FLAGS2_POS : UBX_NAV_STATUS_TTFF_POS])[0]
-            psmState = flags2 & 0b11
-            spoofDetState = (flags2 >> 3) & 0b11
-            carrSoln = (flags2 >> 6) & 0b11
-            ttff = struct.unpack('<I', self.msgBuffer_[UBX_NAV_STATUS_TTFF_POS : UBX_NAV_STATUS_MSSS_POS])[0]
-            msss = struct.unpack('<I', self.msgBuffer_[UBX_NAV_STATUS_MSSS_POS : UBX_NAV_STATUS_MSSS_POS+4])[0]
-
-            # Fill last status data struct with the status info that just arrived
-            self.last_status = self.NavStatus(
-                tstamp=time.monotonic(),
-                iTOW=iTOW,
-                gpsFix=gpsFix,
-                gpsFixOk=gpsFixOk,
-                diffSoln=diffSoln,
-                wknSet=wknSet,
-                towSet=towSet,
-                diffCorr=diffCorr,
-                carrSolnValid=carrSolnValid,
-                mapMatching=mapMatching,
-                psmState=psmState,
-                spoofDetState=spoofDetState,
-                carrSoln=carrSoln,
-                ttff=ttff,
-                msss=msss
-            )
-            logger.debug(self.last_status)
-
-        elif self.msgBuffer_[UBX_MSG_ID_POS] == UBX_NAV_GEOFENCE_ID:
-            iTOW = struct.unpack('<I', self.msgBuffer_[UBX_NAV_GEOFENCE_ITOW_POS : UBX_NAV_GEOFENCE_STATUS_POS])[0]
-            status = struct.unpack('<B', self.msgBuffer_[UBX_NAV_GEOFENCE_STATUS_POS : UBX_NAV_GEOFENCE_NUMFENCES_POS])[0]
-            numFences = struct.unpack('<B', self.msgBuffer_[UBX_NAV_GEOFENCE_NUMFENCES_POS : UBX_NAV_GEOFENCE_COMBSTATE_POS])[0]
-            combState = struct.unpack('<B', self.msgBuffer_[UBX_NAV_GEOFENCE_COMBSTATE_POS : UBX_NAV_GEOFENCE_COMBSTATE_POS+1])[0]
-            self.gfence = self.GFence(
-                iTOW=iTOW,
-                status=status,
-                numFences=numFences,
-                combState=combState
-            )
-            logger.debug(f"{status=}, {numFences=}, {combState=}")
-        else:
-            logger.debug(f"Unknown NAV class message with ID {self.msgBuffer_[UBX_MSG_ID_POS]}")
-
-    def parseRxmClassMsg(self):
-        pass # TODO: implement
-
-    def parseSecClassMsg(self):
-        pass # TODO: implement
-
-    def parseTimClassMsg(self):
-        pass # TODO: implement
+    def parseNavPvt(self):
+        self.cmds.bPendingPVT_ = False
+        if self.msgIdx_ < UBX_PAYLOAD_POS + UBX_NAV_PVT_PAYLOAD_LEN + UBX_CHECKSUM_LEN:
+            logger.error(f"UBX-NAV-PVT too short ({self.msgIdx_} bytes), ignoring it")
+            return
 
-    def parseUpdClassMsg(self):
-        pass # TODO: implement
+        # Decode the whole payload in place with a single precompiled struct
+        (iTOW, year, month, day, hour, minute, sec, valid, tAcc, nano, fixType, flags, flags2, numSV,
+         lon, lat, height, hMSL, hAcc, vAcc, velN, velE, velD, gSpeed, headMot, sAcc, headAcc, pDOP,
+         flags3, headVeh, magDec, magAcc) = UBX_NAV_PVT_STRUCT.unpack_from(self.msgBuffer_, UBX_PAYLOAD_POS)
+
+        # Fill last PVT data struct with PVT that just arrived
+        self.last_pvt = self.PVTData(
+            time.monotonic(),
+            numSV,
+            lon * UBX_NAV_LON_SCALE,
+            lat * UBX_NAV_LAT_SCALE,
+            height * UBX_NAV_HEIGHT_SCALE,
+            hMSL * UBX_NAV_HEIGHT_SCALE,
+            iTOW,
+            year,
+            month,
+            day,
+            hour,
+            minute,
+            sec,
+            nano,
+            bool(valid & (1 << UBX_NAV_PVT_VALIDDATE_BIT)),
+            bool(valid & (1 << UBX_NAV_PVT_VALIDTIME_BIT)),
+            tAcc,
+            fixType,
+            bool(flags & (1 << UBX_NAV_PVT_GNSSFIXOK_BIT)),
+            bool(flags & (1 << UBX_NAV_PVT_DIFFSOLN_BIT)),
+            flags,
+            flags2,
+            hAcc * UBX_NAV_ACC_SCALE,
+            vAcc * UBX_NAV_ACC_SCALE,
+            velN * UBX_NAV_VEL_SCALE,
+            velE * UBX_NAV_VEL_SCALE,
+            velD * UBX_NAV_VEL_SCALE,
+            gSpeed * UBX_NAV_VEL_SCALE,
+            headMot * UBX_NAV_HEADING_SCALE,
+            sAcc * UBX_NAV_VEL_SCALE,
+            headAcc * UBX_NAV_HEADING_SCALE,
+            pDOP * UBX_NAV_DOP_SCALE,
+        )
+        pvt = self.last_pvt
+        self.pvtSnap_.store_from(pvt)
+        if self.pvtHistory_ is not None:
+            self.pvtHistory_.append(pvt.tstamp, iTOW, pvt.lat, pvt.lon, pvt.height, pvt.heightMSL, numSV, fixType,
+                                    pvt.hAcc, pvt.vAcc, pvt.sAcc)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{numSV=} {fixType=} lon={self.last_pvt.lon} lat={self.last_pvt.lat} "
+                         f"hMSL={self.last_pvt.heightMSL} hAcc={self.last_pvt.hAcc} | Last update: {self.last_pvt.tstamp}")
+        self.publish(ubx_msg_key(UBX_NAV_CLASS, UBX_NAV_PVT_ID), self.last_pvt)
+
+    def parseNavStatus(self):
+        self.cmds.bPendingStatus_ = False
+        iTOW = struct.unpack('<I', self.msgBuffer_[UBX_NAV_STATUS_ITOW_POS : UBX_NAV_STATUS_GPSFIX_POS])[0]
+        gpsFix = struct.unpack('<B', self.msgBuffer_[UBX_NAV_STATUS_GPSFIX_POS : UBX_NAV_STATUS_FLAGS_POS])[0]
+        flags = struct.unpack('<B', self.msgBuffer_[UBX_NAV_STATUS_FLAGS_POS : UBX_NAV_STATUS_FIXSTAT_POS])[0]
+        gpsFixOk = bool(flags & (1 << 0))
+        diffSoln = bool(flags & (1 << 1))
+        wknSet = bool(flags & (1 << 2))
+        towSet = bool(flags & (1 << 3))
+
+        fixStat = struct.unpack('<B', self.msgBuffer_[UBX_NAV_STATUS_FIXSTAT_POS : UBX_NAV_STATUS_FLAGS2_POS])[0]
+        diffCorr = bool(flags & (1 << 0))
+        carrSolnValid = bool(flags & (1 << 1))
+        mapMatching = (fixStat >> 6) & 0b11
+        flags2 = struct.unpack('<B', self.msgBuffer_[UBX_NAV_STATUS_FLAGS2_POS : UBX_NAV_STATUS_TTFF_POS])[0]
+        psmState = flags2 & 0b11
+        spoofDetState = (flags2 >> 3) & 0b11
+        carrSoln = (flags2 >> 6) & 0b11
+        ttff = struct.unpack('<I', self.msgBuffer_[UBX_NAV_STATUS_TTFF_POS : UBX_NAV_STATUS_MSSS_POS])[0]
+        msss = struct.unpack('<I', self.msgBuffer_[UBX_NAV_STATUS_MSSS_POS : UBX_NAV_STATUS_MSSS_POS+4])[0]
+
+        # Fill last status data struct with the status info that just arrived
+        self.last_status = self.NavStatus(
+            tstamp=time.monotonic(),
+            iTOW=iTOW,
+            gpsFix=gpsFix,
+            gpsFixOk=gpsFixOk,
+            diffSoln=diffSoln,
+            wknSet=wknSet,
+            towSet=towSet,
+            diffCorr=diffCorr,
+            carrSolnValid=carrSolnValid,
+            mapMatching=mapMatching,
+            psmState=psmState,
+            spoofDetState=spoofDetState,
+            carrSoln=carrSoln,
+            ttff=ttff,
+            msss=msss
+        )
+        self.statusSnap_.store_from(self.last_status)
+        logger.debug(self.last_status)
+        self.publish(ubx_msg_key(UBX_NAV_CLASS, UBX_NAV_STATUS_ID), self.last_status)
+
+    def parseNavGeofence(self):
+        iTOW = struct.unpack('<I', self.msgBuffer_[UBX_NAV_GEOFENCE_ITOW_POS : UBX_NAV_GEOFENCE_STATUS_POS])[0]
+        status = struct.unpack('<B', self.msgBuffer_[UBX_NAV_GEOFENCE_STATUS_POS : UBX_NAV_GEOFENCE_NUMFENCES_POS])[0]
+        numFences = struct.unpack('<B', self.msgBuffer_[UBX_NAV_GEOFENCE_NUMFENCES_POS : UBX_NAV_GEOFENCE_COMBSTATE_POS])[0]
+        combState = struct.unpack('<B', self.msgBuffer_[UBX_NAV_GEOFENCE_COMBSTATE_POS : UBX_NAV_GEOFENCE_COMBSTATE_POS+1])[0]
+        self.gfence = self.GFence(
+            iTOW=iTOW,
+            status=status,
+            numFences=numFences,
+            combState=combState
+        )
+        self.gfenceSnap_.store_from(self.gfence)
+        logger.debug(f"{status=}, {numFences=}, {combState=}")
+        self.publish(ubx_msg_key(UBX_NAV_CLASS, UBX_NAV_GEOFENCE_ID), self.gfence)
 
     def validUbxClassAndID(self, msg_class, msg_id):
-        return msg_class in SUPPORTED_UBX_MSGS and msg_id in SUPPORTED_UBX_MSGS[msg_class]
+        return ubx_msg_key(msg_class, msg_id) in self.ubxHandlers_
 
     def parseNmea(self):
         # NMEA msg end chars reached, else keep on storing chars in the buffer
@@ -1455,34 +1907,27 @@ class GNSSDriver:
         self.ringBytesToRead_ = 1
 
     def decodeNMEA(self):
-        nmeaMsgType = self.msgBuffer_[NMEA_TYPE_POS : NMEA_TYPE_POS + NMEA_TYPE_LEN]
-        msgForCRC = self.msgBuffer_[1:self.msgIdx_ - NMEA_FROM_ASTERISK_TRAIL_LEN]
-        incomingCRC = chr(self.msgBuffer_[self.msgIdx_ - 4]) + chr(self.msgBuffer_[self.msgIdx_ - 3])
-        incomingCRC = int(incomingCRC, 16)
+        msgForCRC = bytes(self.msgBuffer_[1:self.msgIdx_ - NMEA_FROM_ASTERISK_TRAIL_LEN])
+        try:
+            incomingCRC = int(bytes(self.msgBuffer_[self.msgIdx_ - 4 : self.msgIdx_ - 2]), 16)
+        except ValueError:
+            incomingCRC = None
 
         # First check that checksum is OK
         if incomingCRC != self.computeNmeaCRC(msgForCRC):
             # Ignore it and increment wrong incoming checksum messages counter
             self.cksumErrors += 1
-        elif nmeaMsgType == NMEA_GGA_MSG_ID:
-            pass # TODO: implement
-        elif nmeaMsgType == NMEA_GSA_MSG_ID:
-            pass # TODO: implement
-        elif nmeaMsgType == NMEA_VTG_MSG_ID:
-            pass # TODO: implement
-        elif nmeaMsgType == NMEA_GST_MSG_ID:
-            pass # TODO: implement
-        elif nmeaMsgType == NMEA_GSV_MSG_ID:
-            pass # TODO: implement
-        elif nmeaMsgType == NMEA_ZDA_MSG_ID:
-            pass # TODO: implement
-        elif nmeaMsgType == NMEA_TXT_MSG_ID:
-            pass # TODO: implement
-
-    def getNextNmeaDelimiter(self, nmeaMsg, startIdx):
-        for i in range(startIdx, startIdx + NMEA_MAX_FIELD_LEN):
-            if nmeaMsg[i] == ord(NMEA_DELIMITER_CHAR):
-                return i
+            return
+
+        self.nmeaFrames_ += 1
+        # Split and decode the fields straight from the sentence bytes
+        record = self.nmea_.decode(msgForCRC)
+        if record is not None:
+            nmeaMsgType = msgForCRC[NMEA_TYPE_POS - 1 : NMEA_TYPE_POS - 1 + NMEA_TYPE_LEN]
+            self.last_nmea[nmeaMsgType] = record
+            self.publish(nmeaMsgType, record)
+            if nmeaMsgType == NMEA_TXT_MSG_ID:
+                logger.debug(f"NMEA TXT: {record.text}")
 
     def computeUbxCRC(self, data):
         """
@@ -1490,12 +1935,7 @@ class GNSSDriver:
         data: bytes from CLASS through end of payload (no sync chars).
         Returns: (CK_A, CK_B)
         """
-        ck_a = 0
-        ck_b = 0
-        for byte in data:
-            ck_a = (ck_a + byte) & 0xFF
-            ck_b = (ck_b + ck_a) & 0xFF
-        return ck_a, ck_b
+        return ubx_checksum(data)
 
     def computeNmeaCRC(self, data):
         """
@@ -1525,7 +1965,9 @@ def input_listener(driver):
             driver.deactivate_geofence()
 
 if __name__ == "__main__":
-    driver = GNSSDriver(port='COM5', baudrate=38400)
+    driver = GNSSDriver(port='COM5', baudrate=38400,
+                        ingest_mode=RxIngestMode.eIngestChunk,
+                        reader_mode=RxReaderMode.eReaderBlocking)
 
     # Init
     driver.connect()
@@ -1535,8 +1977,9 @@ if __name__ == "__main__":
     # main loop
     while driver.is_connected():
         try:
-            driver.Run()  # Blocking consumer loop
-            time.sleep(0.025)
+            # Wake up as soon as bytes arrive, or periodically to keep the FSM timers running
+            driver.wait_for_rx(timeout=RUN_IDLE_PERIOD)
+            driver.Run()
         except KeyboardInterrupt:
             driver.disconnect()
             print("\n[GNSSDriver] Stopped by user.")